@@ -0,0 +1,63 @@
+import click
+
+from rippling_cli.utils.cache_utils import (
+    get_bundle_cache,
+    get_dependency_cache,
+    get_response_cache,
+    get_wheelhouse_size,
+    prune_wheelhouse,
+)
+from rippling_cli.utils.file_utils import format_size
+
+
+@click.group()
+def cache():
+    """
+    Inspect and prune the local caches used when packaging apps and calling the API.
+
+    The caches live in the rippling cli directory of the home directory and hold the built bundles, the installed
+    dependency trees, the downloaded wheels and the responses of the read endpoints.
+    """
+
+
+@cache.command()
+def info() -> None:
+    """
+    Display the entries and the size of every local cache.
+    """
+    for name, disk_cache in [("Bundles", get_bundle_cache()), ("Dependencies", get_dependency_cache()),
+                             ("Responses", get_response_cache())]:
+        entries = disk_cache.entries()
+        total_size = sum(entry.size for entry in entries)
+        click.echo(click.style(f"{name}: {len(entries)} entries, {format_size(total_size)}", bold=True))
+        for entry in entries:
+            click.echo(f"- {entry.key[:12]}  {format_size(entry.size)}")
+    click.echo(click.style(f"Wheelhouse: {format_size(get_wheelhouse_size())}", bold=True))
+
+
+@cache.command()
+@click.option("--all", "prune_all", is_flag=True, help="Remove every cache entry.")
+@click.option("--max_size", type=int, help="Shrink the dependency cache to this size (in MB).")
+def prune(prune_all: bool, max_size: int) -> None:
+    """
+    Remove the least recently used cache entries above the cache limits.
+    """
+    bundle_cache = get_bundle_cache()
+    dependency_cache = get_dependency_cache()
+    response_cache = get_response_cache()
+
+    if prune_all:
+        bundle_cache.clear()
+        dependency_cache.clear()
+        response_cache.clear()
+        prune_wheelhouse(max_bytes=0)
+        click.echo("All caches cleared.")
+        return
+
+    for disk_cache in [bundle_cache, dependency_cache, response_cache]:
+        disk_cache.remove_stale_staging()
+    bundle_cache.evict()
+    response_cache.evict()
+    dependency_cache.evict(max_bytes=max_size * 1024 * 1024 if max_size is not None else None)
+    prune_wheelhouse()
+    click.echo("Caches pruned.")
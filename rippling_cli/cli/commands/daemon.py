@@ -0,0 +1,88 @@
+import socket
+import subprocess
+import sys
+import time
+
+import click
+
+from rippling_cli.config.config import create_base_directory_if_not_exists, get_daemon_socket_path, global_config_dir
+from rippling_cli.constants import DAEMON_IDLE_TIMEOUT, DAEMON_LOG_FILE_NAME, DAEMON_START_TIMEOUT
+from rippling_cli.core.daemon_client import request_daemon
+
+
+@click.group()
+def daemon():
+    """
+    Run the commands of the rippling cli in a background process that stays up.
+
+    While the daemon runs, the rippling command forwards the commands to it over a local socket, so that they reuse
+    its loaded modules, credentials, HTTP connections and caches instead of loading them again. Set the
+    RIPPLING_NO_DAEMON environment variable to run a command without the daemon.
+    """
+
+
+@daemon.command()
+@click.option("--foreground", is_flag=True, help="Run the daemon in this process instead of in the background.")
+@click.option("--idle_timeout", type=int, default=DAEMON_IDLE_TIMEOUT, show_default=True,
+              help="Stop the daemon after this many seconds without commands.")
+@click.pass_context
+def start(ctx, foreground: bool, idle_timeout: int) -> None:
+    """
+    Start the daemon, unless it is already running.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        click.echo("The daemon is not supported on this platform.")
+        return
+    socket_path = get_daemon_socket_path()
+    if request_daemon(socket_path, {"type": "status"}):
+        click.echo("The daemon is already running.")
+        return
+
+    create_base_directory_if_not_exists()
+    # Left by a daemon that did not stop cleanly
+    socket_path.unlink(missing_ok=True)
+    if foreground:
+        from rippling_cli.core.daemon import DaemonServer
+        server = DaemonServer(socket_path, ctx.find_root().command, idle_timeout)
+        click.echo(f"Daemon listening on {socket_path}")
+        server.serve()
+        return
+
+    log_file = global_config_dir / DAEMON_LOG_FILE_NAME
+    # A frozen executable is the CLI itself and cannot run modules
+    command = [sys.argv[0]] if getattr(sys, "frozen", False) else [sys.executable, "-m", "rippling_cli.cli.main"]
+    with log_file.open("ab") as log:
+        subprocess.Popen([*command, "daemon", "start", "--foreground", "--idle_timeout", str(idle_timeout)],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = request_daemon(socket_path, {"type": "status"})
+        if status:
+            click.echo(f"Daemon started (pid {status['pid']}).")
+            return
+        time.sleep(0.05)
+    click.echo(f"The daemon did not start, see {log_file}")
+
+
+@daemon.command()
+def stop() -> None:
+    """
+    Stop the daemon once the command it is running, if any, is done.
+    """
+    if request_daemon(get_daemon_socket_path(), {"type": "stop"}) is None:
+        click.echo("The daemon is not running.")
+        return
+    click.echo("Daemon stopped.")
+
+
+@daemon.command()
+def status() -> None:
+    """
+    Display whether the daemon is running and the commands it ran.
+    """
+    status = request_daemon(get_daemon_socket_path(), {"type": "status"})
+    if status is None:
+        click.echo("The daemon is not running.")
+        return
+    click.echo(f"Daemon running (pid {status['pid']}) for {time.time() - status['started_at']:.0f}s, "
+               f"{status['commands_run']} commands run.")
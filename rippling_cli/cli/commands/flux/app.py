@@ -9,8 +9,9 @@ from rippling_cli.utils.app_utils import (
     get_app_install,
     install_app_for_company,
 )
+from rippling_cli.utils.completion_utils import APP_ID, remember_ids
 from rippling_cli.utils.login_utils import ensure_logged_in
-from rippling_cli.utils.pagination_utils import paginate_data
+from rippling_cli.utils.pagination_utils import list_data, listing_options
 from rippling_cli.utils.server import set_forwarding_url, validate_forwarding_url_set
 
 
@@ -31,18 +32,21 @@ def app(ctx: click.Context):
 
 @app.command()
 @click.option("--search_query", type=str, help="search query to filter apps.")
-def list(search_query: str) -> None:
+@listing_options
+def list(search_query: str, fetch_all: bool, page_size: int, limit: int, output_format: str) -> None:
     """
     Display a list of all apps owned by the developer.
 
     This command retrieves and displays a list of all apps owned by the
     currently logged-in developer. It paginates the data and displays the
-    app ID, display name, and app name for each app.
+    app ID, display name, and app name for each app. With --format, every
+    app is exported to stdout as JSON lines, CSV or JSON instead.
 
     """
     ctx: click.Context = click.get_current_context()
     endpoint = "/apps/api/integrations"
-    paginate_data(endpoint, ctx.obj.oauth_token, display_apps, search_query=search_query)
+    list_data(endpoint, ctx.obj.oauth_token, display_apps, search_query=search_query, fetch_all=fetch_all,
+              page_size=page_size, limit=limit, output_format=output_format)
 
 
 @app.command()
@@ -65,6 +69,7 @@ def set(app_id: str):
     app_name = app_json.get("name")
 
     save_app_config(app_id, display_name, app_name)
+    remember_ids(APP_ID, [app_id])
     click.echo(f"Current app set to {display_name} ({app_id})")
 
 
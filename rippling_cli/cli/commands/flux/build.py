@@ -1,6 +1,11 @@
+from typing import Optional
+
 import click
 
 from rippling_cli.config.config import get_app_config
+from rippling_cli.constants import DEFAULT_COMPRESSION_LEVEL
+from rippling_cli.core.async_api_client import run_concurrently
+from rippling_cli.core.profiler import profile_stage, profiling
 from rippling_cli.core.setup_project import setup_project
 from rippling_cli.utils.api_utils import delete_data_by_id, get_data_by_id
 from rippling_cli.utils.app_utils import get_starter_package_for_app
@@ -14,7 +19,7 @@ from rippling_cli.utils.build_utils import (
 )
 from rippling_cli.utils.file_utils import download_file_using_url, extract_zip_to_current_cwd
 from rippling_cli.utils.login_utils import ensure_logged_in, get_current_role_name_and_email
-from rippling_cli.utils.pagination_utils import paginate_data
+from rippling_cli.utils.pagination_utils import list_data, listing_options
 
 
 @click.group()
@@ -57,8 +62,9 @@ def init() -> None:
             return
         remove_existing_starter_package()
 
-    # get the starter package for the app
-    download_url: str = get_starter_package_for_app(ctx.obj.oauth_token)
+    # get the starter package for the app, and the name and email the project is set up with
+    download_url, (name, email) = run_concurrently(lambda: get_starter_package_for_app(ctx.obj.oauth_token),
+                                                   lambda: get_current_role_name_and_email(ctx.obj.oauth_token))
     if not download_url:
         click.echo("No starter package found.")
         return
@@ -74,21 +80,21 @@ def init() -> None:
     # extract the starter package
     extract_zip_to_current_cwd(filename)
 
-    name, email = get_current_role_name_and_email(ctx.obj.oauth_token)
-
     # setup the project
     setup_project(name, email)
 
 
 @build.command()
 @click.option("--search_query", type=str, help="search query to filter builds")
-def list(search_query: str) -> None:
+@listing_options
+def list(search_query: str, fetch_all: bool, page_size: int, limit: int, output_format: str) -> None:
     """
     List all builds along with their statuses.
 
     This command retrieves and displays a list of all builds for the current
     app, along with their respective statuses (e.g., draft, deploying, deployed,
-    deploy_failed).
+    deploy_failed). With --format, every build is exported to stdout as JSON
+    lines, CSV or JSON instead.
 
     """
     ctx: click.Context = click.get_current_context()
@@ -99,7 +105,8 @@ def list(search_query: str) -> None:
     endpoint = "/apps/api/app_builds"
     app_name = app_config.get("name")
     data = {"app_name": app_name}
-    paginate_data(endpoint, ctx.obj.oauth_token, display_builds, data=data, search_query=search_query)
+    list_data(endpoint, ctx.obj.oauth_token, display_builds, data=data, search_query=search_query,
+              fetch_all=fetch_all, page_size=page_size, limit=limit, output_format=output_format)
 
 
 @build.command()
@@ -143,7 +150,20 @@ def delete(build_id: str):
 
 
 @build.command()
-def upload() -> None:
+@click.option("--compression_level", type=click.IntRange(0, 9), default=DEFAULT_COMPRESSION_LEVEL,
+              help="Deflate level used for the bundle, from 0 (store only) to 9 (smallest).")
+@click.option("--stream_upload", is_flag=True,
+              help="Stream the bundle to S3 while it is being packaged, without writing it to disk. The "
+                   "upload url has to accept chunked transfer encoding, the bundle is written to disk first "
+                   "when it does not.")
+@click.option("--reproducible", is_flag=True,
+              help="Package a reproducible bundle: sorted entries with normalized timestamps and permissions.")
+@click.option("--profile", is_flag=True,
+              help="Print the wall time, CPU time, bytes processed and peak memory rise of every packaging stage.")
+@click.option("--profile_report", type=click.Path(dir_okay=False, writable=True),
+              help="Also write the profile as a JSON report to this file.")
+def upload(compression_level: int, stream_upload: bool, reproducible: bool, profile: bool,
+           profile_report: Optional[str]) -> None:
     """
     Upload a new build for the current app.
 
@@ -162,16 +182,19 @@ def upload() -> None:
 
     click.echo(click.style('Uploading app build...', fg='yellow'))
 
-    suggested_build_name, s3_upload_file_credentials = package_and_validate_bundle(ctx.obj.oauth_token)
+    with profiling(profile or bool(profile_report), profile_report):
+        suggested_build_name, s3_build_url = package_and_validate_bundle(ctx.obj.oauth_token, compression_level,
+                                                                         stream_upload, reproducible)
 
-    if not s3_upload_file_credentials or not suggested_build_name:
-        return
+        if not s3_build_url or not suggested_build_name:
+            return
 
-    click.echo(click.style('Creating app build...', fg='magenta'))
+        click.echo(click.style('Creating app build...', fg='magenta'))
 
-    # create the build
-    build_created = create_build(app_config.get("name"), s3_upload_file_credentials.s3_build_url, suggested_build_name,
-                                 ctx.obj.oauth_token)
+        # create the build
+        with profile_stage("create build"):
+            build_created = create_build(app_config.get("name"), s3_build_url, suggested_build_name,
+                                         ctx.obj.oauth_token)
 
     if not build_created:
         click.echo("Failed to create the build.")
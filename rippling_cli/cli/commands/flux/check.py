@@ -1,13 +1,30 @@
+from typing import Optional
+
 import click
 
 from rippling_cli.config.config import get_app_config
+from rippling_cli.constants import DEFAULT_COMPRESSION_LEVEL
+from rippling_cli.core.profiler import profiling
 from rippling_cli.utils.build_utils import package_and_validate_bundle
 from rippling_cli.utils.login_utils import ensure_logged_in
 
 
 @click.command()
+@click.option("--compression_level", type=click.IntRange(0, 9), default=DEFAULT_COMPRESSION_LEVEL,
+              help="Deflate level used for the bundle, from 0 (store only) to 9 (smallest).")
+@click.option("--stream_upload", is_flag=True,
+              help="Stream the bundle to S3 while it is being packaged, without writing it to disk. The "
+                   "upload url has to accept chunked transfer encoding, the bundle is written to disk first "
+                   "when it does not.")
+@click.option("--reproducible", is_flag=True,
+              help="Package a reproducible bundle: sorted entries with normalized timestamps and permissions.")
+@click.option("--profile", is_flag=True,
+              help="Print the wall time, CPU time, bytes processed and peak memory rise of every packaging stage.")
+@click.option("--profile_report", type=click.Path(dir_okay=False, writable=True),
+              help="Also write the profile as a JSON report to this file.")
 @click.pass_context
-def check(ctx: click.Context):
+def check(ctx: click.Context, compression_level: int, stream_upload: bool, reproducible: bool, profile: bool,
+          profile_report: Optional[str]):
     """
     Validates the current app bundle by packaging and uploading it to an S3 bucket
 
@@ -22,4 +39,5 @@ def check(ctx: click.Context):
     if not app_config or len(app_config.keys()) == 0:
         click.echo("No app found for the context. Please set the app using the 'set' command")
         return
-    package_and_validate_bundle(ctx.obj.oauth_token)
+    with profiling(profile or bool(profile_report), profile_report):
+        package_and_validate_bundle(ctx.obj.oauth_token, compression_level, stream_upload, reproducible)
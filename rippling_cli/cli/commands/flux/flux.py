@@ -1,13 +1,22 @@
 import click
 
-from rippling_cli.cli.commands.flux.app import app
-from rippling_cli.cli.commands.flux.build import build
-from rippling_cli.cli.commands.flux.check import check
-from rippling_cli.cli.commands.flux.server import server
+from rippling_cli.cli.lazy_group import LazyGroup
 from rippling_cli.utils.login_utils import ensure_logged_in
 
+COMMANDS = {
+    "app": ("rippling_cli.cli.commands.flux.app:app",
+            "Manage Flux apps, including listing, setting, and displaying the current app."),
+    "build": ("rippling_cli.cli.commands.flux.build:build",
+              "Manage Flux builds, including initializing, listing, downloading, deleting, uploading, and deploying "
+              "builds."),
+    "check": ("rippling_cli.cli.commands.flux.check:check",
+              "Validates the current app bundle by packaging and uploading it to an S3 bucket"),
+    "server": ("rippling_cli.cli.commands.flux.server:server",
+               "Manage the server for local development by starting the server and serving the app."),
+}
 
-@click.group()
+
+@click.group(cls=LazyGroup, lazy_subcommands=COMMANDS)
 @click.pass_context
 def flux(ctx: click.Context):
     """
@@ -26,8 +35,3 @@ def flux(ctx: click.Context):
     """
     ensure_logged_in(ctx)
 
-
-flux.add_command(app)  # type: ignore
-flux.add_command(build)  # type: ignore
-flux.add_command(check)  # type: ignore
-flux.add_command(server)  # type: ignore
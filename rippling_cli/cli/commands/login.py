@@ -1,7 +1,6 @@
 
 import click
 
-from rippling_cli.config.config import save_oauth_token
 from rippling_cli.constants import CODE_CHALLENGE_METHOD, DEFAULT_CODE_VERIFIER_LENGTH
 from rippling_cli.core.oauth_pkce import PKCE
 from rippling_cli.core.oauth_token import OAuthToken
@@ -27,9 +26,8 @@ def login(ctx) -> None:
             token = OAuthToken(client_id, code_challenge, CODE_CHALLENGE_METHOD)
             token.start_authorization_flow()
             access_token = token.exchange_for_token(code_verifier)
-            ctx.obj.oauth_token = access_token
 
-            save_oauth_token(access_token, token.expires_in)
+            ctx.obj.credentials.save(access_token, token.expires_in, token.refresh_token)
             click.echo("Login successful!")
     else:
         click.echo("OAuth credentials not configured")
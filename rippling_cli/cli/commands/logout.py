@@ -1,6 +1,5 @@
 import click
 
-from rippling_cli.config.config import remove_oauth_token
 from rippling_cli.utils.logout import logout_api
 
 
@@ -21,5 +20,5 @@ def logout(ctx) -> None:
         click.echo("Logout failed.")
         return
 
-    remove_oauth_token()
+    ctx.obj.credentials.clear()
     click.echo("Logout successful!")
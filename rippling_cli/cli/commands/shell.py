@@ -0,0 +1,98 @@
+import shlex
+
+import click
+
+from rippling_cli.constants import SHELL_PROMPT
+from rippling_cli.utils.completion_utils import get_completions
+
+try:
+    import readline
+except ImportError:  # Windows
+    readline = None  # type: ignore
+
+SHELL_EXIT_COMMANDS = ("exit", "quit")
+
+
+def make_completer(root: click.Command):
+    """
+    Make the readline completer of the command lines of the shell.
+    :param root:
+    :return:
+    """
+    matches: list[str] = []
+
+    def complete(text, state):
+        nonlocal matches
+        if state == 0:
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            try:
+                words = shlex.split(line)
+            except ValueError:
+                words = line.split()
+            matches = get_completions(root, words, text)
+            if not words:
+                matches += [command for command in SHELL_EXIT_COMMANDS if command.startswith(text)]
+        return matches[state] if state < len(matches) else None
+
+    return complete
+
+
+def run_shell_command(root: click.Command, args: list[str], obj) -> None:
+    """
+    Run a command line of the shell with the context object of the shell, so that it reuses the loaded credentials.
+    :param root:
+    :param args:
+    :param obj:
+    :return:
+    """
+    try:
+        root.main(args, prog_name="rippling", obj=obj)
+    except SystemExit:
+        # The exit code of a command ends the command, not the shell
+        pass
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+
+
+@click.command()
+@click.pass_context
+def shell(ctx) -> None:
+    """
+    Run rippling commands in an interactive shell.
+
+    The commands of the shell are typed without the rippling prefix, e.g. flux build list. They share the loaded
+    modules, credentials, account details and HTTP connections, which only the first command loads. Tab completes
+    the commands, their options and the app and build ids listed before. Type exit or press Ctrl-D to leave.
+    """
+    root = ctx.find_root().command
+    if readline is not None:
+        readline.set_completer(make_completer(root))
+        # Ids and option names are completed as a whole
+        readline.set_completer_delims(" \t\n")
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+
+    while True:
+        try:
+            line = input(SHELL_PROMPT)
+        except EOFError:
+            click.echo()
+            return
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            continue
+        if not args:
+            continue
+        if args[0] in SHELL_EXIT_COMMANDS:
+            return
+        if args[0] == "shell":
+            click.echo("Already in the shell.")
+            continue
+        run_shell_command(root, args, ctx.obj)
@@ -0,0 +1,46 @@
+import importlib
+from typing import Optional
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    A command group whose subcommands are imported only when they are invoked, so that the modules of a command and
+    their dependencies are not loaded by the other commands.
+
+    Every lazy subcommand is given as the "module:attribute" import path of the command with the help shown in the
+    command list of the group, which is listed without importing any subcommand.
+    """
+    def __init__(self, *args, lazy_subcommands: Optional[dict[str, tuple[str, str]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_subcommands and cmd_name not in self.commands:
+            self.add_command(self._load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        names = [name for name in self.list_commands(ctx)
+                 if name in self.lazy_subcommands or not self.commands[name].hidden]
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            # An unloaded subcommand is shown with a placeholder shortening its help the way click does
+            command = self.commands.get(name) or click.Command(name, help=self.lazy_subcommands[name][1])
+            rows.append((name, command.get_short_help_str(limit)))
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
+    def _load_command(self, cmd_name: str) -> click.Command:
+        module_name, attribute = self.lazy_subcommands[cmd_name][0].split(":")
+        command = getattr(importlib.import_module(module_name), attribute)
+        if not isinstance(command, click.Command):
+            raise TypeError(f"Lazy subcommand {cmd_name} of {self.name} is not a click command: {command!r}")
+        return command
@@ -1,21 +1,41 @@
+import multiprocessing
 import sys
-from typing import Union
+from functools import partial
 
 import click
 
-from rippling_cli.cli.commands.flux.flux import flux
-from rippling_cli.cli.commands.login import login
-from rippling_cli.cli.commands.logout import logout
-from rippling_cli.config.config import get_client_id, get_oauth_token_data
-from rippling_cli.constants import EXIT_UNKNOWN_EXCEPTION
-from rippling_cli.core.oauth_token import OAuthToken
+from rippling_cli.cli.lazy_group import LazyGroup
+from rippling_cli.config.config import get_client_id, get_daemon_socket_path
+from rippling_cli.constants import DAEMON_LOCAL_COMMANDS, EXIT_UNKNOWN_EXCEPTION
+from rippling_cli.core.daemon_client import forward_command
+from rippling_cli.core.request_memo import memoizing
 from rippling_cli.core.rippling_context import RipplingContext
 
+# The commands are imported when invoked, so that every command only loads the modules it needs
+COMMANDS = {
+    "cache": ("rippling_cli.cli.commands.cache:cache",
+              "Inspect and prune the local caches used when packaging apps and calling the API."),
+    "daemon": ("rippling_cli.cli.commands.daemon:daemon",
+               "Run the commands of the rippling cli in a background process that stays up."),
+    "flux": ("rippling_cli.cli.commands.flux.flux:flux", "Manage Rippling Flux apps and integrations."),
+    "login": ("rippling_cli.cli.commands.login:login", "Authenticate and authorize with Rippling services."),
+    "logout": ("rippling_cli.cli.commands.logout:logout",
+               "Log out of the Rippling CLI by revoking the current OAuth token."),
+    "shell": ("rippling_cli.cli.commands.shell:shell", "Run rippling commands in an interactive shell."),
+}
 
-@click.group(context_settings=dict(help_option_names=["-h", "--help"]))
+
+@click.group(cls=LazyGroup, lazy_subcommands=COMMANDS, context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option("--no_cache", is_flag=True,
+              help="Fetch every response from the Rippling API instead of the local response cache.")
+@click.option("--trace", is_flag=True,
+              help="Print the method, status, sizes and timings of every API request on exit. Requests answered "
+                   "from the cache are listed as cached and left out of the latencies.")
+@click.option("--trace_file", type=click.Path(dir_okay=False, writable=True),
+              help="Write the trace of every API request to this file as JSON lines.")
 @click.pass_context
 @click.version_option()
-def cli(ctx):
+def cli(ctx, no_cache: bool, trace: bool, trace_file: str):
     """
     rippling cli
 
@@ -24,37 +44,64 @@ def cli(ctx):
     Rippling-hosted integrations.
     """
 
-    # Initialize the context object
-    ctx.obj = RipplingContext()
+    # Initialize the context object, unless the daemon gave one with the credentials it keeps loaded
+    if ctx.obj is None:
+        ctx.obj = RipplingContext()
 
-    # Load the OAuth credentials from the config.py file
-    ctx.obj.oauth_credentials = get_client_id()
+    # The response cache and the tracer import the HTTP stack, so they are only imported when asked for
+    if no_cache:
+        from rippling_cli.core.response_cache import configure_response_cache
+        configure_response_cache(enabled=False)
+        # The daemon runs the next commands in the same process
+        ctx.call_on_close(partial(configure_response_cache, enabled=True))
+    if trace or trace_file:
+        from rippling_cli.core.tracing import tracing
+        ctx.with_resource(tracing(trace, trace_file))
+    ctx.with_resource(memoizing())
 
-    # Load the OAuth token from the config directory
-    oauth_token_dict = get_oauth_token_data()
-    ctx.obj.oauth_token = oauth_token_dict.get("token") if not OAuthToken.is_token_expired() else None
+    # Load the OAuth credentials from the config.py file, the OAuth token is loaded by ctx.obj.credentials when needed
+    ctx.obj.oauth_credentials = get_client_id()
 
 
-COMMANDS_LIST: list[Union[click.Command, click.Group]] = [
-    login,
-    logout,
-    flux
-]
+def get_command_path(args: list[str]) -> tuple[str, ...]:
+    """
+    Get the names of the command and subcommand on the command line, skipping the options of the root group.
+    :param args:
+    :return:
+    """
+    value_options = {opt for param in cli.params if isinstance(param, click.Option) and not param.is_flag
+                     for opt in param.opts}
+    names = []
+    arguments = iter(args)
+    for arg in arguments:
+        if arg in value_options:
+            next(arguments, None)
+        elif not arg.startswith("-"):
+            names.append(arg)
+    return tuple(names[:2])
 
 
-# Initialize the CLI
-def initialize_cli() -> None:
-    for command in COMMANDS_LIST:
-        # Add the commands to the CLI
-        cli.add_command(command)
+def is_local_command(args: list[str]) -> bool:
+    command_path = get_command_path(args)
+    return any(command_path[:len(local_command)] == local_command for local_command in DAEMON_LOCAL_COMMANDS)
 
 
-if __name__ == "__main__":
-    exit_code = 0
+def main() -> None:
+    """
+    Run the rippling command in the daemon when one is running, or in this process.
+    """
+    # Bundles are compressed in worker processes, which frozen executables can only start with freeze_support
+    multiprocessing.freeze_support()
+    args = sys.argv[1:]
+    if not is_local_command(args):
+        exit_code = forward_command(get_daemon_socket_path(), args)
+        if exit_code is not None:
+            sys.exit(exit_code)
     try:
-        initialize_cli()
         cli()
     except Exception:
-        exit_code = EXIT_UNKNOWN_EXCEPTION
-    finally:
-        sys.exit(exit_code)
+        sys.exit(EXIT_UNKNOWN_EXCEPTION)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 import json
 import os
+import tempfile
 
 # Store the OAuth credentials in environment variables or a config file
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from rippling_cli.constants import (
+    ACCOUNT_CACHE_FILE_NAME,
     APP_CONFIG_FILE,
+    CACHE_DIRECTORY_NAME,
+    COMPLETION_CACHE_FILE_NAME,
+    DAEMON_SOCKET_FILE_NAME,
     DEFAULT_ACCESS_TOKEN_EXPIRATION,
     OAUTH_TOKEN_FILE_NAME,
     RIPPLING_DIRECTORY_NAME,
@@ -26,27 +31,81 @@ def create_base_directory_if_not_exists(config_dir=global_config_dir):
         os.makedirs(config_dir)
 
 
-def get_oauth_token_data():
+def get_cache_dir(cache_name: str) -> Path:
+    """
+    Get the directory of the named cache inside the global config directory.
+    :param cache_name:
+    :return:
+    """
+    return global_config_dir / CACHE_DIRECTORY_NAME / cache_name
+
+
+def write_config_file(file_name: str, data):
+    """
+    Write the data as JSON to a file of the global config directory atomically, so that concurrent commands never
+    read a partial file. The file is only readable by the user, as mkstemp creates it with 0600.
+    :param file_name:
+    :param data:
+    :return:
+    """
     create_base_directory_if_not_exists()
 
-    token_file = global_config_dir / OAUTH_TOKEN_FILE_NAME
-    if token_file.exists():
-        with token_file.open("r") as f:
+    fd, temp_file = tempfile.mkstemp(dir=global_config_dir, prefix=f"{file_name}.")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_file, global_config_dir / file_name)
+
+
+def read_config_file(file_name: str):
+    """
+    Read a JSON file of the global config directory.
+    :param file_name:
+    :return: the data, or None when there is no readable file
+    """
+    try:
+        with (global_config_dir / file_name).open("r") as f:
             return json.load(f)
-    return None
+    except (OSError, ValueError):
+        return None
 
 
-def save_oauth_token(token, expires_in=3600):
-    create_base_directory_if_not_exists()
+def get_daemon_socket_path() -> Path:
+    return global_config_dir / DAEMON_SOCKET_FILE_NAME
+
+
+def get_oauth_token_data():
+    """
+    Load the saved OAuth token and its expiration timestamp.
+    :return: the token data, or None when there is no readable token file
+    """
+    return read_config_file(OAUTH_TOKEN_FILE_NAME)
 
+
+def save_oauth_token(token, expires_in=3600, refresh_token=None):
     data = {
         "token": str(token),
         "expiration_timestamp": (datetime.now() + timedelta(seconds=min(expires_in,
                                                                         DEFAULT_ACCESS_TOKEN_EXPIRATION))).timestamp()
     }
-    token_file = global_config_dir / OAUTH_TOKEN_FILE_NAME
-    with token_file.open("w") as f:
-        json.dump(data, f)
+    if refresh_token:
+        data["refresh_token"] = str(refresh_token)
+    # Only readable by the user, as it holds the refresh token
+    write_config_file(OAUTH_TOKEN_FILE_NAME, data)
+    # The cached account data belongs to the previous token
+    remove_account_cache()
+    return data
+
+
+def is_oauth_token_expired():
+    """
+    Tell whether the saved OAuth token expired, or there is no saved token.
+    :return:
+    """
+    token_data = get_oauth_token_data()
+    expiration_timestamp = token_data and token_data.get('expiration_timestamp')
+    if not expiration_timestamp:
+        return True
+    return datetime.now().timestamp() > expiration_timestamp
 
 
 def remove_oauth_token():
@@ -56,6 +115,44 @@ def remove_oauth_token():
             os.remove(token_file)
         except OSError:
             pass
+    remove_account_cache()
+
+
+def get_account_cache_data():
+    """
+    Load the cached account, role and company data stored next to the OAuth token.
+    :return: the cache data, or None when there is no readable cache
+    """
+    return read_config_file(ACCOUNT_CACHE_FILE_NAME)
+
+
+def save_account_cache(data):
+    """
+    Save the account cache atomically, so that concurrent commands never read a partial file.
+    :param data:
+    :return:
+    """
+    write_config_file(ACCOUNT_CACHE_FILE_NAME, data)
+
+
+def remove_account_cache():
+    cache_file = Path(global_config_dir) / ACCOUNT_CACHE_FILE_NAME
+    try:
+        os.remove(cache_file)
+    except OSError:
+        pass
+
+
+def get_completion_cache_data():
+    """
+    Load the app and build ids listed by the previous commands, offered by the completion of the shell.
+    :return: the ids by kind, or None when there is no readable cache
+    """
+    return read_config_file(COMPLETION_CACHE_FILE_NAME)
+
+
+def save_completion_cache(data):
+    write_config_file(COMPLETION_CACHE_FILE_NAME, data)
 
 
 def get_app_config_dir(start_dir):
@@ -1,13 +1,67 @@
 RIPPLING_DIRECTORY_NAME = ".rippling_cli"
 OAUTH_TOKEN_FILE_NAME = "oauth_token.json"
+ACCOUNT_CACHE_FILE_NAME = "account_cache.json"
+COMPLETION_CACHE_FILE_NAME = "completion_ids.json"
 APP_CONFIG_FILE = "app_config.json"
 CODE_CHALLENGE_METHOD = "S256"
 RIPPLING_BASE_URL = "https://app.rippling.com"
 RIPPLING_API = "https://app.rippling.com/api"
 EXIT_UNKNOWN_EXCEPTION = 1
+EXIT_INTERRUPTED = 130  # 128 + SIGINT, as shells report a command stopped with Ctrl-C
+DAEMON_SOCKET_FILE_NAME = "daemon.sock"
+DAEMON_LOG_FILE_NAME = "daemon.log"
+DAEMON_IDLE_TIMEOUT = 30 * 60  # 30 minutes
+DAEMON_START_TIMEOUT = 10  # seconds
+# Set to run every command in the CLI process even when a daemon is running
+DAEMON_DISABLE_ENV_VAR = "RIPPLING_NO_DAEMON"
+# The commands the CLI always runs itself: managing the daemon, the browser login, the long-running server and the
+# interactive shell
+DAEMON_LOCAL_COMMANDS = (("daemon",), ("login",), ("flux", "server"), ("shell",))
 DEFAULT_CODE_VERIFIER_LENGTH = 43
 DEFAULT_PAGE_SIZE = 10
+PAGINATION_PREFETCH_DEPTH = 1
 APP_FOLDER = 'app'
 PYPROJECT_TOML = 'pyproject.toml'
 APP_BUILD_MODULE = 'THIRD_PARTY_FLUX_APPS'
 DEFAULT_ACCESS_TOKEN_EXPIRATION = 4 * 3600  # 4 hours
+ACCESS_TOKEN_REFRESH_MARGIN = 300  # 5 minutes
+# Headless mode: the tokens are taken from these environment variables instead of the browser login and token file
+ACCESS_TOKEN_ENV_VAR = "RIPPLING_ACCESS_TOKEN"
+REFRESH_TOKEN_ENV_VAR = "RIPPLING_REFRESH_TOKEN"
+ACCOUNT_CACHE_TTL = 3600  # 1 hour
+COMPLETION_CACHE_MAX_IDS = 200
+SHELL_PROMPT = "rippling> "
+CACHE_DIRECTORY_NAME = "cache"
+BUNDLE_CACHE_NAME = "bundles"
+BUNDLE_CACHE_MAX_ENTRIES = 5
+BUNDLE_ZIP_FILE_NAME = "app_with_dependencies.zip"
+BUNDLE_CACHE_VERSION = 2
+S3_BUILD_URL_DEFAULT_TTL = 3600  # 1 hour
+S3_BUILD_URL_EXPIRY_MARGIN = 300  # 5 minutes
+DEPENDENCY_CACHE_NAME = "dependencies"
+DEPENDENCY_CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+WHEELHOUSE_NAME = "wheels"
+RESPONSE_CACHE_NAME = "responses"
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 ** 2  # 64 MB
+# The read endpoints whose GET responses are cached, by path prefix relative to the API, with the seconds during which
+# they are used without revalidation. A write to a path under a prefix invalidates every response cached under it
+RESPONSE_CACHE_TTLS = {
+    "/apps/api/apps": 300,
+    "/apps/api/app_builds": 30,
+}
+WHEELHOUSE_MAX_BYTES = 1024 ** 3  # 1 GB
+DEPENDENCY_SITE_DIR = "site"
+DEPENDENCY_LAYER_DIR = "layers"
+DEFAULT_COMPRESSION_LEVEL = 6
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+POETRY_LOCK = 'poetry.lock'
+RIPPLING_IGNORE_FILE = '.ripplingignore'
+API_POOL_SIZE = 10
+API_CONNECT_TIMEOUT = 10  # seconds
+API_READ_TIMEOUT = 300  # 5 minutes
+API_MAX_RETRIES = 4
+API_RETRY_BACKOFF = 0.5  # seconds, doubled on every retry
+API_RETRY_BACKOFF_MAX = 30  # seconds
+API_RETRY_AFTER_MAX = 120  # seconds, longer Retry-After delays are not waited for
+API_RATE_LIMIT = 20  # requests per second and host
+API_BURST_SIZE = 20
@@ -1,24 +1,212 @@
+import queue
+import threading
+import time
 from http import HTTPStatus
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Callable, Iterator, Optional, TypeVar, Union
+from urllib.parse import urlparse
 
 import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+
+from rippling_cli.constants import API_CONNECT_TIMEOUT, API_POOL_SIZE, API_READ_TIMEOUT
+from rippling_cli.core.json_stream import iter_object_array
+from rippling_cli.core.request_memo import compute_request_key, get_active_memo
+from rippling_cli.core.request_scheduler import request_scheduler
+from rippling_cli.core.response_cache import response_cache
+
+Timeout = Union[float, tuple[float, float], None]
+STREAM_CHUNK_SIZE = 64 * 1024
+T = TypeVar("T")
+_END = object()
+# Called after every attempt of a request with the method, the url, the request body, the response or the error, the
+# latency in seconds and the attempt number, which is 0 for a response served by the request memo or the response cache
+RequestHook = Callable[[str, str, Any, Optional[requests.Response], Optional[BaseException], float, int], None]
+request_hooks: list[RequestHook] = []
+
+
+class ConnectionPool:
+    """
+    The process-wide pool of HTTP connections, with one session per scheme and host shared by every client.
+
+    Connections are kept alive between requests, so that consecutive requests to the same host pay the TCP and TLS
+    handshakes once. Sessions do not keep cookies, every request being as independent as with requests.request.
+    """
+    def __init__(self, pool_size: int = API_POOL_SIZE, keep_alive: bool = True,
+                 timeout: Timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.sessions: dict[str, requests.Session] = {}
+        self.lock = threading.Lock()
+
+    def get_session(self, url: str) -> requests.Session:
+        """
+        Get the session holding the connections to the host of the url, creating it on first use.
+        :param url:
+        :return:
+        """
+        parsed_url = urlparse(url)
+        origin = get_origin(url)
+        with self.lock:
+            session = self.sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.mount(f"{parsed_url.scheme}://", HTTPAdapter(pool_connections=1,
+                                                                     pool_maxsize=self.pool_size))
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self.sessions[origin] = session
+            return session
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+connection_pool = ConnectionPool()
+
+
+def get_origin(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+def get_session(url: str) -> requests.Session:
+    return connection_pool.get_session(url)
+
+
+def add_request_hook(hook: RequestHook):
+    request_hooks.append(hook)
+
+
+def remove_request_hook(hook: RequestHook):
+    if hook in request_hooks:
+        request_hooks.remove(hook)
+
+
+def read_ahead(items: Iterator[T], depth: int) -> Iterator[T]:
+    """
+    Iterate over the items while a background thread already produces the next ones. An exception raised by the
+    producer is raised to the consumer when it reaches it. The producer stops once the consumer stops iterating.
+    :param items:
+    :param depth: the number of produced items buffered ahead of the consumer, whatever an item is: a page for
+    find_paginated, a single item for find_paginated_items. 0 produces the items on demand
+    :return:
+    """
+    if depth <= 0:
+        yield from items
+        return
+
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except Exception as e:
+            put((_END, e))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _END:
+                return
+            yield item
+    finally:
+        stopped.set()
 
 
 class APIClient:
-    def __init__(self, base_url, headers=None):
+    def __init__(self, base_url, headers=None, timeout: Timeout = None):
         self.base_url = base_url
         self.headers = headers or {}
+        self.timeout = timeout
 
-    def make_request(self, method, endpoint, params=None, json=None, data=None, stream=False, files=None):
+    def make_request(self, method, endpoint, params=None, json=None, data=None, stream=False, files=None,
+                     idempotent=None, memoize=None):
         url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
-        response = requests.request(method, url, params=params, json=json, data=data, headers=self.headers,
-                                    stream=stream, files=files)
+        # Streamed bodies can only be sent again when they can rewind, files are never sent again
+        replayable = not files and (not hasattr(data, "read") or getattr(data, "replayable", False))
+
+        attempt = 0
+        requested_at = time.perf_counter()
+
+        def send_once(headers: dict):
+            nonlocal attempt
+            attempt += 1
+            if hasattr(data, "rewind"):
+                data.rewind()
+            started_at = time.perf_counter()
+            try:
+                response = get_session(url).request(method, url, params=params, json=json, data=data,
+                                                    headers={**self.headers, **headers}, stream=stream, files=files,
+                                                    timeout=self.timeout or connection_pool.timeout)
+            except BaseException as e:
+                for hook in request_hooks:
+                    hook(method, url, data, None, e, time.perf_counter() - started_at, attempt)
+                raise
+            for hook in request_hooks:
+                hook(method, url, response.request.body, response, None, time.perf_counter() - started_at, attempt)
+            return response
+
+        def send(headers: dict):
+            return request_scheduler.send(method, url, lambda: send_once(headers), idempotent=idempotent,
+                                          replayable=replayable)
+
+        def send_read():
+            if method == "GET" and not stream:
+                return response_cache.get(url, params, self.headers, send)
+            return send({})
+
+        def report_cached(response):
+            # The memo and the response cache answer without send_once, the hooks still see the request as attempt 0
+            if attempt == 0:
+                for hook in request_hooks:
+                    hook(method, url, None, response, None, time.perf_counter() - requested_at, 0)
+            return response
+
+        # Reads are remembered for the command, GETs by default and the POSTs used as queries when asked to. Streamed
+        # reads are not remembered, but are reads all the same
+        memo = get_active_memo()
+        memoize = method == "GET" if memoize is None else memoize
+        if memo is not None and memoize and not stream and not files:
+            key = compute_request_key(method, url, params, json, data, self.headers)
+            if key is not None:
+                return report_cached(memo.fetch(key, send_read, get_origin(url)))
+
+        response = report_cached(send_read())
+        if method != "GET" and not memoize:
+            # A write may change what the reads of its host returned
+            response_cache.invalidate(url)
+            if memo is not None:
+                memo.clear(get_origin(url))
         return response
 
     def get(self, endpoint, params=None, stream=False):
         return self.make_request("GET", endpoint, params=params, stream=stream)
 
-    def post(self, endpoint, json=None, data=None, files=None):
-        return self.make_request("POST", endpoint, json=json, data=data, files=files)
+    def post(self, endpoint, json=None, data=None, files=None, idempotent=None, memoize=None):
+        return self.make_request("POST", endpoint, json=json, data=data, files=files, idempotent=idempotent,
+                                 memoize=memoize)
 
     def put(self, endpoint, data):
         return self.make_request("PUT", endpoint, data=data)
@@ -27,9 +215,10 @@ class APIClient:
         return self.make_request("DELETE", endpoint, params=params, data=data)
 
     def find_paginated(self, endpoint, page=1, page_size=10, read_preference="SECONDARY_PREFERRED",
-                       data=None, search_query=""):
+                       data=None, search_query="", prefetch=0):
         """
-        Fetch paginated data from the API.
+        Fetch paginated data from the API. With prefetch, the next pages are fetched in the background while the
+        current one is processed.
 
         Args:
             endpoint (str): The API endpoint.
@@ -45,28 +234,18 @@ class APIClient:
             :param page:
             :param page_size:
             :param read_preference:
+            :param prefetch: the number of pages fetched ahead of the consumer
         """
+        return read_ahead(self._find_paginated(endpoint, page, page_size, read_preference, data, search_query),
+                          prefetch)
+
+    def _find_paginated(self, endpoint, page, page_size, read_preference, data, search_query):
         has_more = True
         cursor = None
         while has_more:
-            payload = {
-                "paginationParams": {
-                    "page": page,
-                    "cursor": cursor,
-                    "sortingMetadata": {
-                        "order": "DESC",
-                        "column": {
-                            "sortKey": "createdAt"
-                        }
-                    },
-                    "searchQuery": search_query
-                },
-                "pageSize": page_size,
-                "readPreference": read_preference
-            }
-            if data:
-                payload.update(data)
-            response = self.make_request("POST", f"{endpoint}/find_paginated", json=payload)
+            payload = self._get_pagination_payload(page, cursor, page_size, read_preference, data, search_query)
+            response = self.make_request("POST", f"{endpoint}/find_paginated", json=payload, idempotent=True,
+                                         memoize=True)
 
             if response.status_code == HTTPStatus.OK:
                 response_json = response.json()
@@ -77,3 +256,58 @@ class APIClient:
                 yield items
             else:
                 break
+
+    def find_paginated_items(self, endpoint, page=1, page_size=10, read_preference="SECONDARY_PREFERRED",
+                             data=None, search_query="", prefetch=0):
+        """
+        Fetch paginated data from the API one item at a time. The responses are decoded as they stream in, so that
+        only the current item of a page is held in memory, whatever the page size.
+        :param endpoint:
+        :param page:
+        :param page_size:
+        :param read_preference:
+        :param data:
+        :param search_query:
+        :param prefetch: the number of pages of items decoded ahead of the consumer, so up to prefetch * page_size
+        items are held in memory ahead of the current one
+        :return:
+        """
+        # The items are read ahead one at a time, prefetch pages are as many items
+        return read_ahead(self._find_paginated_items(endpoint, page, page_size, read_preference, data, search_query),
+                          prefetch * page_size)
+
+    def _find_paginated_items(self, endpoint, page, page_size, read_preference, data, search_query):
+        has_more = True
+        cursor = None
+        while has_more:
+            payload = self._get_pagination_payload(page, cursor, page_size, read_preference, data, search_query)
+            with self.make_request("POST", f"{endpoint}/find_paginated", json=payload, stream=True,
+                                   idempotent=True, memoize=True) as response:
+                if response.status_code != HTTPStatus.OK:
+                    break
+                fields = {}
+                yield from iter_object_array(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), "data", fields)
+            cursor = fields.get("cursor")
+            has_more = False if not cursor else True
+            page += 1
+
+    @staticmethod
+    def _get_pagination_payload(page, cursor, page_size, read_preference, data, search_query):
+        payload = {
+            "paginationParams": {
+                "page": page,
+                "cursor": cursor,
+                "sortingMetadata": {
+                    "order": "DESC",
+                    "column": {
+                        "sortKey": "createdAt"
+                    }
+                },
+                "searchQuery": search_query
+            },
+            "pageSize": page_size,
+            "readPreference": read_preference
+        }
+        if data:
+            payload.update(data)
+        return payload
@@ -0,0 +1,129 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar, cast
+
+from rippling_cli.constants import API_POOL_SIZE
+from rippling_cli.core.api_client import APIClient, Timeout
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# As many threads as pooled connections per host, so that no request waits for a connection
+executor = ThreadPoolExecutor(max_workers=API_POOL_SIZE, thread_name_prefix="rippling-api")
+_END = object()
+
+
+async def run_blocking(function: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking function in the thread pool of the API clients without blocking the event loop.
+    :param function:
+    :param args:
+    :param kwargs:
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+
+async def gather_bounded(*awaitables: Awaitable[T], limit: int = API_POOL_SIZE) -> list[T]:
+    """
+    Await the awaitables concurrently, at most limit at a time, and return their results in order. The first
+    exception is raised once the others are done.
+    :param awaitables:
+    :param limit:
+    :return:
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    results = await asyncio.gather(*(run(awaitable) for awaitable in awaitables), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return cast(list[T], results)
+
+
+async def map_bounded(function: Callable[[T], Awaitable[R]], items: Iterable[T],
+                      limit: int = API_POOL_SIZE) -> list[R]:
+    """
+    Apply the coroutine function to every item, at most limit at a time, and return the results in order.
+    :param function:
+    :param items:
+    :param limit:
+    :return:
+    """
+    return await gather_bounded(*(function(item) for item in items), limit=limit)
+
+
+def run_concurrently(*calls: Callable[[], Any], limit: int = API_POOL_SIZE) -> list[Any]:
+    """
+    Run independent blocking calls, such as the api helpers of the utils, concurrently and return their results in
+    order. A chain of independent round trips then takes about the time of the slowest one.
+    :param calls:
+    :param limit:
+    :return:
+    """
+    async def run_all() -> list[Any]:
+        return await gather_bounded(*(run_blocking(call) for call in calls), limit=limit)
+
+    return asyncio.run(run_all())
+
+
+class AsyncAPIClient:
+    """
+    The asyncio counterpart of APIClient, with the same surface.
+
+    Requests run on the thread pool over the shared connection pool, so any number of clients and coroutines reuse
+    the same keep-alive connections.
+    """
+    def __init__(self, base_url, headers=None, timeout: Timeout = None):
+        self.client = APIClient(base_url, headers=headers, timeout=timeout)
+
+    @property
+    def base_url(self):
+        return self.client.base_url
+
+    @property
+    def headers(self):
+        return self.client.headers
+
+    async def make_request(self, method, endpoint, params=None, json=None, data=None, stream=False, files=None):
+        return await run_blocking(self.client.make_request, method, endpoint, params=params, json=json, data=data,
+                                  stream=stream, files=files)
+
+    async def get(self, endpoint, params=None, stream=False):
+        return await self.make_request("GET", endpoint, params=params, stream=stream)
+
+    async def post(self, endpoint, json=None, data=None, files=None):
+        return await self.make_request("POST", endpoint, json=json, data=data, files=files)
+
+    async def put(self, endpoint, data):
+        return await self.make_request("PUT", endpoint, data=data)
+
+    async def delete(self, endpoint, params=None, data=None):
+        return await self.make_request("DELETE", endpoint, params=params, data=data)
+
+    async def find_paginated(self, endpoint, page=1, page_size=10, read_preference="SECONDARY_PREFERRED",
+                             data=None, search_query="") -> AsyncIterator[Optional[list]]:
+        """
+        Fetch paginated data from the API. Pages are fetched one after the other, every page needing the cursor of
+        the previous one, without blocking the event loop in between.
+        :param endpoint:
+        :param page:
+        :param page_size:
+        :param read_preference:
+        :param data:
+        :param search_query:
+        :return:
+        """
+        pages = self.client.find_paginated(endpoint, page=page, page_size=page_size,
+                                           read_preference=read_preference, data=data, search_query=search_query)
+        while True:
+            items = await run_blocking(next, pages, _END)
+            if items is _END:
+                return
+            yield items
@@ -0,0 +1,85 @@
+import queue
+import threading
+from typing import Iterator, Optional
+
+from rippling_cli.exceptions.build_exceptions import PipeAborted
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_CHUNKS = 8
+PUT_TIMEOUT = 0.5
+
+
+class ChunkPipe:
+    """
+    A bounded in-memory pipe between a producer thread writing bytes and a consumer iterating over chunks.
+
+    Writes are coalesced into chunks of chunk_size bytes and at most max_chunks chunks are buffered, so the producer
+    blocks whenever it gets ahead of the consumer and the memory used stays constant whatever the amount of data.
+    """
+    _END = object()
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, max_chunks: int = DEFAULT_MAX_CHUNKS):
+        self.chunk_size = chunk_size
+        self.queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self.buffer = bytearray()
+        self.error: Optional[BaseException] = None
+        self.aborted = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        """
+        Write data to the pipe, blocking while the pipe is full.
+        :param data:
+        :return: the number of bytes written
+        """
+        self.buffer += data
+        while len(self.buffer) >= self.chunk_size:
+            chunk = bytes(self.buffer[:self.chunk_size])
+            del self.buffer[:self.chunk_size]
+            self._put(chunk)
+        return len(data)
+
+    def close(self, error: Optional[BaseException] = None):
+        """
+        Flush the buffered data and signal the end of the data to the consumer. An error raised by the producer is
+        re-raised on the consumer side.
+        :param error:
+        :return:
+        """
+        try:
+            if self.buffer and not error:
+                self._put(bytes(self.buffer))
+            self.buffer.clear()
+            self.error = error
+            self._put(self._END)
+        except PipeAborted:
+            pass
+
+    def abort(self):
+        """
+        Stop reading from the pipe. A producer blocked on a full pipe is released with PipeAborted.
+        :return:
+        """
+        self.aborted.set()
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.queue.get()
+            if chunk is self._END:
+                if self.error:
+                    raise self.error
+                return
+            yield chunk
+
+    def _put(self, item):
+        while not self.aborted.is_set():
+            try:
+                self.queue.put(item, timeout=PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+        raise PipeAborted()
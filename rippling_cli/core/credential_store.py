@@ -0,0 +1,125 @@
+import math
+import os
+import threading
+import time
+from typing import Mapping, Optional
+
+from rippling_cli.config.config import get_oauth_token_data, remove_oauth_token, save_oauth_token
+from rippling_cli.constants import ACCESS_TOKEN_ENV_VAR, REFRESH_TOKEN_ENV_VAR
+
+
+class CredentialStore:
+    """
+    The OAuth tokens of the user, read from the config directory the first time they are needed and kept in memory,
+    so that the group callbacks and commands checking the login of one invocation do not read the token file again.
+    Logging in or out and refreshing the access token go through the store, which keeps the tokens in memory in sync
+    with the token file.
+
+    In headless mode, when the RIPPLING_ACCESS_TOKEN or RIPPLING_REFRESH_TOKEN environment variable is set, the tokens
+    come from the environment and only live in memory: the token file is neither read nor written, so that parallel
+    jobs never replace the tokens of each other. An access token from the environment is used until the API rejects
+    it, its expiry being unknown.
+    """
+    def __init__(self, environ: Optional[Mapping[str, str]] = None) -> None:
+        self.environ = os.environ if environ is None else environ
+        self.token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.expiration_timestamp: Optional[float] = None
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    @property
+    def headless(self) -> bool:
+        return bool(self.environ.get(ACCESS_TOKEN_ENV_VAR) or self.environ.get(REFRESH_TOKEN_ENV_VAR))
+
+    def load(self) -> None:
+        """
+        Read the saved tokens, unless they were already read.
+        :return:
+        """
+        with self.lock:
+            if self.loaded:
+                return
+            if self.headless:
+                token = self.environ.get(ACCESS_TOKEN_ENV_VAR) or None
+                self._set(token, math.inf if token else None, self.environ.get(REFRESH_TOKEN_ENV_VAR) or None)
+            else:
+                self._set_token_data(get_oauth_token_data() or {})
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """
+        Tell whether the access token expired, or there is no access token, from the expiration timestamp in memory.
+        :param now: the timestamp to compare with, the current time by default
+        :return:
+        """
+        self.load()
+        if not self.token or not self.expiration_timestamp:
+            return True
+        return (time.time() if now is None else now) > self.expiration_timestamp
+
+    def get_token(self) -> Optional[str]:
+        """
+        Get the access token, unless it expired.
+        :return:
+        """
+        return None if self.is_expired() else self.token
+
+    def refresh(self, client_id: str, margin: float = 0) -> bool:
+        """
+        Get a new access token with the refresh token, unless the access token is valid for the margin, e.g. because
+        another thread refreshed it meanwhile.
+        :param client_id:
+        :param margin: the seconds for which the access token must stay valid
+        :return: whether the access token is valid for the margin
+        """
+        with self.lock:
+            if not self.is_expired(time.time() + margin):
+                return True
+            if not self.refresh_token:
+                return False
+
+            # Imported here, since it loads the HTTP stack and most invocations have a valid access token
+            from rippling_cli.core.oauth_token import OAuthToken
+            oauth_token = OAuthToken(client_id)
+            try:
+                access_token = oauth_token.refresh_access_token(self.refresh_token)
+            except Exception:
+                if not self.headless:
+                    # Another process may have refreshed the token with a refresh token that cannot be used twice
+                    self._set_token_data(get_oauth_token_data() or {})
+                return not self.is_expired(time.time() + margin)
+            self.save(access_token, oauth_token.expires_in, oauth_token.refresh_token)
+            return True
+
+    def save(self, token: str, expires_in: int, refresh_token: Optional[str] = None) -> None:
+        """
+        Save new tokens to the token file and keep them in memory.
+        :param token: the access token
+        :param expires_in: the lifetime of the access token in seconds
+        :param refresh_token:
+        :return:
+        """
+        with self.lock:
+            if self.headless:
+                self._set(token, time.time() + expires_in, refresh_token)
+            else:
+                self._set_token_data(save_oauth_token(token, expires_in, refresh_token))
+
+    def clear(self) -> None:
+        """
+        Remove the tokens from the token file and from memory.
+        :return:
+        """
+        with self.lock:
+            if not self.headless:
+                remove_oauth_token()
+            self._set(None, None, None)
+
+    def _set_token_data(self, token_data: dict):
+        self._set(token_data.get("token"), token_data.get("expiration_timestamp"), token_data.get("refresh_token"))
+
+    def _set(self, token: Optional[str], expiration_timestamp: Optional[float], refresh_token: Optional[str]):
+        self.token = token
+        self.expiration_timestamp = expiration_timestamp
+        self.refresh_token = refresh_token
+        self.loaded = True
@@ -0,0 +1,399 @@
+import io
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import click
+
+from rippling_cli.config.config import global_config_dir
+from rippling_cli.constants import (
+    DAEMON_IDLE_TIMEOUT,
+    EXIT_INTERRUPTED,
+    EXIT_UNKNOWN_EXCEPTION,
+    OAUTH_TOKEN_FILE_NAME,
+)
+from rippling_cli.core.credential_store import CredentialStore
+from rippling_cli.core.daemon_client import PACKAGE_DIR
+from rippling_cli.core.rippling_context import RipplingContext
+from rippling_cli.exceptions.login_exceptions import InteractiveLoginRequired
+
+# Sent to the main thread until it handles the interrupt of a command, see DaemonServer.deliver_interrupt
+WAKE_UP_SIGNAL = signal.SIGUSR1
+WAKE_UP_INTERVAL = 0.1
+
+
+class ClientConnection:
+    """
+    The connection to the client of a command, exchanging JSON lines. Several threads of the command may write to
+    the output streams at once.
+    """
+    def __init__(self, request: socket.socket, messages) -> None:
+        self.request = request
+        self.messages = messages
+        self.lock = threading.Lock()
+        self.output_sent = False
+
+    def send(self, message: dict):
+        with self.lock:
+            self.request.sendall(json.dumps(message).encode() + b"\n")
+
+    def receive(self) -> dict:
+        line = self.messages.readline()
+        if not line:
+            raise EOFError("The client disconnected.")
+        return json.loads(line)
+
+
+class ClientOutput(io.TextIOBase):
+    """
+    A standard output stream of the command, written to the matching stream of the client.
+    """
+    def __init__(self, connection: ClientConnection, name: str, tty: bool) -> None:
+        self.connection = connection
+        self.name = name
+        self.tty = tty
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text) -> int:
+        # Rejecting bytes tells click the stream is a text stream
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            self.connection.send({self.name: text})
+            self.connection.output_sent = True
+        return len(text)
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+class ClientInput(io.TextIOBase):
+    """
+    The standard input of the command, read line by line from the client when the command prompts the user. The
+    answers of the client are received by the thread of the connection.
+    """
+    def __init__(self, connection: ClientConnection, answers: queue.Queue, tty: bool) -> None:
+        self.connection = connection
+        self.answers = answers
+        self.tty = tty
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size=-1) -> str:  # type: ignore[override]
+        self.connection.send({"stdin": "readline"})
+        return self.answers.get()
+
+    def read(self, size=-1) -> str:
+        return "".join(iter(self.readline, ""))
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+class CommandRun:
+    """
+    A command forwarded by a client, run by the main thread of the daemon while the thread of the connection
+    receives the answers to its prompts and its interrupts.
+    """
+    def __init__(self, connection: ClientConnection, message: dict) -> None:
+        self.connection = connection
+        self.message = message
+        # The lines of the standard input of the client, an empty line once the client disconnected
+        self.answers: queue.Queue[str] = queue.Queue()
+        self.done = threading.Event()
+        self.interrupted = False
+
+
+@contextmanager
+def client_environment(cwd: str, env: dict, streams: dict) -> Iterator[None]:
+    """
+    Run the with block in the working directory, with the environment and standard streams of the client, restoring
+    the ones of the daemon afterwards.
+    :param cwd:
+    :param env:
+    :param streams: the stdin, stdout and stderr streams
+    :return:
+    """
+    previous_cwd, previous_env = os.getcwd(), dict(os.environ)
+    previous_streams = {name: getattr(sys, name) for name in streams}
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        os.chdir(cwd)
+        for name, stream in streams.items():
+            setattr(sys, name, stream)
+        yield
+    finally:
+        for name, stream in previous_streams.items():
+            setattr(sys, name, stream)
+        os.environ.clear()
+        os.environ.update(previous_env)
+        os.chdir(previous_cwd)
+
+
+def get_token_file_state() -> Optional[tuple[int, int]]:
+    try:
+        stat = (global_config_dir / OAUTH_TOKEN_FILE_NAME).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    def handle(self):
+        connection = ClientConnection(self.request, self.rfile)
+        try:
+            message = connection.receive()
+        except (EOFError, ValueError):
+            return
+        if message.get("type") == "run":
+            self.server.submit(connection, message)
+        elif message.get("type") == "status":
+            connection.send(self.server.get_status())
+        elif message.get("type") == "stop":
+            self.server.stop()
+            connection.send({"stopped": True})
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Run the commands forwarded by the CLI in a process that stays up, so that the modules, the credentials, the HTTP
+    connections and the caches loaded by a command are reused by the next ones.
+
+    The connections are handled by threads, but the commands run one at a time in the main thread, since they change
+    the working directory, the environment and the standard streams of the process: a command forwarded while
+    another one runs is rejected and runs in the CLI process instead. Commands that need the browser login are
+    rejected too. An interrupt of the client, or its disconnection, interrupts the command as Ctrl-C would. The
+    daemon stops after being idle for the idle timeout.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, command: click.Command, idle_timeout: float = DAEMON_IDLE_TIMEOUT) -> None:
+        self.socket_path = socket_path
+        self.command = command
+        self.idle_timeout = idle_timeout
+        self.stopped = False
+        self.started_at = time.time()
+        self.commands_run = 0
+        self.credentials: Optional[CredentialStore] = None
+        self.token_file_state: Optional[tuple[int, int]] = None
+        # The commands to run, None to wake the main thread up when the daemon is stopped
+        self.command_runs: queue.Queue[Optional[CommandRun]] = queue.Queue()
+        # Held from the submission of a command until it is done
+        self.busy = threading.Lock()
+        self.running: Optional[CommandRun] = None
+        self.interrupt_requested = False
+        self.running_lock = threading.Lock()
+        self.command_thread_id = threading.get_ident()
+        # Only the user can connect, the socket being created without permissions for the group and others
+        previous_umask = os.umask(0o077)
+        try:
+            super().__init__(str(socket_path), CommandHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def serve(self):
+        """
+        Run the forwarded commands until the daemon is stopped or idle for the idle timeout. Must be called from the
+        main thread, which receives the interrupts of the commands.
+        :return:
+        """
+        self.command_thread_id = threading.get_ident()
+        previous_handler = signal.signal(signal.SIGINT, self.handle_interrupt)
+        previous_wake_up_handler = signal.signal(WAKE_UP_SIGNAL, lambda signum, frame: None)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        try:
+            while not self.stopped:
+                try:
+                    command_run = self.command_runs.get(timeout=self.idle_timeout)
+                except queue.Empty:
+                    break
+                if command_run is not None:
+                    self.run_command(command_run)
+        finally:
+            self.shutdown()
+            # A command submitted while the daemon was stopping runs in the CLI process
+            while not self.command_runs.empty():
+                command_run = self.command_runs.get()
+                if command_run is not None:
+                    self.reject(command_run, "The daemon stopped.")
+            self.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            signal.signal(signal.SIGINT, previous_handler)
+            signal.signal(WAKE_UP_SIGNAL, previous_wake_up_handler)
+
+    def stop(self):
+        self.stopped = True
+        self.command_runs.put(None)
+
+    def get_status(self) -> dict:
+        return {"pid": os.getpid(), "started_at": self.started_at, "commands_run": self.commands_run,
+                "busy": self.busy.locked(), "executable": sys.executable, "package": PACKAGE_DIR}
+
+    def submit(self, connection: ClientConnection, message: dict):
+        """
+        Hand a forwarded command over to the main thread, then pass the answers to its prompts and the interrupts of
+        the client on to the command until it is done.
+        :param connection:
+        :param message:
+        :return:
+        """
+        if message.get("executable") != sys.executable or message.get("package") != PACKAGE_DIR:
+            connection.send({"rejected": "The daemon runs another installation of the rippling cli."})
+            return
+        if self.stopped or not self.busy.acquire(blocking=False):
+            connection.send({"rejected": "The daemon is running another command."})
+            return
+
+        command_run = CommandRun(connection, message)
+        self.command_runs.put(command_run)
+        while not command_run.done.is_set():
+            try:
+                message = connection.receive()
+            except (EOFError, OSError, ValueError):
+                # The client went away, e.g. killed, and no one reads the output of the command anymore
+                self.interrupt(command_run)
+                command_run.answers.put("")
+                break
+            if "stdin" in message:
+                command_run.answers.put(message["stdin"])
+            elif message.get("type") == "interrupt":
+                self.interrupt(command_run)
+        # The connection is closed when the handler returns
+        command_run.done.wait()
+
+    def interrupt(self, command_run: CommandRun):
+        with self.running_lock:
+            # A command interrupted before it started does not start
+            command_run.interrupted = True
+            if self.running is command_run:
+                self.interrupt_requested = True
+                # Sent to the thread of the command, so that it wakes up from a blocking call such as a sleep
+                signal.pthread_kill(self.command_thread_id, signal.SIGINT)
+                threading.Thread(target=self.deliver_interrupt, args=(command_run,), daemon=True).start()
+
+    def deliver_interrupt(self, command_run: CommandRun):
+        """
+        Wake the main thread up until it handled the interrupt of the command. The handler of a signal runs once the
+        main thread gets back to Python code, which it may not do when the signal arrives before it blocks, e.g. in a
+        sleep, until another signal interrupts the blocking call.
+        :param command_run:
+        :return:
+        """
+        while not command_run.done.wait(WAKE_UP_INTERVAL):
+            with self.running_lock:
+                if self.running is not command_run or not self.interrupt_requested:
+                    return
+                signal.pthread_kill(self.command_thread_id, WAKE_UP_SIGNAL)
+
+    def handle_interrupt(self, signum, frame):
+        """
+        Interrupt the running command when a client asked for it, and the daemon itself otherwise, e.g. on Ctrl-C
+        when it runs in the foreground.
+        :param signum:
+        :param frame:
+        :return:
+        """
+        if not self.interrupt_requested:
+            raise KeyboardInterrupt
+        self.interrupt_requested = False
+        if self.running is not None:
+            raise KeyboardInterrupt
+
+    def reject(self, command_run: CommandRun, reason: str):
+        self.busy.release()
+        try:
+            command_run.connection.send({"rejected": reason})
+        except OSError:
+            pass
+        command_run.done.set()
+
+    def get_credentials(self) -> CredentialStore:
+        """
+        Get the credentials of the next command: the ones of the previous commands, unless the token file changed,
+        e.g. when logging in outside of the daemon. Headless commands get their own, taken from their environment.
+        :return:
+        """
+        credentials = CredentialStore()
+        if credentials.headless:
+            return credentials
+        token_file_state = get_token_file_state()
+        if self.credentials is None or token_file_state != self.token_file_state:
+            self.credentials = CredentialStore()
+            self.token_file_state = token_file_state
+        return self.credentials
+
+    def run_command(self, command_run: CommandRun):
+        connection, message = command_run.connection, command_run.message
+        tty = message.get("tty", {})
+        env = dict(message.get("env", {}))
+        if tty.get("stdout") and message.get("columns"):
+            env.setdefault("COLUMNS", str(message["columns"]))
+        streams = {"stdin": ClientInput(connection, command_run.answers, tty.get("stdin", False)),
+                   "stdout": ClientOutput(connection, "stdout", tty.get("stdout", False)),
+                   "stderr": ClientOutput(connection, "stderr", tty.get("stderr", False))}
+        exit_code = 0
+        try:
+            with client_environment(message.get("cwd", os.getcwd()), env, streams):
+                credentials = self.get_credentials()
+                try:
+                    with self.running_lock:
+                        self.running = command_run
+                        interrupted = command_run.interrupted
+                    try:
+                        if interrupted:
+                            raise KeyboardInterrupt
+                        self.command.main(message.get("args", []), prog_name="rippling",
+                                          obj=RipplingContext(credentials, interactive_login=False))
+                    finally:
+                        with self.running_lock:
+                            self.running = None
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except InteractiveLoginRequired as e:
+                    if not connection.output_sent:
+                        # Nothing happened yet that running the command again in the CLI process would repeat
+                        self.reject(command_run, e.message)
+                        return
+                    click.echo(f"Error: {e.message} Run `rippling login` first.", err=True)
+                    exit_code = EXIT_UNKNOWN_EXCEPTION
+                except KeyboardInterrupt:
+                    exit_code = EXIT_INTERRUPTED
+                except Exception:
+                    exit_code = EXIT_UNKNOWN_EXCEPTION
+                if credentials is self.credentials:
+                    # The tokens the command saved, e.g. refreshed, are already in memory
+                    self.token_file_state = get_token_file_state()
+        except OSError:
+            # The client went away, e.g. interrupted by the user, or its working directory is gone
+            exit_code = EXIT_UNKNOWN_EXCEPTION
+        self.commands_run += 1
+        # Released before the exit code is sent, so that the client can forward its next command right away
+        self.busy.release()
+        try:
+            connection.send({"exit": exit_code})
+        except OSError:
+            pass
+        command_run.done.set()
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+from typing import Optional
+
+from rippling_cli.constants import DAEMON_DISABLE_ENV_VAR, EXIT_INTERRUPTED, EXIT_UNKNOWN_EXCEPTION
+
+# The daemon only runs the commands of the same installation of the CLI. A frozen executable unpacks its package
+# to another directory in every process, so it is identified by the executable alone
+PACKAGE_DIR = sys.executable if getattr(sys, "frozen", False) else str(Path(__file__).resolve().parent.parent)
+
+
+def connect_to_daemon(socket_path: Path) -> Optional[socket.socket]:
+    """
+    Connect to the daemon listening on the socket.
+    :param socket_path:
+    :return: the connection, or None when no daemon is running
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(socket_path))
+    except OSError:
+        connection.close()
+        return None
+    return connection
+
+
+def send_message(connection: socket.socket, message: dict):
+    connection.sendall(json.dumps(message).encode() + b"\n")
+
+
+def request_daemon(socket_path: Path, message: dict) -> Optional[dict]:
+    """
+    Send a request expecting a single answer to the daemon, e.g. its status.
+    :param socket_path:
+    :param message:
+    :return: the answer, or None when no daemon is running
+    """
+    connection = connect_to_daemon(socket_path)
+    if connection is None:
+        return None
+    with connection, connection.makefile("rb") as answers:
+        send_message(connection, message)
+        answer = answers.readline()
+    return json.loads(answer) if answer else None
+
+
+def relay_messages(connection: socket.socket, messages) -> Optional[int]:
+    """
+    Write the output of the forwarded command to the standard streams of this process and answer its prompts.
+    :param connection:
+    :param messages:
+    :return: the exit code of the command, or None when the daemon rejected the command
+    """
+    for line in messages:
+        message = json.loads(line)
+        if "stdout" in message:
+            sys.stdout.write(message["stdout"])
+            sys.stdout.flush()
+        elif "stderr" in message:
+            sys.stderr.write(message["stderr"])
+            sys.stderr.flush()
+        elif "stdin" in message:
+            send_message(connection, {"stdin": sys.stdin.readline()})
+        elif "exit" in message:
+            return message["exit"]
+        elif "rejected" in message:
+            return None
+    raise EOFError("The daemon closed the connection.")
+
+
+def forward_command(socket_path: Path, args: list[str]) -> Optional[int]:
+    """
+    Run the command in the daemon, with the working directory and environment of this process. The output of the
+    command is written to the standard streams of this process, which also answers the prompts of the command. Ctrl-C
+    interrupts the command in the daemon, and a second Ctrl-C leaves it to stop on its own.
+    :param socket_path:
+    :param args: the command line arguments
+    :return: the exit code of the command, or None when the command must run in this process, e.g. no daemon runs
+    or it is busy running another command
+    """
+    if os.environ.get(DAEMON_DISABLE_ENV_VAR):
+        return None
+    connection = connect_to_daemon(socket_path)
+    if connection is None:
+        return None
+
+    with connection, connection.makefile("rb") as messages:
+        send_message(connection, {
+            "type": "run",
+            "args": args,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+            "tty": {"stdin": sys.stdin.isatty(), "stdout": sys.stdout.isatty(), "stderr": sys.stderr.isatty()},
+            "columns": shutil.get_terminal_size().columns,
+            "executable": sys.executable,
+            "package": PACKAGE_DIR,
+        })
+        try:
+            try:
+                return relay_messages(connection, messages)
+            except KeyboardInterrupt:
+                send_message(connection, {"type": "interrupt"})
+            try:
+                # The command reports the interrupt and exits, as it does in this process
+                return relay_messages(connection, messages)
+            except KeyboardInterrupt:
+                # Disconnecting interrupts the command too, in case it ignored the first interrupt
+                return EXIT_INTERRUPTED
+        except BrokenPipeError:
+            # The output was closed, e.g. piped to head: stop like click does, without flushing the output again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return EXIT_UNKNOWN_EXCEPTION
+        except (EOFError, ConnectionError):
+            pass
+    # The command may have had effects already, so it is not run again in this process
+    sys.stderr.write("The rippling daemon stopped while running the command.\n")
+    return EXIT_UNKNOWN_EXCEPTION
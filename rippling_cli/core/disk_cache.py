@@ -0,0 +1,301 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+METADATA_FILE_NAME = "metadata.json"
+# The size of an entry, recorded when it is committed, and the running totals of the cache
+SIZE_FILE_NAME = ".size"
+USAGE_FILE_NAME = ".usage.json"
+STALE_STAGING_AGE = 24 * 3600  # 1 day
+
+
+@dataclass
+class CacheEntry:
+    """
+    A single entry of a DiskCache.
+    """
+    key: str
+    path: Path
+    last_used: float
+
+    @property
+    def size(self) -> int:
+        """
+        The total size of the files of the entry in bytes, as recorded when it was committed.
+        :return:
+        """
+        return get_entry_size(self.path)
+
+
+def get_entry_size(path: Path) -> int:
+    """
+    Get the size of an entry recorded when it was committed, measuring it for the entries committed without one.
+    :param path:
+    :return:
+    """
+    try:
+        return int((path / SIZE_FILE_NAME).read_text())
+    except (OSError, ValueError):
+        return get_directory_size(path)
+
+
+def record_entry_size(path: Path) -> int:
+    """
+    Measure the entry and record its size.
+    :param path:
+    :return: the size in bytes
+    """
+    size = get_directory_size(path)
+    try:
+        (path / SIZE_FILE_NAME).write_text(str(size))
+    except OSError:
+        pass
+    return size
+
+
+def get_directory_size(path: Path) -> int:
+    """
+    Get the total size of the files inside the directory in bytes.
+    :param path:
+    :return:
+    """
+    total_size = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            try:
+                total_size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                continue
+    return total_size
+
+
+class DiskCache:
+    """
+    A directory backed cache where every entry lives in its own sub directory named after its key.
+
+    Entries are created in a staging directory and moved in place atomically, so concurrent CLI invocations never
+    observe a half written entry. The least recently used entries are evicted once the cache holds more than
+    max_entries entries or more than max_bytes bytes.
+
+    The size of an entry is recorded when it is committed, and the totals of the cache are kept up to date by every
+    commit, so that a commit only lists and sizes the entries when the cache goes over its limits. Concurrent commits
+    may leave the totals off, which the next eviction corrects.
+    """
+    def __init__(self, root: Path, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key: str) -> Path:
+        """
+        Get the directory of the entry for the key, whether it exists or not.
+        :param key:
+        :return:
+        """
+        return self.root / key
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        Get the directory of the entry for the key and mark it as recently used.
+        :param key:
+        :return: the entry directory or None on a cache miss
+        """
+        path = self.entry_path(key)
+        if not path.is_dir():
+            return None
+        self._touch(path)
+        return path
+
+    def create(self, key: str) -> Path:
+        """
+        Create an empty staging directory for the key. The staging directory has to be committed using commit().
+        :param key:
+        :return:
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging_path = self.root / f".staging-{key}-{uuid.uuid4().hex}"
+        staging_path.mkdir()
+        return staging_path
+
+    def commit(self, key: str, staging_path: Path) -> Path:
+        """
+        Move the staging directory in place of the entry for the key, replacing any existing entry.
+        :param key:
+        :param staging_path:
+        :return: the entry directory
+        """
+        path = self.entry_path(key)
+        replaced_size = get_entry_size(path) if path.exists() else None
+        if path.exists():
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(staging_path, path)
+        except OSError:
+            # Another process committed the same key in the meantime, keep theirs.
+            shutil.rmtree(staging_path, ignore_errors=True)
+            self._touch(path)
+            return path
+        size = record_entry_size(path)
+        self._touch(path)
+
+        usage = self._read_usage()
+        if usage is None:
+            self.evict()
+            return path
+        usage["bytes"] += size - (replaced_size or 0)
+        usage["entries"] += 0 if replaced_size is not None else 1
+        if ((self.max_entries is not None and usage["entries"] > self.max_entries) or
+                (self.max_bytes is not None and usage["bytes"] > self.max_bytes)):
+            self.evict()
+        else:
+            self._write_usage(usage)
+        return path
+
+    def resize(self, key: str):
+        """
+        Record the size of an entry again after files were added to it, e.g. a dependency layer.
+        :param key:
+        :return:
+        """
+        record_entry_size(self.entry_path(key))
+        # The next commit computes the totals again
+        (self.root / USAGE_FILE_NAME).unlink(missing_ok=True)
+
+    def read_metadata(self, key: str) -> dict:
+        """
+        Read the metadata stored along with the entry for the key.
+        :param key:
+        :return:
+        """
+        metadata_file = self.entry_path(key) / METADATA_FILE_NAME
+        try:
+            with metadata_file.open("r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_metadata(self, key: str, metadata: dict, path: Optional[Path] = None):
+        """
+        Write the metadata of the entry for the key. The path of a staging directory can be given to write the
+        metadata before the entry is committed.
+        :param key:
+        :param metadata:
+        :param path:
+        :return:
+        """
+        path = path or self.entry_path(key)
+        temp_file = path / f".{METADATA_FILE_NAME}.{uuid.uuid4().hex}"
+        with temp_file.open("w") as f:
+            json.dump(metadata, f)
+        os.replace(temp_file, path / METADATA_FILE_NAME)
+
+    def entries(self) -> list[CacheEntry]:
+        """
+        List the committed entries of the cache, most recently used first.
+        :return:
+        """
+        if not self.root.is_dir():
+            return []
+        entries = []
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name.startswith("."):
+                continue
+            try:
+                last_used = path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append(CacheEntry(key=path.name, path=path, last_used=last_used))
+        return sorted(entries, key=lambda entry: entry.last_used, reverse=True)
+
+    def remove(self, key: str):
+        """
+        Remove the entry for the key.
+        :param key:
+        :return:
+        """
+        shutil.rmtree(self.entry_path(key), ignore_errors=True)
+
+    def size(self) -> int:
+        """
+        Get the total size of the committed entries in bytes.
+        :return:
+        """
+        return sum(entry.size for entry in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None):
+        """
+        Remove the least recently used entries above the configured limits. A lower size limit than the configured
+        one can be given to shrink the cache further.
+        :param max_bytes:
+        :return:
+        """
+        max_bytes = max_bytes if max_bytes is not None else self.max_bytes
+        entries = self.entries()
+        if self.max_entries is not None:
+            for entry in entries[self.max_entries:]:
+                self.remove(entry.key)
+            entries = entries[:self.max_entries]
+        total_size = 0
+        kept_size, kept_entries = 0, 0
+        for entry in entries:
+            entry_size = entry.size
+            total_size += entry_size
+            # Always keep the most recently used entry, even when it is above the limit on its own
+            if max_bytes is not None and total_size > max_bytes and entry is not entries[0]:
+                self.remove(entry.key)
+            else:
+                kept_size += entry_size
+                kept_entries += 1
+        self._write_usage({"bytes": kept_size, "entries": kept_entries})
+
+    def remove_stale_staging(self, max_age: float = STALE_STAGING_AGE):
+        """
+        Remove the staging directories left behind by interrupted runs.
+        :param max_age: the age in seconds after which a staging directory is considered abandoned
+        :return:
+        """
+        if not self.root.is_dir():
+            return
+        for path in self.root.glob(".staging-*"):
+            try:
+                if time.time() - path.stat().st_mtime > max_age:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def clear(self):
+        """
+        Remove every entry of the cache.
+        :return:
+        """
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _read_usage(self) -> Optional[dict]:
+        try:
+            with (self.root / USAGE_FILE_NAME).open("r") as f:
+                usage = json.load(f)
+            return {"bytes": int(usage["bytes"]), "entries": int(usage["entries"])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_usage(self, usage: dict):
+        temp_file = self.root / f".{USAGE_FILE_NAME}.{uuid.uuid4().hex}"
+        try:
+            with temp_file.open("w") as f:
+                json.dump(usage, f)
+            os.replace(temp_file, self.root / USAGE_FILE_NAME)
+        except OSError:
+            temp_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _touch(path: Path):
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
@@ -0,0 +1,193 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from rippling_cli.constants import APP_FOLDER
+
+# Files the app runtime never loads. A .ripplingignore file can re-include any of them with a negated pattern.
+DEFAULT_IGNORE_PATTERNS = (
+    "__pycache__/",
+    "*.py[cod]",
+    "*.pyi",
+    "py.typed",
+    "*.dist-info/RECORD",
+    "*.dist-info/INSTALLER",
+    "*.dist-info/REQUESTED",
+    "*.dist-info/direct_url.json",
+    ".git/",
+    ".DS_Store",
+    # The console scripts installed next to the dependencies
+    "/bin/",
+)
+# The development files of the app. Only the app folder leaves them out, since dependencies may import modules under
+# such directories, e.g. botocore imports botocore.docs.
+APP_IGNORE_PATTERNS = (
+    f"/{APP_FOLDER}/**/tests/",
+    f"/{APP_FOLDER}/**/docs/",
+)
+
+
+@dataclass
+class IgnoreRule:
+    """
+    A compiled gitignore-style pattern.
+    """
+    pattern: str
+    regex: re.Pattern
+    negated: bool
+    directory_only: bool
+
+
+def translate_glob(glob: str) -> str:
+    """
+    Translate a gitignore glob to a regular expression. "*" and "?" never match a "/", while "**" matches any number
+    of directories when it makes up a whole path segment.
+    :param glob:
+    :return:
+    """
+    parts = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob.startswith("**", i) and (i == 0 or glob[i - 1] == "/") and (i + 2 == n or glob[i + 2] == "/"):
+                if i + 2 == n:
+                    parts.append(".*")
+                    i += 2
+                else:
+                    parts.append("(?:.*/)?")
+                    i += 3
+                continue
+            while i < n and glob[i] == "*":
+                i += 1
+            parts.append("[^/]*")
+            continue
+        if c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = glob.find("]", i + 2 if glob.startswith(("[!", "[^"), i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                content = glob[i + 1:end].replace("\\", "\\\\")
+                if content[0] in "!^":
+                    content = "^" + content[1:]
+                parts.append(f"(?!/)[{content}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(glob[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+def compile_rule(line: str) -> Optional[IgnoreRule]:
+    """
+    Compile a line of an ignore file. Blank lines and comments give None.
+    :param line:
+    :return:
+    """
+    pattern = line.rstrip("\n")
+    if not pattern.endswith("\\ "):
+        pattern = pattern.rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negated = pattern.startswith("!")
+    glob = pattern[1:] if negated else pattern
+    if glob.startswith(("\\!", "\\#")):
+        glob = glob[1:]
+    directory_only = glob.endswith("/")
+    glob = glob.rstrip("/")
+    if not glob:
+        return None
+
+    # Like git, a pattern containing a slash other than a trailing one is relative to the root, while any other
+    # pattern matches a name at any depth
+    if "/" in glob:
+        regex = translate_glob(glob.lstrip("/"))
+    else:
+        regex = "(?:.*/)?" + translate_glob(glob)
+    return IgnoreRule(pattern=pattern, regex=re.compile(f"^{regex}$", re.DOTALL), negated=negated,
+                      directory_only=directory_only)
+
+
+class IgnoreRules:
+    """
+    An ordered list of gitignore-style rules matched against the "/"-separated paths of the bundle.
+
+    The last matching rule decides, so a negated pattern can re-include what an earlier one excluded. As with git, a
+    file inside an ignored directory cannot be re-included, which is what allows walk() to never descend into
+    ignored directories.
+    """
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.rules: list[IgnoreRule] = []
+        for line in patterns:
+            rule = compile_rule(line)
+            if rule:
+                self.rules.append(rule)
+        self._reversed_rules = self.rules[::-1]
+
+    @classmethod
+    def from_file(cls, path: str, defaults: Iterable[str] = DEFAULT_IGNORE_PATTERNS) -> "IgnoreRules":
+        """
+        Load the rules of an ignore file, after the default rules. A missing file leaves only the defaults.
+        :param path:
+        :param defaults:
+        :return:
+        """
+        patterns = list(defaults)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                patterns.extend(f.read().splitlines())
+        return cls(patterns)
+
+    @property
+    def patterns(self) -> list[str]:
+        return [rule.pattern for rule in self.rules]
+
+    def is_ignored(self, path: str, is_dir: bool = False) -> bool:
+        """
+        Check if the path is ignored.
+        :param path: the "/"-separated path relative to the root of the bundle
+        :param is_dir:
+        :return:
+        """
+        for rule in self._reversed_rules:
+            if rule.directory_only and not is_dir:
+                continue
+            if rule.regex.match(path):
+                return not rule.negated
+        return False
+
+    def walk(self, directory: str, prefix: str = "") -> Iterator[tuple[os.DirEntry, str]]:
+        """
+        Walk the files of the directory that are not ignored, in a deterministic order. Ignored directories are pruned
+        without being scanned, and symbolic links to directories are not followed.
+        :param directory:
+        :param prefix: the bundle path of the directory
+        :return: the directory entries of the files along with their bundle paths
+        """
+        stack = [(directory, prefix.strip("/"))]
+        while stack:
+            path, path_prefix = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda dir_entry: dir_entry.name)
+            except OSError:
+                # Like os.walk, skip the directories that cannot be listed
+                continue
+            subdirectories = []
+            for entry in entries:
+                bundle_path = f"{path_prefix}/{entry.name}" if path_prefix else entry.name
+                is_dir = entry.is_dir()
+                if self.is_ignored(bundle_path, is_dir):
+                    continue
+                if not is_dir:
+                    yield entry, bundle_path
+                elif not entry.is_symlink():
+                    subdirectories.append((entry.path, bundle_path))
+            stack.extend(reversed(subdirectories))
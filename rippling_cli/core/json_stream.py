@@ -0,0 +1,123 @@
+import codecs
+import json
+from typing import Any, Iterator, Optional, Union
+
+# Consumed text is dropped from the buffer once it is this long, so that the buffer holds about one value at a time
+COMPACT_THRESHOLD = 64 * 1024
+WHITESPACE = " \t\n\r"
+NUMBER_CHARACTERS = "0123456789+-.eE"
+
+
+class JSONStream:
+    """
+    A cursor over JSON text arriving in chunks, reading values one at a time instead of the whole document.
+    """
+    def __init__(self, chunks: Iterator[Union[bytes, str]]):
+        self.chunks = chunks
+        self.decoder = json.JSONDecoder()
+        self.utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def read_more(self) -> bool:
+        """
+        Append the next chunk to the buffer.
+        :return: False once the chunks are exhausted
+        """
+        if self.exhausted:
+            return False
+        if self.pos > COMPACT_THRESHOLD:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        for chunk in self.chunks:
+            text = self.utf8_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.text += text
+                return True
+        self.exhausted = True
+        try:
+            self.text += self.utf8_decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise json.JSONDecodeError("Unterminated UTF-8 character", self.text, len(self.text)) from None
+        return False
+
+    def peek(self) -> str:
+        """
+        Get the next character that is not whitespace, without consuming it.
+        :return: the character, or an empty string at the end of the text
+        """
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.read_more():
+                return self.text[self.pos:self.pos + 1]
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next character that is not whitespace, which must be one of the characters.
+        :param characters:
+        :return: the character
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise json.JSONDecodeError(f"Expecting one of {characters!r}", self.text, self.pos)
+        self.pos += 1
+        return character
+
+    def read_value(self) -> Any:
+        """
+        Decode the next complete value.
+        :return:
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.read_more():
+                    continue
+                raise
+            # A number at the end of the buffer may go on in the next chunk, even when its fraction or exponent is
+            # cut short, e.g. "1.5e" ending the buffer decodes as 1.5
+            at_end = end == len(self.text) or (isinstance(value, (int, float)) and not isinstance(value, bool)
+                                               and not self.text[end:].strip(NUMBER_CHARACTERS))
+            if at_end and self.read_more():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object_array(chunks: Iterator[Union[bytes, str]], array_key: str,
+                      fields: Optional[dict] = None) -> Iterator[Any]:
+    """
+    Decode a JSON object incrementally, yielding the items of its array_key array one at a time. The other members
+    of the object, e.g. a pagination cursor, are stored in fields, complete once the iteration ends.
+    :param chunks: the JSON text, e.g. the content of a streamed response
+    :param array_key:
+    :param fields:
+    :return:
+    """
+    fields = fields if fields is not None else {}
+    stream = JSONStream(chunks)
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.expect("}")
+        return
+
+    while True:
+        key = stream.read_value()
+        stream.expect(":")
+        if key == array_key and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield stream.read_value()
+                    if stream.expect(",]") == "]":
+                        break
+        else:
+            fields[key] = stream.read_value()
+        if stream.expect(",}") == "}":
+            return
@@ -0,0 +1,103 @@
+import uuid
+from typing import Iterable, Iterator, Optional
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class MultipartStream:
+    """
+    A multipart/form-data request body whose file part is streamed from an iterable of chunks.
+
+    The body is never built in memory: requests reads it through read() when its length is known and sends it with a
+    Content-Length header, or iterates over it and sends it with chunked transfer encoding otherwise. The body can be
+    sent again after a rewind when the file chunks can be iterated more than once, e.g. FileChunks, unlike a pipe.
+    """
+    def __init__(self, fields: dict, file_field: str, file_name: str, file_chunks: Iterable[bytes],
+                 file_size: Optional[int] = None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        preamble = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        )
+        self.preamble = preamble + (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                                    f'filename="{file_name}"\r\n\r\n').encode()
+        self.epilogue = f"\r\n--{self.boundary}--\r\n".encode()
+        self.file_chunks = file_chunks
+        self.length = len(self.preamble) + file_size + len(self.epilogue) if file_size is not None else None
+
+        self.bytes_sent = 0
+
+        self._iterator: Optional[Iterator[bytes]] = None
+        self._chunk = b""
+        self._position = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.bytes_sent = len(self.preamble)
+        yield self.preamble
+        for chunk in self.file_chunks:
+            if chunk:
+                self.bytes_sent += len(chunk)
+                yield chunk
+        self.bytes_sent += len(self.epilogue)
+        yield self.epilogue
+
+    @property
+    def replayable(self) -> bool:
+        return isinstance(self.file_chunks, (list, tuple)) or getattr(self.file_chunks, "replayable", False)
+
+    def rewind(self):
+        """
+        Start reading the body from the beginning again.
+        :return:
+        """
+        self._iterator = None
+        self._chunk = b""
+        self._position = 0
+        self.bytes_sent = 0
+
+    def __len__(self) -> int:
+        # requests falls back to chunked transfer encoding when the length is 0
+        return self.length or 0
+
+    def __bool__(self) -> bool:
+        # An empty length must not make the body look empty to requests and urllib3
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read up to size bytes of the body, or the rest of the body when size is negative.
+        :param size:
+        :return:
+        """
+        if self._iterator is None:
+            self._iterator = iter(self)
+        parts = []
+        remaining = size
+        while size < 0 or remaining > 0:
+            if self._position >= len(self._chunk):
+                chunk = next(self._iterator, None)
+                if chunk is None:
+                    break
+                self._chunk, self._position = chunk, 0
+            end = len(self._chunk) if size < 0 else min(len(self._chunk), self._position + remaining)
+            parts.append(self._chunk[self._position:end])
+            remaining -= end - self._position
+            self._position = end
+        return b"".join(parts)
+
+
+class FileChunks:
+    """
+    The chunks of a file, read again from the start on every iteration.
+    """
+    replayable = True
+
+    def __init__(self, path: str, chunk_size: int = READ_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            yield from iter(lambda: f.read(self.chunk_size), b"")
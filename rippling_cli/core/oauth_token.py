@@ -1,15 +1,14 @@
 import http.server
 import socketserver
 import threading
-from datetime import datetime
 from http import HTTPStatus
 from urllib.parse import parse_qs
 
 import click
-import requests  # type: ignore
 
-from rippling_cli.config.config import get_oauth_token_data
+from rippling_cli.config.config import is_oauth_token_expired
 from rippling_cli.constants import RIPPLING_API, RIPPLING_BASE_URL
+from rippling_cli.core.api_client import connection_pool, get_session
 
 
 class OAuthToken:
@@ -44,6 +43,7 @@ class OAuthToken:
         self.authorization_code_received = threading.Event()
         self.authorization_code_timeout = 300  # seconds
         self.expires_in = 3600
+        self.refresh_token = None
         self.httpd = None
 
     def start_authorization_flow(self):
@@ -83,22 +83,32 @@ class OAuthToken:
             "code_verifier": code_verifier,
             "Content-Type": "application/json"
         }
-        response = requests.post(f"{RIPPLING_API}/o/token/", data=data, allow_redirects=False)
+        return self.request_token(data, "Failed to exchange authorization code for token")
+
+    def refresh_access_token(self, refresh_token):
+        """
+        Get a new access token with the refresh token of a previous login, without going through the browser.
+        :param refresh_token:
+        :return: the access token
+        """
+        data = {
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "refresh_token": refresh_token,
+        }
+        return self.request_token(data, "Failed to refresh the access token")
+
+    def request_token(self, data, error_message):
+        response = get_session(RIPPLING_API).post(f"{RIPPLING_API}/o/token/", data=data, allow_redirects=False,
+                                                  timeout=connection_pool.timeout)
         if response.status_code != HTTPStatus.OK:
-            raise Exception(f"Failed to exchange authorization code for token: {response.text}")
-        self.expires_in = response.json()["expires_in"]
-        return response.json()["access_token"]
+            raise Exception(f"{error_message}: {response.text}")
+        token_json = response.json()
+        self.expires_in = token_json["expires_in"]
+        # The server may rotate the refresh token, otherwise the previous one stays valid
+        self.refresh_token = token_json.get("refresh_token") or data.get("refresh_token")
+        return token_json["access_token"]
 
     @staticmethod
     def is_token_expired():
-        # Read token data from the oauth_token.json file
-        token_data = get_oauth_token_data()
-
-        # Extract expiration timestamp from token data
-        expiration_timestamp = token_data and token_data.get('expiration_timestamp')
-
-        if not expiration_timestamp:
-            return True
-        # Compare with the current time
-        current_timestamp = datetime.now().timestamp()
-        return current_timestamp > expiration_timestamp
+        return is_oauth_token_expired()
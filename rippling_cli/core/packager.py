@@ -0,0 +1,303 @@
+import hashlib
+import os
+import stat
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+from rippling_cli.constants import DEFAULT_COMPRESSION_LEVEL
+from rippling_cli.core.ignore_rules import IgnoreRules
+from rippling_cli.core.zip_writer import Writable, ZipEntry, ZipWriter, read_zip_entries
+
+# Content that is already compressed only gets bigger and slower when deflated again
+STORED_EXTENSIONS = frozenset({
+    ".whl", ".zip", ".egg", ".jar", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z",
+    ".so", ".pyd", ".dylib", ".dll",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico",
+    ".npz", ".parquet", ".pdf", ".woff", ".woff2",
+})
+READ_CHUNK_SIZE = 1024 * 1024
+BATCH_MAX_FILES = 64
+BATCH_MAX_BYTES = 8 * 1024 * 1024
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+# Files from this size are compressed by the writer as they are written instead of being held in worker memory
+STREAM_MIN_BYTES = 4 * 1024 * 1024
+# The earliest date a zip header can hold
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass
+class BundleFile:
+    """
+    A file of the file system to be added to the bundle under the given archive name.
+    """
+    path: str
+    arcname: str
+    size: int
+    date_time: tuple
+    external_attr: int
+
+
+@dataclass
+class CompressedFile:
+    """
+    The result of compressing a BundleFile in a worker process: the deflated data, or the data as is when deflating
+    does not make it smaller.
+    """
+    crc: int
+    file_size: int
+    compress_type: int
+    data: bytes
+
+
+def should_store(path: str) -> bool:
+    """
+    Check if the file should be stored without compression based on its extension.
+    :param path:
+    :return:
+    """
+    return os.path.splitext(path)[1].lower() in STORED_EXTENSIONS
+
+
+def compress_file(path: str, compress_level: int) -> CompressedFile:
+    """
+    Compute the checksum of the file and deflate it, keeping the data as is when deflating does not make it smaller.
+    The whole file is held in memory, so only files smaller than STREAM_MIN_BYTES are compressed this way.
+    :param path:
+    :param compress_level:
+    :return:
+    """
+    crc = 0
+    chunks = []
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+    compressed_chunks = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            chunks.append(chunk)
+            compressed_chunks.append(compressor.compress(chunk))
+    compressed_chunks.append(compressor.flush())
+    data = b"".join(chunks)
+    compressed_data = b"".join(compressed_chunks)
+
+    if len(compressed_data) >= len(data):
+        return CompressedFile(crc, len(data), zipfile.ZIP_STORED, data)
+    return CompressedFile(crc, len(data), zipfile.ZIP_DEFLATED, compressed_data)
+
+
+def compress_batch(paths: list[str], compress_level: int) -> list[CompressedFile]:
+    """
+    Compress a batch of files. Files are sent to the worker processes in batches to amortize the inter-process
+    communication over many small files.
+    :param paths:
+    :param compress_level:
+    :return:
+    """
+    return [compress_file(path, compress_level) for path in paths]
+
+
+def read_file_chunks(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(READ_CHUNK_SIZE), b"")
+
+
+def get_reproducible_date_time() -> tuple:
+    """
+    Get the timestamp of every entry of a reproducible archive: SOURCE_DATE_EPOCH when it is set, as the other
+    reproducible build tools do, and the earliest date a zip header can hold otherwise.
+    :return:
+    """
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if source_date_epoch and source_date_epoch.isdigit():
+        return max(time.gmtime(int(source_date_epoch))[0:6], ZIP_EPOCH)
+    return ZIP_EPOCH
+
+
+def get_reproducible_mode(mode: int) -> int:
+    """
+    Normalize the permissions of a file to 0644, or to 0755 when anyone can execute it.
+    :param mode:
+    :return:
+    """
+    return stat.S_IFREG | (0o755 if mode & 0o111 else 0o644)
+
+
+class DigestWriter:
+    """
+    Pass the data on to a file object while computing its SHA-256 digest.
+    """
+    def __init__(self, fileobj: Writable):
+        self.fileobj = fileobj
+        self.hasher = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.hasher.update(data)
+        return self.fileobj.write(data)
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+def read_range_chunks(f: BinaryIO, offset: int, size: int) -> Iterator[bytes]:
+    f.seek(offset)
+    while size > 0:
+        chunk = f.read(min(size, READ_CHUNK_SIZE))
+        if not chunk:
+            raise EOFError(f"Unexpected end of {f.name}")
+        size -= len(chunk)
+        yield chunk
+
+
+class BundlePackager:
+    """
+    Package directories into a zip archive, compressing the files in a pool of worker processes.
+
+    Every file is either deflated at the configured level or stored as is when it is already compressed content,
+    such as wheels, shared libraries and images. Small files are deflated in the workers and written to the archive
+    in the order they were added, with a bounded number of batches in flight. Stored files and files larger than
+    STREAM_MIN_BYTES are read once by the writer, which computes their checksum while it writes them, so that memory
+    stays independent of the file and bundle sizes.
+
+    Zip fragments, archives packaged earlier, are appended after the files: their entries are copied without being
+    decompressed or compressed again.
+
+    In reproducible mode the files are written sorted by name with normalized timestamps and permissions, so that
+    packaging the same files gives the same bytes whatever the file system order and metadata. The compressed data
+    itself only depends on the compression level and on the zlib version.
+    """
+    def __init__(self, compress_level: int = DEFAULT_COMPRESSION_LEVEL, max_workers: Optional[int] = None,
+                 reproducible: bool = False):
+        self.compress_level = compress_level
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.reproducible = reproducible
+        self.files: list[BundleFile] = []
+        self.fragments: list[str] = []
+        self.digest: Optional[str] = None
+        self.size = 0
+
+    def add_directory(self, directory: str, arcname_root: Optional[str] = None,
+                      ignore_rules: Optional[IgnoreRules] = None):
+        """
+        Add every file inside the directory that is not ignored. The archive names are relative to arcname_root, or
+        to the current working directory when no root is given, and the ignore rules are matched against them.
+        :param directory:
+        :param arcname_root:
+        :param ignore_rules:
+        :return:
+        """
+        prefix = os.path.relpath(directory, arcname_root) if arcname_root else os.path.normpath(directory)
+        prefix = "" if prefix == os.curdir else prefix.replace(os.sep, "/")
+        for entry, arcname in (ignore_rules or IgnoreRules()).walk(directory, prefix):
+            self._add_file(entry.path, arcname, entry.stat())
+
+    def add_file(self, path: str, arcname: str):
+        """
+        Add a single file under the given archive name.
+        :param path:
+        :param arcname:
+        :return:
+        """
+        self._add_file(path, arcname, os.stat(path))
+
+    def add_zip_fragment(self, path: str):
+        """
+        Add every entry of an existing zip archive, as it was compressed in that archive.
+        :param path:
+        :return:
+        """
+        self.fragments.append(path)
+
+    def _add_file(self, path: str, arcname: str, st: os.stat_result):
+        if not stat.S_ISREG(st.st_mode):
+            return
+        if self.reproducible:
+            date_time = get_reproducible_date_time()
+            mode = get_reproducible_mode(st.st_mode)
+        else:
+            date_time = max(time.localtime(st.st_mtime)[0:6], ZIP_EPOCH)
+            mode = st.st_mode & 0xFFFF
+        self.files.append(BundleFile(path=path, arcname=arcname.replace(os.sep, "/"), size=st.st_size,
+                                     date_time=date_time, external_attr=mode << 16))
+
+    def write(self, fileobj: Writable) -> str:
+        """
+        Write the archive to the file object.
+        :param fileobj:
+        :return: the SHA-256 digest of the archive
+        """
+        if self.reproducible:
+            self.files.sort(key=lambda bundle_file: bundle_file.arcname)
+        digest_writer = DigestWriter(fileobj)
+        writer = ZipWriter(digest_writer)
+        for bundle_file, compressed_file in self._compress_files():
+            if compressed_file is None:
+                entry = ZipEntry(arcname=bundle_file.arcname, crc=0, file_size=bundle_file.size, compress_size=0,
+                                 date_time=bundle_file.date_time, external_attr=bundle_file.external_attr)
+                compress_level = None if self._is_stored(bundle_file) else self.compress_level
+                writer.write_streamed_entry(entry, read_file_chunks(bundle_file.path), compress_level)
+                continue
+            entry = ZipEntry(arcname=bundle_file.arcname, crc=compressed_file.crc,
+                             file_size=compressed_file.file_size, compress_size=len(compressed_file.data),
+                             compress_type=compressed_file.compress_type, date_time=bundle_file.date_time,
+                             external_attr=bundle_file.external_attr)
+            writer.write_entry(entry, compressed_file.data)
+        for fragment in self.fragments:
+            with open(fragment, "rb") as f:
+                for entry, data_offset in read_zip_entries(fragment):
+                    writer.write_entry(entry, read_range_chunks(f, data_offset, entry.compress_size))
+        writer.close()
+        self.size = writer.offset
+        self.digest = digest_writer.hexdigest()
+        return self.digest
+
+    def _is_stored(self, bundle_file: BundleFile) -> bool:
+        return self.compress_level == 0 or should_store(bundle_file.path)
+
+    def _is_streamed(self, bundle_file: BundleFile) -> bool:
+        return self._is_stored(bundle_file) or bundle_file.size >= STREAM_MIN_BYTES
+
+    def _batches(self) -> Iterator[list[BundleFile]]:
+        batch: list[BundleFile] = []
+        batch_size = 0
+        for bundle_file in self.files:
+            batch.append(bundle_file)
+            if not self._is_streamed(bundle_file):
+                batch_size += bundle_file.size
+            if len(batch) >= BATCH_MAX_FILES or batch_size >= BATCH_MAX_BYTES:
+                yield batch
+                batch, batch_size = [], 0
+        if batch:
+            yield batch
+
+    def _compress_files(self) -> Iterator[tuple[BundleFile, Optional[CompressedFile]]]:
+        """
+        Compress the files that are not streamed, in the order they were added. The streamed files come with no
+        compressed file, for the writer to compress them.
+        :return:
+        """
+        total_size = sum(bundle_file.size for bundle_file in self.files if not self._is_streamed(bundle_file))
+        if self.max_workers == 1 or total_size < PARALLEL_MIN_BYTES:
+            # Starting worker processes costs more than compressing a small bundle
+            for bundle_file in self.files:
+                yield bundle_file, (None if self._is_streamed(bundle_file)
+                                    else compress_file(bundle_file.path, self.compress_level))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight: deque[tuple[list[BundleFile], Future]] = deque()
+            for batch in self._batches():
+                paths = [bundle_file.path for bundle_file in batch if not self._is_streamed(bundle_file)]
+                in_flight.append((batch, executor.submit(compress_batch, paths, self.compress_level)))
+                if len(in_flight) >= self.max_workers * 2:
+                    yield from self._drain(*in_flight.popleft())
+            while in_flight:
+                yield from self._drain(*in_flight.popleft())
+
+    def _drain(self, batch: list[BundleFile], future: Future) -> Iterator[tuple[BundleFile, Optional[CompressedFile]]]:
+        compressed_files = iter(future.result())
+        for bundle_file in batch:
+            yield bundle_file, None if self._is_streamed(bundle_file) else next(compressed_files)
@@ -0,0 +1,165 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator, Optional
+
+import click
+
+from rippling_cli.utils.file_utils import format_size
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+
+@dataclass
+class StageProfile:
+    """
+    The measurements of one stage of a command. Times are in seconds and the start is relative to the start of the
+    profiler. CPU time includes the child processes, such as pip and the compression workers, that ended during the
+    stage. The operating system only reports the highest resident set size reached so far, so peak RSS is the peak of
+    the process or of any of its children at the end of the stage, including the earlier stages, and the peak RSS
+    increase is how much that peak rose during the stage, which is what the stage and the stages running at the same
+    time added to the peak.
+    """
+    name: str
+    start: float = 0.0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    bytes: int = 0
+    peak_rss: int = 0
+    peak_rss_increase: int = 0
+
+    def add_bytes(self, count: int):
+        self.bytes += count
+
+
+def get_cpu_time() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def get_peak_rss() -> int:
+    """
+    Get the peak resident set size in bytes of the process and of its children, or 0 when the platform does not
+    report it.
+    :return:
+    """
+    if resource is None:
+        return 0
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reports bytes, the other platforms kilobytes
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class Profiler:
+    """
+    Record the wall time, CPU time, bytes processed and peak RSS of the stages of a command.
+
+    Stages may run in several threads at once, as packaging and uploading do when the bundle is streamed, in which
+    case their CPU times overlap: CPU time is measured for the whole process.
+    """
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.stages: list[StageProfile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageProfile]:
+        """
+        Measure the stage running in the with block. The stage is recorded even when the block raises.
+        :param name:
+        :return: the profile of the stage, to which the block can add the bytes it processed
+        """
+        stage = StageProfile(name=name, start=time.perf_counter() - self.started_at)
+        cpu_time = get_cpu_time()
+        peak_rss = get_peak_rss()
+        try:
+            yield stage
+        finally:
+            stage.wall_time = time.perf_counter() - self.started_at - stage.start
+            stage.cpu_time = get_cpu_time() - cpu_time
+            stage.peak_rss = get_peak_rss()
+            stage.peak_rss_increase = stage.peak_rss - peak_rss
+            with self._lock:
+                self.stages.append(stage)
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_time": time.perf_counter() - self.started_at,
+            "peak_rss": get_peak_rss(),
+            "stages": [asdict(stage) for stage in sorted(self.stages, key=lambda stage: stage.start)],
+        }
+
+    def print_report(self):
+        """
+        Print the breakdown of the stages in the order they started.
+        :return:
+        """
+        report = self.to_dict()
+        click.echo(click.style("Profile", fg="cyan", bold=True))
+        click.echo(f"{'stage':<28}{'start':>9}{'wall':>9}{'cpu':>9}{'bytes':>12}{'peak rise':>12}"
+                   f"{'peak so far':>14}")
+        for stage in report["stages"]:
+            click.echo(f"{stage['name']:<28}{stage['start']:>8.2f}s{stage['wall_time']:>8.2f}s"
+                       f"{stage['cpu_time']:>8.2f}s{format_size(stage['bytes']):>12}"
+                       f"{format_size(stage['peak_rss_increase']):>12}{format_size(stage['peak_rss']):>14}")
+        click.echo(f"{'total':<28}{'':>9}{report['wall_time']:>8.2f}s{'':>9}{'':>12}{'':>12}"
+                   f"{format_size(report['peak_rss']):>14}")
+
+    def write_report(self, path: str):
+        """
+        Write the report as JSON.
+        :param path:
+        :return:
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+_active_profiler: Optional[Profiler] = None
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[StageProfile]:
+    """
+    Measure a stage with the active profiler. Without one, the stage is not recorded and costs nothing.
+    :param name:
+    :return:
+    """
+    if _active_profiler is None:
+        yield StageProfile(name=name)
+        return
+    with _active_profiler.stage(name) as stage:
+        yield stage
+
+
+@contextmanager
+def profiling(enabled: bool, report_file: Optional[str] = None) -> Iterator[Optional[Profiler]]:
+    """
+    Profile the stages run in the with block, then print the breakdown and write the JSON report when a report file
+    is given. Does nothing unless enabled.
+    :param enabled:
+    :param report_file:
+    :return:
+    """
+    global _active_profiler
+    if not enabled:
+        yield None
+        return
+
+    profiler = _active_profiler = Profiler()
+    try:
+        yield profiler
+    finally:
+        _active_profiler = None
+        profiler.print_report()
+        if report_file:
+            profiler.write_report(report_file)
+            click.echo(f"Profile report written to {report_file}")
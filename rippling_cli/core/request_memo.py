@@ -0,0 +1,125 @@
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    import requests  # type: ignore
+
+
+def compute_request_key(method: str, url: str, params=None, json_body=None, data=None, headers=None) -> Optional[str]:
+    """
+    Compute the memo key of a request from its method, url, body and headers.
+    :param method:
+    :param url:
+    :param params:
+    :param json_body:
+    :param data:
+    :param headers:
+    :return: the key, or None when the body cannot be compared, e.g. a stream
+    """
+    if data is not None and not isinstance(data, (dict, list, tuple, str, bytes)):
+        return None
+    if isinstance(data, bytes):
+        data = data.decode("latin-1")
+    try:
+        request = json.dumps([method.upper(), url, params, json_body, data, headers], sort_keys=True, default=str)
+    except TypeError:
+        return None
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+class _Call:
+    def __init__(self, origin: Optional[str] = None) -> None:
+        self.origin = origin
+        self.done = threading.Event()
+        self.response: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestMemo:
+    """
+    Remember the responses of the read requests sent during one command, so that a resource fetched by several
+    helpers is only fetched once. Identical requests in flight at the same time are collapsed into one, the other
+    callers waiting for its response. Only successful responses are remembered, and a write request forgets the ones
+    of its origin, since it may have changed what they returned.
+    """
+    def __init__(self) -> None:
+        self.calls: dict[str, _Call] = {}
+        self.lock = threading.Lock()
+
+    def fetch(self, key: str, send: Callable[[], "requests.Response"], origin: Optional[str] = None
+              ) -> "requests.Response":
+        """
+        Get the response remembered for the key or the one of the identical request in flight, sending the request
+        otherwise.
+        :param key:
+        :param send:
+        :param origin: the scheme and host the request is sent to
+        :return:
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call(origin)
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            response = call.response = send()
+        except BaseException as e:
+            call.error = e
+            self._forget(key, call)
+            raise
+        finally:
+            call.done.set()
+        if response.status_code != HTTPStatus.OK:
+            self._forget(key, call)
+        return response
+
+    def _forget(self, key: str, call: "_Call"):
+        with self.lock:
+            if self.calls.get(key) is call:
+                del self.calls[key]
+
+    def clear(self, origin: Optional[str] = None):
+        """
+        Forget the remembered responses.
+        :param origin: only forget the responses of this scheme and host
+        :return:
+        """
+        with self.lock:
+            if origin is None:
+                self.calls.clear()
+            else:
+                self.calls = {key: call for key, call in self.calls.items() if call.origin != origin}
+
+
+_active_memo: Optional[RequestMemo] = None
+
+
+def get_active_memo() -> Optional[RequestMemo]:
+    return _active_memo
+
+
+@contextmanager
+def memoizing() -> Iterator[RequestMemo]:
+    """
+    Remember the responses of the read requests sent in the with block, typically one command.
+    :return:
+    """
+    global _active_memo
+    previous_memo = _active_memo
+    memo = _active_memo = RequestMemo()
+    try:
+        yield memo
+    finally:
+        _active_memo = previous_memo
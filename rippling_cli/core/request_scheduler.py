@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import requests  # type: ignore
+from urllib3.exceptions import MaxRetryError, NewConnectionError  # type: ignore
+
+from rippling_cli.constants import (
+    API_BURST_SIZE,
+    API_MAX_RETRIES,
+    API_RATE_LIMIT,
+    API_RETRY_AFTER_MAX,
+    API_RETRY_BACKOFF,
+    API_RETRY_BACKOFF_MAX,
+)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# The server did not process the request, so any request can be sent again
+REJECTED_STATUSES = frozenset({HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE})
+# The server may have processed the request, so only idempotent requests can be sent again
+FAILED_STATUSES = frozenset({HTTPStatus.INTERNAL_SERVER_ERROR, HTTPStatus.BAD_GATEWAY, HTTPStatus.GATEWAY_TIMEOUT})
+
+
+class TokenBucket:
+    """
+    A client-side rate limit shared by the threads sending requests to the same host: requests are sent at rate
+    per second on average, in bursts of up to capacity requests.
+    """
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, waiting for one to be available.
+        :return:
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """
+        Hold every request to the host for the given time, e.g. when the server asked to retry later.
+        :param seconds:
+        :return:
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def get_retry_after(response: requests.Response) -> Optional[float]:
+    """
+    Get the delay in seconds the server asked for with the Retry-After header, given in seconds or as an HTTP date.
+    :param response:
+    :return: the delay, or None without a valid header
+    """
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_connect_error(error: Exception) -> bool:
+    """
+    Tell whether the request failed before reaching the server, in which case it was not processed.
+    :param error:
+    :return:
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    return isinstance(reason, MaxRetryError) and isinstance(reason.reason, NewConnectionError)
+
+
+class RequestScheduler:
+    """
+    Send the requests of every API client through a per host token bucket, retrying the failures that are worth
+    retrying with exponential backoff and full jitter.
+
+    Rejected requests (429, 503) and requests that could not connect are retried whatever their method, after the
+    Retry-After delay when the server gives one, during which every request to the host waits. Server errors,
+    timeouts and dropped connections are only retried for idempotent requests, which the server may have processed.
+    """
+    def __init__(self, max_retries: int = API_MAX_RETRIES, backoff: float = API_RETRY_BACKOFF,
+                 backoff_max: float = API_RETRY_BACKOFF_MAX, retry_after_max: float = API_RETRY_AFTER_MAX,
+                 rate: float = API_RATE_LIMIT, burst: int = API_BURST_SIZE):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.rate = rate
+        self.burst = burst
+        self.buckets: dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        netloc = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(netloc)
+            if bucket is None:
+                bucket = self.buckets[netloc] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def get_backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def send(self, method: str, url: str, send: Callable[[], requests.Response], idempotent: Optional[bool] = None,
+             replayable: bool = True) -> requests.Response:
+        """
+        Send the request, retrying it when it failed in a way worth retrying.
+        :param method:
+        :param url:
+        :param send: sends the request once
+        :param idempotent: whether sending the request twice has the effect of sending it once, by default
+            according to its method
+        :param replayable: whether the request body can be sent again
+        :return: the response of the last attempt
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        bucket = self.get_bucket(url)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            can_retry = replayable and attempt < self.max_retries
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if not can_retry or not (idempotent or is_connect_error(e)):
+                    raise
+                time.sleep(self.get_backoff(attempt))
+                attempt += 1
+                continue
+
+            if not can_retry or not (response.status_code in REJECTED_STATUSES or
+                                     (idempotent and response.status_code in FAILED_STATUSES)):
+                return response
+            retry_after = get_retry_after(response)
+            if retry_after is not None and retry_after > self.retry_after_max:
+                return response
+            response.close()
+            if retry_after is not None:
+                bucket.pause(retry_after)
+            else:
+                time.sleep(self.get_backoff(attempt))
+            attempt += 1
+
+
+request_scheduler = RequestScheduler()
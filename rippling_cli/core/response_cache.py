@@ -0,0 +1,196 @@
+import hashlib
+import json
+import re
+import time
+from http import HTTPStatus
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import requests  # type: ignore
+from requests.structures import CaseInsensitiveDict  # type: ignore
+
+from rippling_cli.config import config
+from rippling_cli.constants import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_NAME, RESPONSE_CACHE_TTLS, RIPPLING_API
+from rippling_cli.core.disk_cache import DiskCache
+
+BODY_FILE_NAME = "body"
+# The request headers that select what the server answers, and so belong to the cache key
+VARY_HEADERS = ("Authorization", "role", "company")
+STORED_HEADERS = ("Content-Type", "ETag")
+
+
+def get_endpoint_path(url: str) -> str:
+    """
+    Get the normalized path of the url, relative to the base url of the Rippling API for its urls.
+    :param url:
+    :return:
+    """
+    parsed_url = urlparse(url)
+    path = re.sub("/+", "/", parsed_url.path).rstrip("/")
+    parsed_api_url = urlparse(RIPPLING_API)
+    api_path = parsed_api_url.path.rstrip("/")
+    if parsed_url.netloc == parsed_api_url.netloc and (path + "/").startswith(api_path + "/"):
+        path = path[len(api_path):]
+    return path
+
+
+def get_endpoint_prefix(url: str) -> Optional[str]:
+    """
+    Get the prefix of RESPONSE_CACHE_TTLS the path of the url starts with.
+    :param url:
+    :return: the prefix, or None when the responses of the endpoint are not cached
+    """
+    path = get_endpoint_path(url)
+    for endpoint_prefix in RESPONSE_CACHE_TTLS:
+        if path == endpoint_prefix or path.startswith(endpoint_prefix + "/"):
+            return endpoint_prefix
+    return None
+
+
+def get_endpoint_ttl(url: str) -> Optional[int]:
+    """
+    Get the time in seconds during which a response of the endpoint is used without asking the server.
+    :param url:
+    :return: the TTL, or None when the responses of the endpoint are not cached
+    """
+    endpoint_prefix = get_endpoint_prefix(url)
+    return None if endpoint_prefix is None else RESPONSE_CACHE_TTLS[endpoint_prefix]
+
+
+def compute_endpoint_key(url: str, endpoint_prefix: str) -> str:
+    """
+    Compute the key shared by the responses cached under the endpoint prefix on the host of the url, which starts
+    the keys of these responses so that they can be invalidated together.
+    :param url:
+    :param endpoint_prefix:
+    :return:
+    """
+    parsed_url = urlparse(url)
+    return hashlib.sha256(f"{parsed_url.scheme}://{parsed_url.netloc}{endpoint_prefix}".encode()).hexdigest()[:16]
+
+
+def compute_response_key(url: str, params: Optional[dict], headers: dict) -> str:
+    """
+    Compute the cache key of a GET request of a cached endpoint. The credentials are part of the key, so that the
+    responses cached for one user or company are never served to another.
+    :param url:
+    :param params:
+    :param headers:
+    :return:
+    """
+    request = {
+        "url": url,
+        "params": sorted((str(key), str(value)) for key, value in (params or {}).items()),
+        "headers": [str(headers.get(header, "")) for header in VARY_HEADERS],
+    }
+    endpoint_key = compute_endpoint_key(url, get_endpoint_prefix(url) or "")
+    return f"{endpoint_key}-{hashlib.sha256(json.dumps(request).encode()).hexdigest()}"
+
+
+def build_response(url: str, body: bytes, headers: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = HTTPStatus.OK
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = body
+    return response
+
+
+class ResponseCache:
+    """
+    A size bounded disk cache of the responses to the GET requests of the read endpoints.
+
+    A cached response is used as is during the TTL of its endpoint. Once expired, it is revalidated with
+    If-None-Match, so that an unchanged resource costs a 304 Not Modified instead of its JSON.
+    """
+    def __init__(self, enabled: bool = True, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+
+    @property
+    def store(self) -> DiskCache:
+        return DiskCache(config.get_cache_dir(RESPONSE_CACHE_NAME), max_bytes=self.max_bytes)
+
+    def get(self, url: str, params: Optional[dict], headers: dict,
+            send: Callable[[dict], requests.Response]) -> requests.Response:
+        """
+        Answer a GET request from the cache when possible, sending it otherwise.
+        :param url:
+        :param params:
+        :param headers: the headers of the request
+        :param send: sends the request with the given additional headers
+        :return:
+        """
+        ttl = get_endpoint_ttl(url)
+        if not self.enabled or ttl is None:
+            return send({})
+
+        store = self.store
+        key = compute_response_key(url, params, headers)
+        path = store.get(key)
+        metadata = store.read_metadata(key) if path else {}
+        if path and metadata:
+            if time.time() - metadata.get("cached_at", 0) < ttl:
+                cached_response = self._read_response(path, url, metadata)
+                if cached_response is not None:
+                    return cached_response
+
+        etag = metadata.get("headers", {}).get("ETag")
+        response = send({"If-None-Match": etag} if etag else {})
+
+        if response.status_code == HTTPStatus.NOT_MODIFIED and path:
+            cached_response = self._read_response(path, url, metadata)
+            if cached_response is not None:
+                store.write_metadata(key, {**metadata, "cached_at": time.time()})
+                return cached_response
+            # The cached body vanished, e.g. evicted by another command, fetch it again
+            response = send({})
+        if response.status_code == HTTPStatus.OK:
+            self._write_response(store, key, response)
+        return response
+
+    def invalidate(self, url: str):
+        """
+        Remove the responses cached under the endpoint prefix of the url, whatever their parameters and credentials,
+        after a request to the url may have changed them, e.g. a deploy changing the builds of the app.
+        :param url:
+        :return:
+        """
+        endpoint_prefix = get_endpoint_prefix(url)
+        if endpoint_prefix is None:
+            return
+        store = self.store
+        endpoint_key = compute_endpoint_key(url, endpoint_prefix)
+        for entry in store.entries():
+            if entry.key.startswith(endpoint_key + "-"):
+                store.remove(entry.key)
+
+    @staticmethod
+    def _read_response(path, url: str, metadata: dict) -> Optional[requests.Response]:
+        try:
+            body = (path / BODY_FILE_NAME).read_bytes()
+        except OSError:
+            return None
+        return build_response(url, body, metadata.get("headers", {}))
+
+    @staticmethod
+    def _write_response(store: DiskCache, key: str, response: requests.Response):
+        staging_path = store.create(key)
+        (staging_path / BODY_FILE_NAME).write_bytes(response.content)
+        headers = {header: response.headers[header] for header in STORED_HEADERS if header in response.headers}
+        store.write_metadata(key, {"cached_at": time.time(), "headers": headers}, path=staging_path)
+        store.commit(key, staging_path)
+
+
+response_cache = ResponseCache()
+
+
+def configure_response_cache(enabled: Optional[bool] = None):
+    """
+    Change the settings of the response cache for the next requests.
+    :param enabled: whether responses are read from and written to the cache
+    :return:
+    """
+    if enabled is not None:
+        response_cache.enabled = enabled
@@ -1,4 +1,16 @@
+from typing import Optional
+
+from rippling_cli.core.credential_store import CredentialStore
+
+
 class RipplingContext:
-    def __init__(self):
+    def __init__(self, credentials: Optional[CredentialStore] = None, interactive_login: bool = True):
         self.auth_token = None
-        self.oauth_credentials = None
+        self.oauth_credentials: Optional[str] = None
+        self.credentials = credentials or CredentialStore()
+        # False in the daemon, which cannot open the browser and receive the login callback for the user
+        self.interactive_login = interactive_login
+
+    @property
+    def oauth_token(self) -> Optional[str]:
+        return self.credentials.get_token()
@@ -0,0 +1,218 @@
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+import click
+import requests  # type: ignore
+
+from rippling_cli.core.api_client import add_request_hook, remove_request_hook
+from rippling_cli.utils.file_utils import format_size
+
+# Path segments identifying a resource: object ids, numbers and uuids
+ID_SEGMENT_PATTERN = re.compile(r"^([0-9a-f]{24}|\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$",
+                                re.IGNORECASE)
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAM_WIDTH = 40
+
+
+@dataclass
+class RequestTrace:
+    """
+    The timings of one attempt of an API request. Times are in seconds and the start is relative to the start of the
+    tracer. The time to first byte runs until the response headers arrived, the latency until the body was read,
+    except for streamed responses whose body is read by the caller. A cached request was answered by the request
+    memo or the response cache without reaching the network.
+    """
+    method: str
+    host: str
+    endpoint: str
+    start: float = 0.0
+    status: Optional[int] = None
+    bytes_out: int = 0
+    bytes_in: Optional[int] = None
+    time_to_first_byte: Optional[float] = None
+    latency: float = 0.0
+    attempt: int = 1
+    error: Optional[str] = None
+    cached: bool = False
+
+
+def get_endpoint_template(url: str) -> str:
+    """
+    Get the path of the url with the resource ids replaced by {id}, so that the requests to the same endpoint are
+    grouped together.
+    :param url:
+    :return:
+    """
+    segments = urlparse(url).path.split("/")
+    return "/".join("{id}" if ID_SEGMENT_PATTERN.match(segment) else segment for segment in segments) or "/"
+
+
+def get_body_size(body) -> int:
+    """
+    Get the size in bytes of a request body as sent by requests.
+    :param body:
+    :return:
+    """
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    # Streamed bodies count what they sent, e.g. MultipartStream
+    if hasattr(body, "bytes_sent"):
+        return body.bytes_sent
+    return len(body) if hasattr(body, "__len__") else 0
+
+
+def get_response_size(response: requests.Response) -> Optional[int]:
+    """
+    Get the size in bytes of the response body, as announced by the server when the body is streamed to the caller.
+    :param response:
+    :return:
+    """
+    if response._content_consumed:
+        return len(response.content)
+    content_length = response.headers.get("Content-Length")
+    return int(content_length) if content_length and content_length.isdigit() else None
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def get_percentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(percentile * len(values)))]
+
+
+class Tracer:
+    """
+    Record the requests sent by the API clients, appending every trace to a JSONL file as soon as the request ends
+    when a trace file is given.
+    """
+    def __init__(self, trace_file: Optional[str] = None) -> None:
+        self.started_at = time.perf_counter()
+        self.traces: list[RequestTrace] = []
+        self._lock = threading.Lock()
+        self._file = open(trace_file, "w") if trace_file else None
+
+    def on_request(self, method: str, url: str, body, response: Optional[requests.Response],
+                   error: Optional[BaseException], latency: float, attempt: int):
+        """
+        Record an attempt of a request, as a request hook of the API clients.
+        :param method:
+        :param url:
+        :param body:
+        :param response:
+        :param error:
+        :param latency:
+        :param attempt: the attempt number, 0 for a response served from a cache
+        :return:
+        """
+        trace = RequestTrace(method=method, host=urlparse(url).netloc, endpoint=get_endpoint_template(url),
+                             start=time.perf_counter() - self.started_at - latency, bytes_out=get_body_size(body),
+                             latency=latency, attempt=attempt, cached=attempt == 0)
+        if response is not None:
+            trace.status = response.status_code
+            trace.bytes_in = get_response_size(response)
+            if not trace.cached:
+                trace.time_to_first_byte = response.elapsed.total_seconds()
+        if error is not None:
+            trace.error = type(error).__name__
+        self.record(trace)
+
+    def record(self, trace: RequestTrace):
+        with self._lock:
+            self.traces.append(trace)
+            if self._file:
+                self._file.write(json.dumps(asdict(trace)) + "\n")
+                self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+    def print_report(self) -> None:
+        """
+        Print every request in the order they started, the latency of every endpoint and the latency histogram. The
+        cached requests are listed with the others, but left out of the latencies. The report goes to stderr, so that
+        it never mixes with the output of the command.
+        :return:
+        """
+        traces = sorted(self.traces, key=lambda trace: trace.start)
+        click.echo(click.style("Requests", fg="cyan", bold=True), err=True)
+        click.echo(f"{'start':>8} {'method':<7}{'endpoint':<48}{'status':>11}{'out':>10}{'in':>10}{'ttfb':>9}"
+                   f"{'total':>9}", err=True)
+        for trace in traces:
+            status = trace.status or trace.error or "-"
+            if trace.cached:
+                status = f"{status} cached"
+            elif trace.attempt > 1:
+                status = f"{status} #{trace.attempt}"
+            bytes_in = format_size(trace.bytes_in) if trace.bytes_in is not None else "-"
+            click.echo(f"{trace.start:>7.2f}s {trace.method:<7}{trace.endpoint:<48}{status:>11}"
+                       f"{format_size(trace.bytes_out):>10}{bytes_in:>10}"
+                       f"{format_duration(trace.time_to_first_byte):>9}{format_duration(trace.latency):>9}", err=True)
+
+        endpoints: dict[tuple[str, str], list[float]] = {}
+        cached_counts: dict[tuple[str, str], int] = {}
+        for trace in traces:
+            if trace.cached:
+                cached_counts[(trace.method, trace.endpoint)] = cached_counts.get((trace.method, trace.endpoint), 0) + 1
+            else:
+                endpoints.setdefault((trace.method, trace.endpoint), []).append(trace.latency)
+        click.echo(click.style("Endpoints", fg="cyan", bold=True), err=True)
+        click.echo(f"{'method':<7}{'endpoint':<48}{'count':>6}{'cached':>7}{'p50':>9}{'p95':>9}{'max':>9}{'total':>9}",
+                   err=True)
+        for (method, endpoint), latencies in sorted(endpoints.items(), key=lambda item: -sum(item[1])):
+            p50, p95 = get_percentile(latencies, 0.5), get_percentile(latencies, 0.95)
+            click.echo(f"{method:<7}{endpoint:<48}{len(latencies):>6}{cached_counts.pop((method, endpoint), 0):>7}"
+                       f"{format_duration(p50):>9}{format_duration(p95):>9}{format_duration(max(latencies)):>9}"
+                       f"{format_duration(sum(latencies)):>9}", err=True)
+        # The endpoints only answered from the caches
+        for (method, endpoint), count in cached_counts.items():
+            click.echo(f"{method:<7}{endpoint:<48}{0:>6}{count:>7}{'-':>9}{'-':>9}{'-':>9}{'-':>9}", err=True)
+
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for trace in traces:
+            if trace.cached:
+                continue
+            counts[next((index for index, bound in enumerate(HISTOGRAM_BUCKETS) if trace.latency < bound),
+                        len(HISTOGRAM_BUCKETS))] += 1
+        click.echo(click.style("Latency histogram", fg="cyan", bold=True), err=True)
+        labels = [f"< {format_duration(bound)}" for bound in HISTOGRAM_BUCKETS]
+        labels.append(f">= {format_duration(HISTOGRAM_BUCKETS[-1])}")
+        for label, count in zip(labels, counts):
+            bar = "#" * round(HISTOGRAM_WIDTH * count / max(max(counts), 1))
+            click.echo(f"{label:>9} {count:>5} {bar}".rstrip(), err=True)
+
+
+@contextmanager
+def tracing(enabled: bool, trace_file: Optional[str] = None) -> Iterator[Optional[Tracer]]:
+    """
+    Trace the requests sent in the with block, then print the report when enabled. A trace file turns tracing on and
+    receives the traces as JSON lines.
+    :param enabled: whether to print the report
+    :param trace_file:
+    :return:
+    """
+    if not enabled and not trace_file:
+        yield None
+        return
+
+    tracer = Tracer(trace_file)
+    add_request_hook(tracer.on_request)
+    try:
+        yield tracer
+    finally:
+        remove_request_hook(tracer.on_request)
+        tracer.close()
+        if enabled:
+            tracer.print_report()
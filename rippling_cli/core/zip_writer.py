@@ -0,0 +1,217 @@
+import struct
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, Optional, Protocol, Union
+
+ZIP64_MARKER = 0xFFFFFFFF
+ZIP64_LIMIT = ZIP64_MARKER
+ZIP_FILECOUNT_MARKER = 0xFFFF
+ZIP_FILECOUNT_LIMIT = ZIP_FILECOUNT_MARKER
+DATA_DESCRIPTOR_FLAG = 0x08
+UTF8_FLAG = 0x800
+UNIX_CREATE_SYSTEM = 3
+DEFAULT_VERSION = 20
+ZIP64_VERSION = 45
+
+LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+CENTRAL_DIRECTORY_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+ZIP64_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4sQ2H2L4Q")
+ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR = struct.Struct("<4sLQL")
+DATA_DESCRIPTOR = struct.Struct("<4s3L")
+ZIP64_DATA_DESCRIPTOR = struct.Struct("<4sL2Q")
+# Deflating incompressible data makes it slightly bigger, so ZIP64 is used for entries close to the limit
+ZIP64_STREAMED_LIMIT = ZIP64_LIMIT // 21 * 20
+
+
+class Writable(Protocol):
+    def write(self, data: bytes, /) -> int:
+        ...
+
+
+@dataclass
+class ZipEntry:
+    """
+    The description of a single member of a zip archive whose data is already compressed.
+    """
+    arcname: str
+    crc: int
+    file_size: int
+    compress_size: int
+    compress_type: int = zipfile.ZIP_STORED
+    date_time: tuple = (1980, 1, 1, 0, 0, 0)
+    external_attr: int = 0
+    header_offset: int = 0
+    flag_bits: int = 0
+
+
+def read_zip_entries(path: str) -> list[tuple[ZipEntry, int]]:
+    """
+    Read the entries of an existing zip archive along with the offset of their compressed data, so that the data can
+    be copied as is into another archive.
+    :param path:
+    :return:
+    """
+    entries = []
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            f.seek(info.header_offset)
+            header = LOCAL_FILE_HEADER.unpack(f.read(LOCAL_FILE_HEADER.size))
+            name_length, extra_length = header[-2:]
+            entry = ZipEntry(arcname=info.filename, crc=info.CRC, file_size=info.file_size,
+                             compress_size=info.compress_size, compress_type=info.compress_type,
+                             date_time=info.date_time, external_attr=info.external_attr)
+            entries.append((entry, info.header_offset + LOCAL_FILE_HEADER.size + name_length + extra_length))
+    return entries
+
+
+def to_dos_date_time(date_time: tuple) -> tuple[int, int]:
+    """
+    Convert a (year, month, day, hour, minute, second) tuple to the dos date and time used by zip headers.
+    :param date_time:
+    :return:
+    """
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+    return dos_date, dos_time
+
+
+class ZipWriter:
+    """
+    Write a zip archive from entries whose data has already been compressed.
+
+    Unlike zipfile.ZipFile, the writer never seeks, so the archive can be written to pipes and sockets as well as to
+    regular files: the sizes and checksum of an entry are either known before its local header is written, or written
+    in a data descriptor after its data when the entry is compressed as it is written. ZIP64 extensions are used only
+    when the archive needs them.
+    """
+    def __init__(self, fileobj: Writable):
+        self.fileobj = fileobj
+        self.offset = 0
+        self.entries: list[ZipEntry] = []
+
+    def _write(self, data: bytes):
+        self.fileobj.write(data)
+        self.offset += len(data)
+
+    def write_entry(self, entry: ZipEntry, data: Union[bytes, Iterable[bytes]]):
+        """
+        Write the local header and the compressed data of the entry.
+        :param entry:
+        :param data: the compressed data or an iterable of compressed chunks
+        :return:
+        """
+        entry.header_offset = self.offset
+        self.entries.append(entry)
+
+        name = entry.arcname.encode("utf-8")
+        dos_date, dos_time = to_dos_date_time(entry.date_time)
+        extra = b""
+        file_size, compress_size = entry.file_size, entry.compress_size
+        if file_size >= ZIP64_LIMIT or compress_size >= ZIP64_LIMIT:
+            extra = struct.pack("<2H2Q", 1, 16, file_size, compress_size)
+            file_size = compress_size = ZIP64_MARKER
+        version = ZIP64_VERSION if extra else DEFAULT_VERSION
+
+        self._write(LOCAL_FILE_HEADER.pack(b"PK\x03\x04", version, 0, UTF8_FLAG, entry.compress_type, dos_time,
+                                           dos_date, entry.crc, compress_size, file_size, len(name), len(extra)))
+        self._write(name + extra)
+
+        if isinstance(data, bytes):
+            self._write(data)
+        else:
+            for chunk in data:
+                self._write(chunk)
+
+    def write_streamed_entry(self, entry: ZipEntry, chunks: Iterable[bytes], compress_level: Optional[int] = None):
+        """
+        Write an entry from its uncompressed data, which is compressed as it is written. The checksum and sizes of the
+        entry are computed in the same pass and written in a data descriptor after the data, so the data is read once
+        whatever its size.
+        :param entry: the entry, whose file_size is the expected size of the data
+        :param chunks: the uncompressed data
+        :param compress_level: the deflate level, or None to store the data
+        :return:
+        """
+        entry.header_offset = self.offset
+        entry.flag_bits = DATA_DESCRIPTOR_FLAG
+        entry.compress_type = zipfile.ZIP_STORED if compress_level is None else zipfile.ZIP_DEFLATED
+        self.entries.append(entry)
+
+        name = entry.arcname.encode("utf-8")
+        dos_date, dos_time = to_dos_date_time(entry.date_time)
+        zip64 = entry.file_size >= ZIP64_STREAMED_LIMIT
+        extra = struct.pack("<2H2Q", 1, 16, 0, 0) if zip64 else b""
+        sizes = ZIP64_MARKER if zip64 else 0
+        self._write(LOCAL_FILE_HEADER.pack(b"PK\x03\x04", ZIP64_VERSION if zip64 else DEFAULT_VERSION, 0,
+                                           UTF8_FLAG | DATA_DESCRIPTOR_FLAG, entry.compress_type, dos_time,
+                                           dos_date, 0, sizes, sizes, len(name), len(extra)))
+        self._write(name + extra)
+
+        compressor = None if compress_level is None else zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+        crc = file_size = 0
+        data_offset = self.offset
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            self._write(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            self._write(compressor.flush())
+        entry.crc, entry.file_size, entry.compress_size = crc, file_size, self.offset - data_offset
+
+        if zip64:
+            self._write(ZIP64_DATA_DESCRIPTOR.pack(b"PK\x07\x08", crc, entry.compress_size, file_size))
+        elif file_size >= ZIP64_LIMIT or entry.compress_size >= ZIP64_LIMIT:
+            raise ValueError(f"{entry.arcname} grew past the size of a zip entry without ZIP64 while it was written")
+        else:
+            self._write(DATA_DESCRIPTOR.pack(b"PK\x07\x08", crc, entry.compress_size, file_size))
+
+    def close(self):
+        """
+        Write the central directory and the end of the archive. The file object is left open.
+        :return:
+        """
+        central_directory_offset = self.offset
+        for entry in self.entries:
+            self._write_central_directory_header(entry)
+        central_directory_size = self.offset - central_directory_offset
+
+        entry_count = len(self.entries)
+        if (entry_count >= ZIP_FILECOUNT_LIMIT or central_directory_offset >= ZIP64_LIMIT
+                or central_directory_size >= ZIP64_LIMIT):
+            zip64_end_offset = self.offset
+            self._write(ZIP64_END_OF_CENTRAL_DIRECTORY.pack(
+                b"PK\x06\x06", ZIP64_END_OF_CENTRAL_DIRECTORY.size - 12, ZIP64_VERSION, ZIP64_VERSION, 0, 0,
+                entry_count, entry_count, central_directory_size, central_directory_offset))
+            self._write(ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR.pack(b"PK\x06\x07", 0, zip64_end_offset, 1))
+            entry_count = min(entry_count, ZIP_FILECOUNT_MARKER)
+            central_directory_size = min(central_directory_size, ZIP64_MARKER)
+            central_directory_offset = min(central_directory_offset, ZIP64_MARKER)
+
+        self._write(END_OF_CENTRAL_DIRECTORY.pack(b"PK\x05\x06", 0, 0, entry_count, entry_count,
+                                                  central_directory_size, central_directory_offset, 0))
+
+    def _write_central_directory_header(self, entry: ZipEntry):
+        name = entry.arcname.encode("utf-8")
+        dos_date, dos_time = to_dos_date_time(entry.date_time)
+
+        zip64_fields = []
+        file_size, compress_size, header_offset = entry.file_size, entry.compress_size, entry.header_offset
+        if file_size >= ZIP64_LIMIT or compress_size >= ZIP64_LIMIT:
+            zip64_fields += [file_size, compress_size]
+            file_size = compress_size = ZIP64_MARKER
+        if header_offset >= ZIP64_LIMIT:
+            zip64_fields.append(header_offset)
+            header_offset = ZIP64_MARKER
+        extra = b""
+        if zip64_fields:
+            extra = struct.pack(f"<2H{len(zip64_fields)}Q", 1, 8 * len(zip64_fields), *zip64_fields)
+        version = ZIP64_VERSION if extra else DEFAULT_VERSION
+
+        self._write(CENTRAL_DIRECTORY_HEADER.pack(
+            b"PK\x01\x02", version, UNIX_CREATE_SYSTEM, version, 0, UTF8_FLAG | entry.flag_bits, entry.compress_type,
+            dos_time, dos_date, entry.crc, compress_size, file_size, len(name), len(extra), 0, 0, 0,
+            entry.external_attr, header_offset))
+        self._write(name + extra)
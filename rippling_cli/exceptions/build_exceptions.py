@@ -7,4 +7,22 @@ class PythonCreationFailed(Exception):
 class DirectoryCreationFailed(Exception):
     def __init__(self, message="Failed to create directory."):
         self.message = message
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+
+class PipeAborted(Exception):
+    def __init__(self, message="The reading side of the pipe was closed."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class LockFileNotUsable(Exception):
+    def __init__(self, message="poetry.lock is out of date with pyproject.toml."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class StreamedUploadRejected(Exception):
+    def __init__(self, message="The upload url requires the size of the bundle."):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,4 @@
+class InteractiveLoginRequired(Exception):
+    def __init__(self, message="The access token expired and logging in again requires the browser."):
+        self.message = message
+        super().__init__(self.message)
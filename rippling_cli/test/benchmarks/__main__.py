@@ -0,0 +1,54 @@
+import json
+import sys
+import tempfile
+
+import click
+
+from rippling_cli.test.benchmarks.runner import (
+    DEFAULT_TOLERANCE,
+    find_regressions,
+    load_baselines,
+    run_benchmarks,
+    save_baselines,
+)
+from rippling_cli.test.benchmarks.trees import SCALES
+
+
+@click.command()
+@click.option("--scale", "scales", type=click.Choice(list(SCALES)), multiple=True, default=["small"],
+              help="The scales to run, small by default. large writes multi-GB trees.")
+@click.option("--repeat", type=click.IntRange(1), default=3, help="The repetitions of every benchmark.")
+@click.option("--output", type=click.Path(dir_okay=False, writable=True), help="Write the results as JSON.")
+@click.option("--check", is_flag=True, help="Fail when a benchmark is slower than its baseline.")
+@click.option("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+              help="How many times slower than its baseline a benchmark may get.")
+@click.option("--update_baseline", is_flag=True, help="Record the results as the new baselines.")
+def main(scales, repeat: int, output: str, check: bool, tolerance: float, update_baseline: bool):
+    """
+    Benchmark the packaging and upload of synthetic apps against a local S3 stand-in.
+    """
+    baselines = load_baselines()
+    all_results = []
+    regressions = []
+    for scale_name in scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run_benchmarks(SCALES[scale_name], work_dir, repeat)
+        all_results.append(results)
+        for name, result in results["benchmarks"].items():
+            click.echo(f"{scale_name:<8}{name:<52}{result['seconds']:>10.4f}s{result['bytes']:>14}")
+        regressions += find_regressions(results, baselines, tolerance)
+        if update_baseline:
+            baselines[scale_name] = results["benchmarks"]
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(all_results, f, indent=2)
+    if update_baseline:
+        save_baselines(baselines)
+    if check and regressions:
+        click.echo("\n".join(["Regressions:", *regressions]), err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
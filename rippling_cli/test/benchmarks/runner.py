@@ -0,0 +1,225 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from rippling_cli.config import config
+from rippling_cli.constants import (
+    APP_FOLDER,
+    DEFAULT_COMPRESSION_LEVEL,
+    DEPENDENCY_LAYER_DIR,
+    DEPENDENCY_SITE_DIR,
+    PYPROJECT_TOML,
+    RIPPLING_DIRECTORY_NAME,
+)
+from rippling_cli.test.benchmarks.s3_server import LocalS3Server
+from rippling_cli.test.benchmarks.trees import (
+    Scale,
+    generate_app_tree,
+    generate_dependency_tree,
+    get_requirement_lines,
+)
+from rippling_cli.utils.build_utils import (
+    create_requirements_file,
+    create_zip_file,
+    get_app_requirements,
+    package_and_upload_app_with_dependencies,
+    upload_zip_file_to_s3,
+)
+from rippling_cli.utils.cache_utils import compute_requirements_key, get_dependency_cache
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_TOLERANCE = 1.5
+# Timings this close to their baseline are noise, whatever the ratio
+ABSOLUTE_SLACK = 0.05
+BENCHMARKS = (
+    "create_requirements_file",
+    "create_zip_file",
+    "upload_zip_file_to_s3",
+    "package_and_upload_app_with_dependencies",
+    "package_and_upload_app_with_dependencies_warm",
+    "package_and_upload_app_with_dependencies_stream",
+)
+
+
+def time_call(function: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> float:
+    """
+    Time the function, keeping the fastest of the repetitions as the least disturbed by the rest of the machine.
+    :param function:
+    :param repeat:
+    :param setup: run before every repetition, outside of the timing
+    :return: the fastest time in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+@contextmanager
+def benchmark_environment(project_dir: str) -> Iterator[None]:
+    """
+    Run in the project directory with the caches of the CLI inside the project directory, so that benchmarks neither
+    use nor pollute the caches of the user.
+    :param project_dir:
+    :return:
+    """
+    cwd = os.getcwd()
+    global_config_dir = config.global_config_dir
+    config.global_config_dir = Path(project_dir) / RIPPLING_DIRECTORY_NAME
+    os.chdir(project_dir)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+        config.global_config_dir = global_config_dir
+
+
+def prepare_project(project_dir: str, scale: Scale):
+    """
+    Generate the app and declare its synthetic dependencies in pyproject.toml.
+    :param project_dir:
+    :param scale:
+    :return:
+    """
+    generate_app_tree(os.path.join(project_dir, APP_FOLDER), scale)
+    dependencies = "".join(f'"{line.split("==")[0]}" = "1.0.0"\n' for line in get_requirement_lines(scale))
+    with open(os.path.join(project_dir, PYPROJECT_TOML), "w") as f:
+        f.write(f'[tool.poetry]\nname = "benchmark-app"\n\n[tool.poetry.dependencies]\npython = "^3.10"\n'
+                f'{dependencies}')
+
+
+def seed_dependency_cache(scale: Scale) -> Path:
+    """
+    Install the synthetic dependency tree in the dependency cache as if pip had installed the requirements of the
+    app, so that packaging is measured without the network and the package index.
+    :param scale:
+    :return: the dependency cache entry
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        requirements_file = os.path.join(temp_dir, "requirements.txt")
+        create_requirements_file(get_app_requirements()[0], requirements_file)
+        requirements_key = compute_requirements_key(requirements_file)
+
+    dependency_cache = get_dependency_cache()
+    staging_path = dependency_cache.create(requirements_key)
+    generate_dependency_tree(str(staging_path / DEPENDENCY_SITE_DIR), scale)
+    return dependency_cache.commit(requirements_key, staging_path)
+
+
+def run_benchmarks(scale: Scale, work_dir: str, repeat: int = 3) -> dict:
+    """
+    Run every benchmark on a synthetic project of the given scale, uploading to a local S3 stand-in.
+    :param scale:
+    :param work_dir: an empty directory for the project, its caches and the archives
+    :param repeat:
+    :return: the machine-readable results
+    """
+    project_dir = os.path.join(work_dir, "project")
+    os.makedirs(project_dir)
+    prepare_project(project_dir, scale)
+    results: dict = {}
+
+    with benchmark_environment(project_dir), LocalS3Server() as server:
+        dependencies_path = seed_dependency_cache(scale)
+        site_dir = str(dependencies_path / DEPENDENCY_SITE_DIR)
+        credentials = server.get_upload_credentials()
+
+        requirements_file = os.path.join(work_dir, "requirements.txt")
+        requirements = get_requirement_lines(scale)
+        results["create_requirements_file"] = {
+            "seconds": time_call(lambda: create_requirements_file(requirements, requirements_file), repeat * 10),
+            "bytes": os.path.getsize(requirements_file),
+        }
+
+        zip_filename = os.path.join(work_dir, "bundle.zip")
+        results["create_zip_file"] = {
+            "seconds": time_call(lambda: create_zip_file(APP_FOLDER, site_dir, zip_filename,
+                                                         DEFAULT_COMPRESSION_LEVEL), repeat),
+            "bytes": os.path.getsize(zip_filename),
+        }
+
+        def upload():
+            assert upload_zip_file_to_s3("application/zip", zip_filename, credentials), "Upload rejected"
+
+        results["upload_zip_file_to_s3"] = {
+            "seconds": time_call(upload, repeat),
+            "bytes": os.path.getsize(zip_filename),
+        }
+
+        def package_and_upload(stream_upload: bool = False):
+            received = server.bytes_received
+            assert package_and_upload_app_with_dependencies(credentials, stream_upload=stream_upload), \
+                "Upload rejected"
+            return server.bytes_received - received
+
+        def remove_dependency_layers():
+            shutil.rmtree(dependencies_path / DEPENDENCY_LAYER_DIR, ignore_errors=True)
+
+        def touch_app_file():
+            app_file = next(Path(APP_FOLDER).rglob("*.py"))
+            app_file.write_text(app_file.read_text() + "\n")
+
+        results["package_and_upload_app_with_dependencies"] = {
+            "seconds": time_call(package_and_upload, repeat, setup=remove_dependency_layers),
+            "bytes": package_and_upload(),
+        }
+        results["package_and_upload_app_with_dependencies_warm"] = {
+            "seconds": time_call(package_and_upload, repeat, setup=touch_app_file),
+            "bytes": package_and_upload(),
+        }
+        results["package_and_upload_app_with_dependencies_stream"] = {
+            "seconds": time_call(lambda: package_and_upload(stream_upload=True), repeat, setup=touch_app_file),
+            "bytes": package_and_upload(stream_upload=True),
+        }
+
+    return {
+        "scale": scale.name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "benchmarks": results,
+    }
+
+
+def load_baselines(path: str = BASELINES_FILE) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(baselines: dict, path: str = BASELINES_FILE):
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(results: dict, baselines: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """
+    Compare the results with the baselines of the same scale.
+    :param results:
+    :param baselines:
+    :param tolerance: how many times slower than its baseline a benchmark may get
+    :return: a description of every regression
+    """
+    regressions = []
+    scale_baselines = baselines.get(results["scale"], {})
+    for name, result in results["benchmarks"].items():
+        baseline = scale_baselines.get(name)
+        if baseline is None:
+            continue
+        allowed = baseline["seconds"] * tolerance + ABSOLUTE_SLACK
+        if result["seconds"] > allowed:
+            regressions.append(f"{results['scale']}/{name}: {result['seconds']:.3f}s, baseline "
+                               f"{baseline['seconds']:.3f}s (allowed {allowed:.3f}s)")
+    return regressions
@@ -0,0 +1,153 @@
+import re
+import threading
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+from rippling_cli.core.s3 import S3UploadFileCredentials
+
+READ_CHUNK_SIZE = 1024 * 1024
+PREAMBLE_MAX_SIZE = 64 * 1024
+REQUIRED_FIELDS = ("key", "policy", "x-amz-algorithm", "x-amz-credential", "x-amz-date", "x-amz-signature")
+FIELD_NAME_PATTERN = re.compile(rb'Content-Disposition: form-data; name="([^"]+)"')
+
+
+@dataclass
+class Fault:
+    """
+    A failure injected in place of the answer to an upload: an error status, optionally with a Retry-After header,
+    or a connection reset before any answer.
+    """
+    status: Optional[int] = None
+    retry_after: Optional[str] = None
+    reset: bool = False
+
+
+class PresignedPostHandler(BaseHTTPRequestHandler):
+    """
+    Accept uploads the way S3 accepts a presigned POST: a multipart/form-data body with the policy fields first and
+    the file last, answered with 204 No Content. The body is consumed as a stream, with Content-Length or chunked
+    transfer encoding, so multi-GB uploads do not need multi-GB of memory.
+    """
+    protocol_version = "HTTP/1.1"
+    server: "LocalS3Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        fault = self.server.next_fault()
+        if fault and fault.reset:
+            self.close_connection = True
+            self.connection.close()
+            return
+
+        if self.server.require_content_length and "Content-Length" not in self.headers:
+            for _ in self._read_body():
+                pass
+            self._respond(HTTPStatus.LENGTH_REQUIRED, "MissingContentLength")
+            return
+
+        boundary = self.headers.get("Content-Type", "").partition("boundary=")[2].encode()
+        if not boundary:
+            self._respond(HTTPStatus.BAD_REQUEST, "Missing multipart boundary")
+            return
+
+        received = 0
+        preamble = b""
+        tail = b""
+        for chunk in self._read_body():
+            received += len(chunk)
+            if len(preamble) < PREAMBLE_MAX_SIZE:
+                preamble += chunk[:PREAMBLE_MAX_SIZE - len(preamble)]
+            tail = (tail + chunk)[-(len(boundary) + 8):]
+
+        fields = [name.decode() for name in FIELD_NAME_PATTERN.findall(preamble)]
+        missing_fields = [field for field in REQUIRED_FIELDS if field not in fields]
+        if missing_fields or not fields or fields[-1] != "file":
+            self._respond(HTTPStatus.BAD_REQUEST, f"Invalid form fields {fields}")
+            return
+        if not tail.endswith(b"--" + boundary + b"--\r\n"):
+            self._respond(HTTPStatus.BAD_REQUEST, "Incomplete multipart body")
+            return
+        if fault:
+            self._respond(HTTPStatus(fault.status), "Injected fault", retry_after=fault.retry_after)
+            return
+
+        with self.server.lock:
+            self.server.uploads += 1
+            self.server.bytes_received += received
+        self._respond(HTTPStatus.NO_CONTENT)
+
+    def _read_body(self) -> Iterator[bytes]:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return
+                while size > 0:
+                    chunk = self.rfile.read(min(size, READ_CHUNK_SIZE))
+                    size -= len(chunk)
+                    yield chunk
+                self.rfile.readline()
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, READ_CHUNK_SIZE))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+    def _respond(self, status: HTTPStatus, message: Optional[str] = None, retry_after: Optional[str] = None):
+        body = f"<Error><Message>{message}</Message></Error>".encode() if message else b""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class LocalS3Server(ThreadingHTTPServer):
+    """
+    A local stand-in for the S3 bucket behind the presigned upload urls, served from a background thread. The given
+    faults are injected, in order, in place of the answers to the first uploads. Like S3, the server can refuse the
+    uploads sent without a Content-Length header.
+    """
+    daemon_threads = True
+
+    def __init__(self, faults: Optional[list[Fault]] = None, require_content_length: bool = False):
+        super().__init__(("127.0.0.1", 0), PresignedPostHandler)
+        self.require_content_length = require_content_length
+        self.lock = threading.Lock()
+        self.uploads = 0
+        self.attempts = 0
+        self.bytes_received = 0
+        self.faults = list(faults or [])
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def next_fault(self) -> Optional[Fault]:
+        with self.lock:
+            self.attempts += 1
+            return self.faults.pop(0) if self.faults else None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def get_upload_credentials(self) -> S3UploadFileCredentials:
+        return S3UploadFileCredentials(url=self.url, key="builds/app_with_dependencies.zip", policy="policy",
+                                       x_amz_algorithm="AWS4-HMAC-SHA256", x_amz_credential="credential",
+                                       x_amz_date="20240101T000000Z", x_amz_security_token="token",
+                                       x_amz_signature="signature",
+                                       s3_build_url=f"{self.url}/builds/app_with_dependencies.zip")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
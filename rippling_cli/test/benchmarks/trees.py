@@ -0,0 +1,111 @@
+import os
+import random
+from dataclasses import dataclass
+
+SOURCE_LINE = "def handler_{index}(event, context):\n    return {{'status': {status}, 'items': {items}}}\n\n"
+BINARY_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+@dataclass
+class Scale:
+    """
+    The shape of a synthetic app and of its dependency tree.
+    """
+    name: str
+    app_files: int
+    dependency_files: int
+    requirements: int
+    max_file_size: int = 16 * 1024
+    large_binaries: int = 0
+    large_binary_size: int = 0
+
+
+SCALES = {
+    "small": Scale(name="small", app_files=20, dependency_files=80, requirements=10),
+    "medium": Scale(name="medium", app_files=500, dependency_files=9500, requirements=100),
+    "large": Scale(name="large", app_files=200, dependency_files=2000, requirements=100, large_binaries=2,
+                   large_binary_size=1024 ** 3),
+}
+
+
+def write_source_file(path: str, size: int, rng: random.Random):
+    """
+    Write a compressible python-like source file of roughly the given size.
+    :param path:
+    :param size:
+    :param rng:
+    :return:
+    """
+    lines = []
+    written = 0
+    while written < size:
+        line = SOURCE_LINE.format(index=rng.randrange(10 ** 6), status=rng.choice([200, 400, 404]),
+                                  items=rng.sample(range(1000), 5))
+        lines.append(line)
+        written += len(line)
+    with open(path, "w") as f:
+        f.write("".join(lines))
+
+
+def write_binary_file(path: str, size: int):
+    """
+    Write an incompressible binary file, in chunks so that multi-GB files do not need multi-GB of memory.
+    :param path:
+    :param size:
+    :return:
+    """
+    with open(path, "wb") as f:
+        while size > 0:
+            chunk_size = min(size, BINARY_CHUNK_SIZE)
+            f.write(os.urandom(chunk_size))
+            size -= chunk_size
+
+
+def generate_app_tree(root: str, scale: Scale, seed: int = 0):
+    """
+    Generate the app folder: python modules spread over nested packages, ten modules per package.
+    :param root:
+    :param scale:
+    :param seed:
+    :return:
+    """
+    rng = random.Random(seed)
+    for index in range(scale.app_files):
+        package_dir = os.path.join(root, *[f"package_{part}" for part in str(index // 10)])
+        os.makedirs(package_dir, exist_ok=True)
+        write_source_file(os.path.join(package_dir, f"module_{index}.py"), rng.randint(256, scale.max_file_size),
+                          rng)
+
+
+def generate_dependency_tree(root: str, scale: Scale, seed: int = 1):
+    """
+    Generate a dependency tree as pip installs it: one package directory and one dist-info directory per
+    requirement, with the files spread over the packages and the large binaries in the first package.
+    :param root:
+    :param scale:
+    :param seed:
+    :return:
+    """
+    rng = random.Random(seed)
+    package_dirs = []
+    for index in range(scale.requirements):
+        package_dir = os.path.join(root, f"synthetic_dependency_{index}")
+        dist_info_dir = os.path.join(root, f"synthetic_dependency_{index}-1.0.0.dist-info")
+        os.makedirs(package_dir, exist_ok=True)
+        os.makedirs(dist_info_dir, exist_ok=True)
+        with open(os.path.join(dist_info_dir, "METADATA"), "w") as f:
+            f.write(f"Metadata-Version: 2.1\nName: synthetic-dependency-{index}\nVersion: 1.0.0\n")
+        package_dirs.append(package_dir)
+
+    for index in range(scale.dependency_files):
+        package_dir = os.path.join(package_dirs[index % len(package_dirs)], f"sub_{index // 100}")
+        os.makedirs(package_dir, exist_ok=True)
+        write_source_file(os.path.join(package_dir, f"module_{index}.py"), rng.randint(256, scale.max_file_size),
+                          rng)
+
+    for index in range(scale.large_binaries):
+        write_binary_file(os.path.join(package_dirs[0], f"_native_{index}.so"), scale.large_binary_size)
+
+
+def get_requirement_lines(scale: Scale) -> list[str]:
+    return [f"synthetic-dependency-{index}==1.0.0" for index in range(scale.requirements)]
@@ -0,0 +1,168 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.adapters import HTTPAdapter  # type: ignore
+
+from rippling_cli.core import api_client
+from rippling_cli.core.api_client import APIClient, ConnectionPool, read_ahead
+from rippling_cli.core.response_cache import response_cache
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """
+    Answer with the headers of the request, setting a cookie on every answer.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"cookie": self.headers.get("Cookie"), "connection": self.headers.get("Connection")}).encode()
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=abc; Path=/")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def echo_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+    pool = ConnectionPool(timeout=(2, 30))
+    monkeypatch.setattr(api_client, "connection_pool", pool)
+    yield pool
+    pool.close()
+
+
+def counting(produced: list, count=None):
+    for index in itertools.count() if count is None else range(count):
+        produced.append(index)
+        yield index
+
+
+def wait_until_idle(produced: list, timeout: float = 5) -> int:
+    """
+    Wait until the producer stopped producing, returning the number of items it produced.
+    """
+    deadline = time.monotonic() + timeout
+    count = -1
+    while len(produced) != count and time.monotonic() < deadline:
+        count = len(produced)
+        time.sleep(0.2)
+    return count
+
+
+class TestReadAhead:
+
+    def test_items_are_produced_in_order(self):
+        assert list(read_ahead(iter(range(100)), depth=3)) == list(range(100))
+        assert list(read_ahead(iter(range(5)), depth=0)) == list(range(5))
+
+    def test_producer_error_is_raised_to_the_consumer(self):
+        def failing():
+            yield 1
+            yield 2
+            raise ValueError("page 3 failed")
+
+        consumed = []
+        with pytest.raises(ValueError, match="page 3 failed"):
+            for item in read_ahead(failing(), depth=5):
+                consumed.append(item)
+        assert consumed == [1, 2]
+
+    def test_depth_bounds_the_items_produced_ahead(self):
+        produced: list = []
+        items = read_ahead(counting(produced), depth=4)
+        assert next(items) == 0
+        # The buffered items and the one waiting for room in the buffer
+        assert wait_until_idle(produced) == 1 + 4 + 1
+        items.close()
+
+    def test_producer_stops_when_the_consumer_breaks(self):
+        produced: list = []
+        threads = threading.active_count()
+        for item in read_ahead(counting(produced), depth=2):
+            if item == 10:
+                break
+        assert wait_until_idle(produced) <= 11 + 2 + 1
+        deadline = time.monotonic() + 5
+        while threading.active_count() > threads and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert threading.active_count() <= threads
+
+    def test_depth_zero_produces_on_demand(self):
+        produced: list = []
+        items = read_ahead(counting(produced), depth=0)
+        assert next(items) == 0
+        assert produced == [0]
+
+
+class TestPrefetch:
+
+    @pytest.fixture
+    def depths(self, monkeypatch):
+        depths = []
+
+        def record_depth(items, depth):
+            depths.append(depth)
+            return iter([])
+
+        monkeypatch.setattr(api_client, "read_ahead", record_depth)
+        return depths
+
+    def test_pages_are_read_ahead_by_page(self, depths):
+        APIClient("http://api").find_paginated("/apps/api/apps", page_size=50, prefetch=2)
+        assert depths == [2]
+
+    def test_items_are_read_ahead_by_item(self, depths):
+        APIClient("http://api").find_paginated_items("/apps/api/apps", page_size=50, prefetch=2)
+        assert depths == [100]
+
+
+class TestConnectionPool:
+
+    def test_one_session_per_origin_is_reused(self, pool):
+        session = pool.get_session("https://api.rippling.com/apps/api/apps")
+        assert pool.get_session("https://api.rippling.com/apps/api/app_builds?page=2") is session
+        assert pool.get_session("http://api.rippling.com/apps/api/apps") is not session
+        assert pool.get_session("https://api.rippling.com:8443/apps/api/apps") is not session
+        assert len(pool.sessions) == 3
+
+    def test_cookies_are_not_kept(self, pool, echo_server):
+        client = APIClient(echo_server)
+        assert client.get("/first").json()["cookie"] is None
+        assert client.get("/second").json()["cookie"] is None
+        assert not pool.get_session(echo_server).cookies
+
+    @pytest.mark.parametrize("keep_alive, connection", [(True, "keep-alive"), (False, "close")])
+    def test_connections_are_closed_without_keep_alive(self, monkeypatch, echo_server, keep_alive, connection):
+        monkeypatch.setattr(response_cache, "enabled", False)
+        pool = ConnectionPool(keep_alive=keep_alive)
+        monkeypatch.setattr(api_client, "connection_pool", pool)
+        assert APIClient(echo_server).get("/apps").json()["connection"] == connection
+        pool.close()
+
+    def test_default_timeout_is_applied(self, pool, echo_server, monkeypatch):
+        timeouts = []
+        send = HTTPAdapter.send
+        monkeypatch.setattr(HTTPAdapter, "send", lambda adapter, request, **kwargs: (
+            timeouts.append(kwargs["timeout"]) or send(adapter, request, **kwargs)))
+        APIClient(echo_server).get("/apps")
+        APIClient(echo_server, timeout=5).get("/apps")
+        assert timeouts == [(2, 30), 5]
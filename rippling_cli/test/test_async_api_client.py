@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rippling_cli.core.async_api_client import AsyncAPIClient, gather_bounded, map_bounded, run_concurrently
+from rippling_cli.core.response_cache import response_cache
+from rippling_cli.test.test_request_scheduler import FaultInjectingServer
+
+
+class TestRunConcurrently:
+
+    def test_results_keep_the_order_of_the_calls(self):
+        assert run_concurrently(lambda: time.sleep(0.05) or "slow", lambda: "fast") == ["slow", "fast"]
+        assert run_concurrently() == []
+
+    def test_calls_run_at_the_same_time(self):
+        # The barrier only lets the calls through once the three of them wait on it
+        barrier = threading.Barrier(3, timeout=5)
+        assert sorted(run_concurrently(barrier.wait, barrier.wait, barrier.wait)) == [0, 1, 2]
+
+    def test_calls_in_flight_are_limited(self):
+        in_flight, peak, lock = 0, 0, threading.Lock()
+
+        def call():
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+
+        run_concurrently(*[call] * 6, limit=2)
+        assert peak == 2
+
+    def test_first_error_is_raised_after_the_other_calls(self):
+        finished = []
+
+        def fail():
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError, match="failed"):
+            run_concurrently(fail, lambda: time.sleep(0.05) or finished.append(True))
+        assert finished == [True]
+
+
+class TestGatherBounded:
+
+    def test_awaitables_in_flight_are_limited(self):
+        in_flight, peak = 0, 0
+
+        async def call(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return item * 2
+
+        assert asyncio.run(map_bounded(call, range(6), limit=2)) == [0, 2, 4, 6, 8, 10]
+        assert peak == 2
+
+
+class TestAsyncAPIClient:
+
+    @pytest.fixture(autouse=True)
+    def no_response_cache(self, monkeypatch):
+        monkeypatch.setattr(response_cache, "enabled", False)
+
+    def test_requests_share_the_client_surface(self):
+        async def run(url):
+            api_client = AsyncAPIClient(url)
+            responses = await gather_bounded(api_client.get("/items"), api_client.post("/items", json={}))
+            pages = [page async for page in api_client.find_paginated("/things")]
+            return [response.json() for response in responses], pages
+
+        with FaultInjectingServer() as server:
+            responses, pages = asyncio.run(run(server.url))
+        assert responses == [{"data": [1, 2], "cursor": None}] * 2
+        assert pages == [[1, 2]]
+        assert server.attempts == 3
@@ -0,0 +1,15 @@
+import os
+
+from rippling_cli.test.benchmarks.runner import BENCHMARKS, find_regressions, load_baselines, run_benchmarks
+from rippling_cli.test.benchmarks.trees import SCALES
+
+
+class TestBenchmarks:
+
+    def test_small_scale(self, tmp_path):
+        results = run_benchmarks(SCALES["small"], str(tmp_path), repeat=1)
+        assert set(results["benchmarks"]) == set(BENCHMARKS)
+        assert all(result["bytes"] > 0 for result in results["benchmarks"].values())
+        # Timings depend on the machine, so they are only compared on the machines the baselines come from
+        if os.environ.get("RIPPLING_BENCHMARK_CHECK"):
+            assert not find_regressions(results, load_baselines())
@@ -0,0 +1,118 @@
+import os
+import time
+from http import HTTPStatus
+
+from rippling_cli.config import config
+from rippling_cli.core.ignore_rules import IgnoreRules
+from rippling_cli.test.benchmarks.runner import benchmark_environment, prepare_project, seed_dependency_cache
+from rippling_cli.test.benchmarks.s3_server import Fault, LocalS3Server
+from rippling_cli.test.benchmarks.trees import SCALES
+from rippling_cli.utils import build_utils
+from rippling_cli.utils.build_utils import package_and_upload_app_with_dependencies, package_and_validate_bundle
+from rippling_cli.utils.cache_utils import (
+    compute_bundle_key,
+    get_bundle_cache,
+    get_bundle_owner,
+    get_reusable_s3_build_url,
+    get_wheelhouse_dir,
+    prune_wheelhouse,
+    touch_installed_wheels,
+)
+
+
+class TestBundleCache:
+
+    def test_failed_upload_is_not_cached(self, tmp_path):
+        project_dir = str(tmp_path / "project")
+        os.makedirs(project_dir)
+        prepare_project(project_dir, SCALES["small"])
+        with benchmark_environment(project_dir), LocalS3Server([Fault(status=HTTPStatus.FORBIDDEN)]) as server:
+            seed_dependency_cache(SCALES["small"])
+            credentials = server.get_upload_credentials()
+            assert package_and_upload_app_with_dependencies(credentials, "bundle") is None
+            assert get_bundle_cache().get("bundle") is None
+            assert package_and_upload_app_with_dependencies(credentials, "bundle")
+            assert get_bundle_cache().get("bundle") is not None
+
+    def test_rejected_stream_upload_falls_back_to_the_sized_upload(self, tmp_path):
+        project_dir = str(tmp_path / "project")
+        os.makedirs(project_dir)
+        prepare_project(project_dir, SCALES["small"])
+        with benchmark_environment(project_dir), LocalS3Server(require_content_length=True) as server:
+            seed_dependency_cache(SCALES["small"])
+            credentials = server.get_upload_credentials()
+            assert package_and_upload_app_with_dependencies(credentials, "bundle", stream_upload=True)
+            assert server.attempts == 2
+            assert server.uploads == 1
+            assert get_bundle_cache().get("bundle") is not None
+
+    def test_s3_build_url_is_reused_for_the_same_app_and_company(self):
+        owner = get_bundle_owner("app", "company", "token")
+        metadata = {"s3_build_url": "https://s3/builds/bundle.zip", "uploaded_at": time.time(), "owner": owner}
+        assert get_reusable_s3_build_url(metadata, owner) == "https://s3/builds/bundle.zip"
+        assert get_reusable_s3_build_url(metadata, get_bundle_owner("other app", "company", "token")) is None
+        assert get_reusable_s3_build_url(metadata, get_bundle_owner("app", "other company", "token")) is None
+        # Without a known company, the url only belongs to the token it was uploaded with
+        assert get_bundle_owner("app", None, "token") != get_bundle_owner("app", None, "other token")
+        assert get_reusable_s3_build_url({**metadata, "owner": None}, owner) is None
+
+    def test_bundle_key_depends_on_the_interpreter(self, tmp_path, monkeypatch):
+        (tmp_path / "main.py").write_text("x = 1\n")
+        keys = []
+        for interpreter in ["3.11.7 cpython-311 linux-x86_64", "3.12.1 cpython-312 linux-x86_64"]:
+            monkeypatch.setattr("rippling_cli.utils.cache_utils.get_project_interpreter", lambda: interpreter)
+            keys.append(compute_bundle_key(str(tmp_path), ["flask==3.0.0"], 6, IgnoreRules()))
+        assert keys[0] != keys[1]
+
+    def test_unlocked_requirements_are_not_cached(self, monkeypatch):
+        bundle_keys = []
+        monkeypatch.setattr(build_utils, "get_app_requirements", lambda: (["flask>=2.0"], False))
+        monkeypatch.setattr(build_utils, "get_role_and_company_id", lambda oauth_token: ("role", "company"))
+        monkeypatch.setattr(build_utils, "upload_bundle", lambda bundle_key, *args: bundle_keys.append(bundle_key))
+        assert package_and_validate_bundle("token") == (None, None)
+        assert bundle_keys == [None]
+
+    def test_validated_bundle_is_not_validated_again(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "global_config_dir", tmp_path)
+        monkeypatch.setattr(build_utils, "get_app_requirements", lambda: (["flask==3.0.0"], True))
+        monkeypatch.setattr(build_utils, "compute_bundle_key", lambda *args: "bundle")
+        monkeypatch.setattr(build_utils, "get_role_and_company_id", lambda oauth_token: ("role", "company"))
+        monkeypatch.setattr(build_utils, "get_app_config", lambda: {"name": "app"})
+        digests = iter(["digest a", "digest a", "digest b"])
+
+        def upload_bundle(bundle_key, *args):
+            # An upload of the same digest reuses the previous url, another digest is uploaded again
+            bundle_cache = get_bundle_cache()
+            digest = next(digests)
+            metadata = bundle_cache.read_metadata(bundle_key)
+            if metadata.get("digest") != digest:
+                bundle_cache.commit(bundle_key, bundle_cache.create(bundle_key))
+                bundle_cache.write_metadata(bundle_key, {"s3_build_url": f"https://s3/{digest}", "digest": digest})
+            return f"https://s3/{digest}"
+
+        validated_urls = []
+        monkeypatch.setattr(build_utils, "upload_bundle", upload_bundle)
+        monkeypatch.setattr(build_utils, "validate_bundle", lambda app_name, s3_build_url, oauth_token: (
+            validated_urls.append(s3_build_url) or (True, "build 1", None)))
+        for _ in range(3):
+            assert package_and_validate_bundle("token")[0] == "build 1"
+        assert validated_urls == ["https://s3/digest a", "https://s3/digest b"]
+
+
+class TestWheelhouse:
+
+    def test_installed_wheels_are_kept_by_pruning(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "global_config_dir", tmp_path / "config")
+        wheelhouse_dir = get_wheelhouse_dir()
+        for index, wheel_name in enumerate(["Flask-3.0.0-py3-none-any.whl", "requests-2.31.0-py3-none-any.whl",
+                                            "zope.interface-6.0-cp311-cp311-linux_x86_64.whl"]):
+            (wheelhouse_dir / wheel_name).write_bytes(b"0" * 100)
+            os.utime(wheelhouse_dir / wheel_name, (0, 1000 + index))
+        site_dir = tmp_path / "site"
+        (site_dir / "flask-3.0.0.dist-info").mkdir(parents=True)
+        (site_dir / "zope_interface-6.0.dist-info").mkdir()
+
+        touch_installed_wheels(str(site_dir))
+        prune_wheelhouse(max_bytes=200)
+        assert sorted(wheel.name for wheel in wheelhouse_dir.iterdir()) == [
+            "Flask-3.0.0-py3-none-any.whl", "zope.interface-6.0-cp311-cp311-linux_x86_64.whl"]
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from rippling_cli.core.chunk_pipe import ChunkPipe
+from rippling_cli.exceptions.build_exceptions import PipeAborted
+from rippling_cli.utils.build_utils import write_bundle_to_pipe
+
+
+def start_producer(pipe: ChunkPipe, data: bytes, error=None):
+    outcome = {}
+
+    def produce():
+        try:
+            pipe.write(data)
+        except PipeAborted as e:
+            outcome["error"] = e
+            return
+        pipe.close(error=error)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    return producer, outcome
+
+
+class TestChunkPipe:
+
+    def test_writes_are_coalesced_into_chunks(self):
+        pipe = ChunkPipe(chunk_size=4, max_chunks=2)
+        producer, _ = start_producer(pipe, b"0123456789")
+        assert list(pipe) == [b"0123", b"4567", b"89"]
+        producer.join()
+
+    def test_producer_error_is_raised_to_the_consumer(self):
+        pipe = ChunkPipe(chunk_size=4, max_chunks=2)
+        producer, _ = start_producer(pipe, b"0123456", error=OSError("disk failure"))
+        chunks = []
+        with pytest.raises(OSError, match="disk failure"):
+            for chunk in pipe:
+                chunks.append(chunk)
+        # The data left in the buffer is not sent after a failure
+        assert chunks == [b"0123"]
+        producer.join()
+
+    def test_abort_releases_a_blocked_producer(self):
+        pipe = ChunkPipe(chunk_size=4, max_chunks=1)
+        producer, outcome = start_producer(pipe, b"x" * 1000)
+        assert next(iter(pipe)) == b"xxxx"
+        pipe.abort()
+        producer.join(timeout=5)
+        assert not producer.is_alive()
+        assert isinstance(outcome["error"], PipeAborted)
+
+    def test_failed_packaging_ends_the_upload(self):
+        class FailingPackager:
+            size = 0
+
+            def write(self, f):
+                f.write(b"PK")
+                raise ValueError("unreadable file")
+
+        pipe = ChunkPipe(chunk_size=4, max_chunks=1)
+        producer = threading.Thread(target=write_bundle_to_pipe, args=(FailingPackager(), pipe), daemon=True)
+        producer.start()
+        with pytest.raises(ValueError, match="unreadable file"):
+            list(pipe)
+        producer.join()
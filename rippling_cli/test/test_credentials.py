@@ -0,0 +1,167 @@
+import time
+
+import click
+import pytest
+
+from rippling_cli.config import config
+from rippling_cli.config.config import get_oauth_token_data, save_oauth_token
+from rippling_cli.constants import ACCESS_TOKEN_ENV_VAR, ACCOUNT_CACHE_TTL, REFRESH_TOKEN_ENV_VAR
+from rippling_cli.core.credential_store import CredentialStore
+from rippling_cli.core.oauth_token import OAuthToken
+from rippling_cli.core.rippling_context import RipplingContext
+from rippling_cli.exceptions.login_exceptions import InteractiveLoginRequired
+from rippling_cli.utils import login_utils
+from rippling_cli.utils.login_utils import cache_account_data, ensure_logged_in, get_cached_account_data
+
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "global_config_dir", tmp_path)
+    monkeypatch.setattr(login_utils, "account_entries", {})
+
+
+@pytest.fixture
+def token_server(monkeypatch):
+    """
+    Answer the token requests without the API: the refresh fails unless a new access token is set, and the browser
+    login gives "browser token".
+    """
+    class TokenServer:
+        refreshed_token = None
+        refresh_tokens = []
+        browser_logins = 0
+
+    def refresh_access_token(oauth_token, refresh_token):
+        TokenServer.refresh_tokens.append(refresh_token)
+        if TokenServer.refreshed_token is None:
+            raise Exception("Failed to refresh the access token: invalid_grant")
+        oauth_token.expires_in, oauth_token.refresh_token = 3600, "rotated refresh token"
+        return TokenServer.refreshed_token
+
+    def start_authorization_flow(oauth_token):
+        TokenServer.browser_logins += 1
+        oauth_token.authorization_code = ["code"]
+        return oauth_token.authorization_code
+
+    monkeypatch.setattr(OAuthToken, "refresh_access_token", refresh_access_token)
+    monkeypatch.setattr(OAuthToken, "start_authorization_flow", start_authorization_flow)
+    monkeypatch.setattr(OAuthToken, "exchange_for_token", lambda oauth_token, code_verifier: "browser token")
+    return TokenServer
+
+
+def invoke_ensure_logged_in(credentials: CredentialStore, interactive_login: bool = True):
+    obj = RipplingContext(credentials, interactive_login=interactive_login)
+    obj.oauth_credentials = "client id"
+    with click.Context(click.Command("test"), obj=obj) as ctx:
+        ensure_logged_in(ctx)
+
+
+def save_expired_token():
+    save_oauth_token("expired token", expires_in=-10, refresh_token="refresh token")
+
+
+class TestCredentialStore:
+
+    def test_token_file_is_read_once(self, monkeypatch):
+        save_oauth_token("saved token", expires_in=3600)
+        reads = []
+        monkeypatch.setattr("rippling_cli.core.credential_store.get_oauth_token_data",
+                            lambda: reads.append(1) or get_oauth_token_data())
+        credentials = CredentialStore(environ={})
+        assert credentials.get_token() == "saved token"
+        assert not credentials.is_expired()
+        assert credentials.get_token() == "saved token"
+        assert len(reads) == 1
+
+    def test_login_and_logout_keep_the_token_file_in_sync(self):
+        credentials = CredentialStore(environ={})
+        assert credentials.get_token() is None
+        credentials.save("new token", 3600, "refresh token")
+        assert credentials.get_token() == "new token"
+        assert get_oauth_token_data()["refresh_token"] == "refresh token"
+        credentials.clear()
+        assert credentials.get_token() is None
+        assert get_oauth_token_data() is None
+
+
+class TestEnsureLoggedIn:
+
+    def test_expired_token_is_refreshed(self, token_server):
+        save_expired_token()
+        token_server.refreshed_token = "refreshed token"
+        credentials = CredentialStore(environ={})
+        invoke_ensure_logged_in(credentials)
+        assert credentials.get_token() == "refreshed token"
+        assert get_oauth_token_data()["refresh_token"] == "rotated refresh token"
+        assert token_server.browser_logins == 0
+
+    def test_valid_token_is_not_refreshed(self, token_server):
+        save_oauth_token("valid token", expires_in=3600, refresh_token="refresh token")
+        invoke_ensure_logged_in(CredentialStore(environ={}))
+        assert token_server.refresh_tokens == []
+
+    def test_failed_refresh_falls_back_to_the_browser_login(self, token_server):
+        save_expired_token()
+        credentials = CredentialStore(environ={})
+        invoke_ensure_logged_in(credentials)
+        assert token_server.refresh_tokens == ["refresh token"]
+        assert token_server.browser_logins == 1
+        assert credentials.get_token() == "browser token"
+        assert get_oauth_token_data()["token"] == "browser token"
+
+    def test_failed_refresh_without_the_browser_login(self, token_server):
+        save_expired_token()
+        with pytest.raises(InteractiveLoginRequired):
+            invoke_ensure_logged_in(CredentialStore(environ={}), interactive_login=False)
+        assert token_server.browser_logins == 0
+
+
+class TestHeadlessMode:
+
+    def test_access_token_comes_from_the_environment(self, token_server):
+        save_oauth_token("saved token", expires_in=3600)
+        credentials = CredentialStore(environ={ACCESS_TOKEN_ENV_VAR: "environment token"})
+        invoke_ensure_logged_in(credentials)
+        assert credentials.get_token() == "environment token"
+        assert token_server.refresh_tokens == []
+
+    def test_failed_refresh_never_opens_the_browser(self, token_server, monkeypatch):
+        monkeypatch.setattr(click, "launch", lambda url: pytest.fail(f"The browser was opened on {url}"))
+        credentials = CredentialStore(environ={REFRESH_TOKEN_ENV_VAR: "environment refresh token"})
+        with pytest.raises(click.ClickException, match=REFRESH_TOKEN_ENV_VAR):
+            invoke_ensure_logged_in(credentials)
+        assert token_server.browser_logins == 0
+        assert token_server.refresh_tokens == ["environment refresh token"]
+
+    def test_refreshed_token_is_not_saved(self, token_server):
+        token_server.refreshed_token = "refreshed token"
+        credentials = CredentialStore(environ={REFRESH_TOKEN_ENV_VAR: "environment refresh token"})
+        invoke_ensure_logged_in(credentials)
+        assert credentials.get_token() == "refreshed token"
+        assert get_oauth_token_data() is None
+
+
+class TestAccountCache:
+
+    def test_entries_belong_to_their_token(self, monkeypatch):
+        cache_account_data("token a", "account_info", {"id": "a"})
+        assert get_cached_account_data("token a", "account_info") == {"id": "a"}
+        assert get_cached_account_data("token b", "account_info") is None
+
+        # Read again from the account cache file, without the entries of this process
+        monkeypatch.setattr(login_utils, "account_entries", {})
+        assert get_cached_account_data("token a", "account_info") == {"id": "a"}
+        assert get_cached_account_data("token b", "account_info") is None
+
+    def test_entries_of_another_token_are_replaced(self, monkeypatch):
+        cache_account_data("token a", "account_info", {"id": "a"})
+        cache_account_data("token b", "account_info", {"id": "b"})
+        monkeypatch.setattr(login_utils, "account_entries", {})
+        assert get_cached_account_data("token a", "account_info") is None
+        assert get_cached_account_data("token b", "account_info") == {"id": "b"}
+
+    def test_expired_entries_are_ignored(self, monkeypatch):
+        cache_account_data("token a", "account_info", {"id": "a"})
+        now = time.time()
+        monkeypatch.setattr("rippling_cli.utils.login_utils.time.time", lambda: now + ACCOUNT_CACHE_TTL)
+        assert get_cached_account_data("token a", "account_info") is None
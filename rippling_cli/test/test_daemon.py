@@ -0,0 +1,151 @@
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import click
+import pytest
+
+from rippling_cli.core.daemon_client import connect_to_daemon, forward_command, request_daemon, send_message
+from rippling_cli.exceptions.login_exceptions import InteractiveLoginRequired
+
+
+@click.group()
+def commands():
+    pass
+
+
+@commands.command()
+@click.argument("name")
+def greet(name):
+    click.echo(f"Hello {name} from {os.getcwd()} with {os.environ.get('GREETING')}")
+    click.echo("and stderr", err=True)
+
+
+@commands.command()
+def ask():
+    click.echo("yes" if click.confirm("Continue?") else "no")
+
+
+@commands.command()
+def fail():
+    raise click.ClickException("failed")
+
+
+@commands.command()
+@click.argument("seconds", type=float)
+def wait(seconds):
+    time.sleep(seconds)
+    click.echo("waited")
+
+
+@commands.command()
+@click.option("--after_output", is_flag=True)
+def secure(after_output):
+    if after_output:
+        click.echo("working")
+    raise InteractiveLoginRequired()
+
+
+DAEMON_SCRIPT = """
+import sys
+from pathlib import Path
+from rippling_cli.core.daemon import DaemonServer
+from rippling_cli.test.test_daemon import commands
+DaemonServer(Path(sys.argv[1]), commands, idle_timeout=30).serve()
+"""
+
+CLIENT_SCRIPT = """
+import sys
+from pathlib import Path
+from rippling_cli.core.daemon_client import forward_command
+sys.exit(forward_command(Path(sys.argv[1]), sys.argv[2:]))
+"""
+
+
+def wait_for_status(socket_path, predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = request_daemon(socket_path, {"type": "status"})
+        if status and predicate(status):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("The daemon did not reach the expected status")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    # The daemon replaces the standard streams of its process, so it cannot share the process of the client
+    socket_path = tmp_path / "daemon.sock"
+    process = subprocess.Popen([sys.executable, "-c", DAEMON_SCRIPT, str(socket_path)])
+    deadline = time.monotonic() + 10
+    while request_daemon(socket_path, {"type": "status"}) is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield socket_path
+    request_daemon(socket_path, {"type": "stop"})
+    process.wait(10)
+
+
+class TestDaemon:
+
+    def test_command_runs_in_the_daemon(self, daemon, tmp_path, monkeypatch, capsys):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("GREETING", "hi")
+        assert forward_command(daemon, ["greet", "world"]) == 0
+        out, err = capsys.readouterr()
+        assert out == f"Hello world from {tmp_path} with hi\n"
+        assert err == "and stderr\n"
+
+    def test_exit_code_and_errors_are_forwarded(self, daemon, capsys):
+        assert forward_command(daemon, ["fail"]) == 1
+        assert "Error: failed" in capsys.readouterr().err
+        assert forward_command(daemon, ["missing"]) == 2
+        assert request_daemon(daemon, {"type": "status"})["commands_run"] == 2
+
+    def test_prompts_read_the_client_stdin(self, daemon, monkeypatch, capsys):
+        monkeypatch.setattr(sys, "stdin", io.StringIO("y\n"))
+        assert forward_command(daemon, ["ask"]) == 0
+        assert capsys.readouterr().out == "Continue? [y/N]: yes\n"
+
+    def test_command_runs_in_process_without_daemon(self, tmp_path, monkeypatch):
+        assert forward_command(tmp_path / "daemon.sock", ["greet", "world"]) is None
+        monkeypatch.setenv("RIPPLING_NO_DAEMON", "1")
+        assert forward_command(tmp_path / "daemon.sock", ["greet", "world"]) is None
+
+    def test_command_runs_in_process_while_daemon_is_busy(self, daemon, capsys):
+        thread = threading.Thread(target=forward_command, args=(daemon, ["wait", "1"]))
+        thread.start()
+        wait_for_status(daemon, lambda status: status["busy"])
+        assert forward_command(daemon, ["greet", "world"]) is None
+        thread.join()
+        assert capsys.readouterr().out == "waited\n"
+        assert forward_command(daemon, ["greet", "world"]) == 0
+
+    def test_client_disconnect_interrupts_the_command(self, daemon):
+        connection = connect_to_daemon(daemon)
+        send_message(connection, {"type": "run", "args": ["wait", "30"], "cwd": os.getcwd(), "env": dict(os.environ),
+                                  "executable": sys.executable, "package": request_daemon(daemon, {"type": "status"})
+                                  ["package"]})
+        wait_for_status(daemon, lambda status: status["busy"])
+        connection.close()
+        assert wait_for_status(daemon, lambda status: not status["busy"], timeout=5)["commands_run"] == 1
+
+    def test_interrupt_stops_the_command(self, daemon):
+        client = subprocess.Popen([sys.executable, "-c", CLIENT_SCRIPT, str(daemon), "wait", "30"],
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        wait_for_status(daemon, lambda status: status["busy"])
+        client.send_signal(signal.SIGINT)
+        _, err = client.communicate(timeout=5)
+        assert client.returncode == 1
+        assert "Aborted!" in err
+        assert not request_daemon(daemon, {"type": "status"})["busy"]
+
+    def test_browser_login_runs_in_process(self, daemon, capsys):
+        assert forward_command(daemon, ["secure"]) is None
+        assert forward_command(daemon, ["secure", "--after_output"]) == 1
+        out, err = capsys.readouterr()
+        assert out == "working\n"
+        assert "rippling login" in err
@@ -0,0 +1,104 @@
+import pytest
+
+from rippling_cli.exceptions.build_exceptions import LockFileNotUsable
+from rippling_cli.utils.build_utils import get_app_requirements
+from rippling_cli.utils.dependency_utils import get_locked_requirements
+
+PYPROJECT = """
+[tool.poetry.dependencies]
+python = "^3.10"
+requests = { version = "^2.31", extras = ["socks"] }
+numpy = "*"
+colorama = { version = "*", markers = "sys_platform == 'win32'" }
+"""
+
+LOCK = """
+[[package]]
+name = "requests"
+version = "2.31.0"
+files = [{ file = "requests-2.31.0-py3-none-any.whl", hash = "sha256:aaa" }]
+
+[package.dependencies]
+urllib3 = ">=1.21"
+PySocks = { version = ">=1.5.6", optional = true }
+charset-normalizer = { version = "*", optional = true }
+
+[package.extras]
+socks = ["PySocks (>=1.5.6,!=1.5.7)"]
+
+[[package]]
+name = "urllib3"
+version = "2.0.7"
+files = [{ file = "urllib3-2.0.7-py3-none-any.whl", hash = "sha256:bbb" }]
+
+[[package]]
+name = "pysocks"
+version = "1.7.1"
+files = [{ file = "PySocks-1.7.1-py3-none-any.whl", hash = "sha256:ccc" }]
+
+[[package]]
+name = "colorama"
+version = "0.4.6"
+files = [{ file = "colorama-0.4.6-py2.py3-none-any.whl", hash = "sha256:ddd" }]
+
+[[package]]
+name = "numpy"
+version = "1.24.4"
+markers = "python_version < \\"3.12\\""
+files = [{ file = "numpy-1.24.4.tar.gz", hash = "sha256:eee" }]
+
+[[package]]
+name = "numpy"
+version = "1.26.4"
+markers = "python_version >= \\"3.12\\""
+files = [{ file = "numpy-1.26.4.tar.gz", hash = "sha256:fff" }]
+
+[package.dependencies]
+urllib3 = { version = "*", markers = "sys_platform == 'linux'" }
+"""
+
+
+def write_project(directory, pyproject=PYPROJECT, lock=LOCK):
+    (directory / "pyproject.toml").write_text(pyproject)
+    if lock is not None:
+        (directory / "poetry.lock").write_text(lock)
+    return str(directory / "pyproject.toml"), str(directory / "poetry.lock")
+
+
+class TestLockedRequirements:
+
+    def test_dependencies_are_pinned_with_their_markers_and_hashes(self, tmp_path):
+        assert get_locked_requirements(*write_project(tmp_path)) == [
+            "colorama==0.4.6 ; sys_platform == 'win32' --hash=sha256:ddd",
+            'numpy==1.24.4 ; python_version < "3.12" --hash=sha256:eee',
+            'numpy==1.26.4 ; python_version >= "3.12" --hash=sha256:fff',
+            "pysocks==1.7.1 --hash=sha256:ccc",
+            "requests==2.31.0 --hash=sha256:aaa",
+            "urllib3==2.0.7 --hash=sha256:bbb",
+        ]
+
+    def test_duplicates_without_markers_are_refused(self, tmp_path):
+        lock = LOCK.replace('markers = "python_version < \\"3.12\\""\n', "")
+        with pytest.raises(LockFileNotUsable, match="several versions of numpy"):
+            get_locked_requirements(*write_project(tmp_path, lock=lock))
+
+    def test_lock_missing_a_dependency_is_refused(self, tmp_path):
+        pyproject = PYPROJECT + 'flask = "^3.0"\n'
+        with pytest.raises(LockFileNotUsable):
+            get_locked_requirements(*write_project(tmp_path, pyproject=pyproject))
+
+
+class TestAppRequirements:
+
+    def test_locked_requirements_are_used(self, tmp_path, monkeypatch):
+        write_project(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        requirements, locked = get_app_requirements()
+        assert locked
+        assert "requests==2.31.0 --hash=sha256:aaa" in requirements
+
+    @pytest.mark.parametrize("lock", [None, LOCK.replace('name = "urllib3"', 'name = "idna"')])
+    def test_pyproject_constraints_are_used_without_a_usable_lock(self, tmp_path, monkeypatch, lock):
+        write_project(tmp_path, lock=lock)
+        monkeypatch.chdir(tmp_path)
+        assert get_app_requirements() == (["requests==2.31", "numpy", "colorama"], False)
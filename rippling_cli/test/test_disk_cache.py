@@ -0,0 +1,61 @@
+import os
+import time
+
+from rippling_cli.core import disk_cache
+from rippling_cli.core.disk_cache import DiskCache
+
+
+def commit(cache: DiskCache, key: str, size: int):
+    staging_path = cache.create(key)
+    (staging_path / "data").write_bytes(b"x" * size)
+    return cache.commit(key, staging_path)
+
+
+def age_entries(cache: DiskCache):
+    # Make the order of the entries independent of the timestamp resolution of the file system
+    for index, entry in enumerate(reversed(cache.entries())):
+        os.utime(entry.path, (time.time() - 100 + index, time.time() - 100 + index))
+
+
+class TestDiskCache:
+
+    def test_least_recently_used_entries_are_evicted_above_max_bytes(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=2500)
+        for key in ["a", "b"]:
+            commit(cache, key, 1000)
+            age_entries(cache)
+        commit(cache, "c", 1000)
+        assert [entry.key for entry in cache.entries()] == ["c", "b"]
+
+    def test_least_recently_used_entries_are_evicted_above_max_entries(self, tmp_path):
+        cache = DiskCache(tmp_path, max_entries=2)
+        for key in ["a", "b", "c"]:
+            commit(cache, key, 10)
+            age_entries(cache)
+        assert sorted(entry.key for entry in cache.entries()) == ["b", "c"]
+
+    def test_commit_under_the_limits_does_not_size_the_other_entries(self, tmp_path, monkeypatch):
+        cache = DiskCache(tmp_path, max_bytes=10_000)
+        commit(cache, "a", 1000)
+        commit(cache, "b", 1000)
+        sized = []
+        get_directory_size = disk_cache.get_directory_size
+        monkeypatch.setattr(disk_cache, "get_directory_size", lambda path: sized.append(path.name) or
+                            get_directory_size(path))
+        commit(cache, "c", 1000)
+        assert sized == ["c"]
+        assert cache.size() >= 3000
+
+    def test_replaced_and_resized_entries_keep_the_totals_right(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=2500)
+        commit(cache, "a", 1000)
+        commit(cache, "a", 1000)
+        commit(cache, "b", 1000)
+        assert sorted(entry.key for entry in cache.entries()) == ["a", "b"]
+
+        # Files added after the commit count once the entry is resized
+        (cache.entry_path("a") / "layer").write_bytes(b"x" * 1000)
+        cache.resize("a")
+        age_entries(cache)
+        commit(cache, "c", 100)
+        assert len(cache.entries()) == 2
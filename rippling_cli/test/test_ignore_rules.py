@@ -0,0 +1,85 @@
+import os
+
+from rippling_cli.core.ignore_rules import APP_IGNORE_PATTERNS, DEFAULT_IGNORE_PATTERNS, IgnoreRules
+
+APP_DEFAULTS = DEFAULT_IGNORE_PATTERNS + APP_IGNORE_PATTERNS
+
+
+def walk(directory, rules: IgnoreRules) -> list[str]:
+    return [bundle_path for _, bundle_path in rules.walk(str(directory))]
+
+
+class TestIgnoreRules:
+
+    def test_negated_pattern_re_includes_a_file(self):
+        rules = IgnoreRules(["*.log", "!keep.log"])
+        assert rules.is_ignored("app/debug.log")
+        assert not rules.is_ignored("app/keep.log")
+        # The last matching rule decides
+        assert IgnoreRules(["!keep.log", "*.log"]).is_ignored("keep.log")
+
+    def test_pattern_with_a_slash_is_anchored_to_the_root(self):
+        rules = IgnoreRules(["/build", "config/local.py", "cache"])
+        assert rules.is_ignored("build")
+        assert not rules.is_ignored("app/build")
+        assert rules.is_ignored("config/local.py")
+        assert not rules.is_ignored("app/config/local.py")
+        assert rules.is_ignored("app/cache")
+
+    def test_double_star_matches_any_number_of_directories(self):
+        rules = IgnoreRules(["**/fixtures/*.json", "assets/**"])
+        assert rules.is_ignored("fixtures/a.json")
+        assert rules.is_ignored("app/tests/fixtures/a.json")
+        assert not rules.is_ignored("app/fixtures/sub/a.json")
+        assert rules.is_ignored("assets/images/logo.png")
+        assert not rules.is_ignored("app/assets/logo.png")
+
+    def test_directory_pattern_only_matches_directories(self):
+        rules = IgnoreRules(["logs/"])
+        assert rules.is_ignored("app/logs", is_dir=True)
+        assert not rules.is_ignored("app/logs")
+
+    def test_comments_blank_lines_and_escapes(self):
+        rules = IgnoreRules(["# comment", "", "\\#notes.txt", "\\!important.txt"])
+        assert rules.patterns == ["\\#notes.txt", "\\!important.txt"]
+        assert rules.is_ignored("#notes.txt")
+        assert rules.is_ignored("!important.txt")
+        assert not rules.is_ignored("comment")
+
+    def test_default_excludes_can_be_re_included(self, tmp_path):
+        ignore_file = tmp_path / ".ripplingignore"
+        defaults = IgnoreRules.from_file(str(ignore_file))
+        assert defaults.is_ignored("app/__pycache__", is_dir=True)
+        assert defaults.is_ignored("app/main.pyc")
+        assert defaults.is_ignored("requests-2.31.0.dist-info/RECORD")
+        assert not defaults.is_ignored("requests-2.31.0.dist-info/METADATA")
+        assert defaults.is_ignored("bin", is_dir=True)
+        assert not defaults.is_ignored("app/bin", is_dir=True)
+        # The development files are only left out of the app
+        assert not defaults.is_ignored("botocore/docs", is_dir=True)
+        app_defaults = IgnoreRules.from_file(str(ignore_file), APP_DEFAULTS)
+        assert app_defaults.is_ignored("app/docs", is_dir=True)
+        assert app_defaults.is_ignored("app/api/tests", is_dir=True)
+        assert not app_defaults.is_ignored("botocore/docs", is_dir=True)
+        assert not app_defaults.is_ignored("pkg/app/tests", is_dir=True)
+
+        ignore_file.write_text("!docs/\n*.md\n")
+        rules = IgnoreRules.from_file(str(ignore_file), APP_DEFAULTS)
+        assert not rules.is_ignored("app/docs", is_dir=True)
+        assert rules.is_ignored("README.md")
+
+
+class TestWalk:
+
+    def test_ignored_directories_are_pruned(self, tmp_path):
+        for path in ["app/main.py", "app/main.pyc", "app/__pycache__/main.cpython-311.pyc", "app/tests/test_main.py",
+                     "app/data/keep.txt", "app/data/skip.txt", "bin/script", "lib/bin/tool"]:
+            os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+            (tmp_path / path).write_text(path)
+        ignore_file = tmp_path / ".ripplingignore"
+        ignore_file.write_text(".ripplingignore\napp/data/*\n!app/data/keep.txt\n!app/tests/test_main.py\n")
+
+        # A file inside an ignored directory cannot be re-included. The files of a directory come before its
+        # subdirectories.
+        assert walk(tmp_path, IgnoreRules.from_file(str(ignore_file), APP_DEFAULTS)) == [
+            "app/main.py", "app/data/keep.txt", "lib/bin/tool"]
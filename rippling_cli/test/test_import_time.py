@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+
+# Modules only some commands need, which must not be imported to start the CLI
+HEAVY_MODULES = ("requests", "urllib3", "http.server", "pkce", "zipfile", "rippling_cli.cli.commands")
+# Generous, so that only a heavy import going back to the startup path fails on a slow machine
+IMPORT_TIME_BUDGET = 1.0
+
+LOADED_MODULES_SCRIPT = """
+import json, sys, time
+before = set(sys.modules)
+started_at = time.perf_counter()
+{statement}
+print(json.dumps({{"modules": sorted(set(sys.modules) - before), "seconds": time.perf_counter() - started_at}}))
+"""
+
+
+def get_loaded_modules(statement: str, tmp_path) -> dict:
+    script = LOADED_MODULES_SCRIPT.format(statement=statement)
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True,
+                            env={"HOME": str(tmp_path), "PATH": ""}).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def get_heavy_modules(modules: list[str]) -> list[str]:
+    return [module for module in modules if any(module == heavy or module.startswith(heavy + ".")
+                                                for heavy in HEAVY_MODULES)]
+
+
+class TestImportTime:
+
+    def test_import_is_light(self, tmp_path):
+        loaded = get_loaded_modules("import rippling_cli.cli.main", tmp_path)
+        assert get_heavy_modules(loaded["modules"]) == []
+        assert loaded["seconds"] < IMPORT_TIME_BUDGET
+
+    def test_help_is_light(self, tmp_path):
+        loaded = get_loaded_modules("from rippling_cli.cli.main import cli\ncli(['--help'], standalone_mode=False)",
+                                    tmp_path)
+        assert get_heavy_modules(loaded["modules"]) == []
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from rippling_cli.core import json_stream
+from rippling_cli.core.json_stream import iter_object_array
+
+DOCUMENT = {
+    "data": [
+        {"id": 1, "name": "café", "tags": ["日本", "🚀"], "score": 12345.678e-2, "nested": {"empty": [], "none": None}},
+        {"id": 2, "name": "quote \" and \\ backslash", "active": True},
+        1234567890,
+        "plain",
+    ],
+    "cursor": "next page",
+}
+TEXT = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+
+
+def chunked(data: bytes, size: int):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def decode(chunks, array_key="data"):
+    fields = {}
+    items = list(iter_object_array(chunks, array_key, fields))
+    return items, fields
+
+
+class TestIterObjectArray:
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(TEXT)])
+    def test_values_split_across_chunks(self, size):
+        assert decode(chunked(TEXT, size)) == (DOCUMENT["data"], {"cursor": "next page"})
+
+    def test_multibyte_characters_split_at_every_byte(self):
+        text = json.dumps({"data": ["é日🚀"]}, ensure_ascii=False).encode()
+        start = text.index("é".encode())
+        for split in range(start, start + len("é日🚀".encode())):
+            assert decode(iter([text[:split], text[split:]])) == (["é日🚀"], {})
+
+    def test_numbers_split_across_chunks(self):
+        assert decode(iter([b'{"data": [12', b"34, 5", b".5e", b"1]}"])) == ([1234, 55.0], {})
+
+    def test_text_chunks(self):
+        assert decode(iter(['{"cursor": null, ', '"data": [{"a": 1}]}'])) == ([{"a": 1}], {"cursor": None})
+
+    def test_empty_and_missing_arrays(self):
+        assert decode(iter([b"{}"])) == ([], {})
+        assert decode(iter([b'{"data": []}'])) == ([], {})
+        assert decode(iter([b'{"data": null, "cursor": "c"}'])) == ([], {"data": None, "cursor": "c"})
+        assert decode(iter([b'{"other": [1]}'])) == ([], {"other": [1]})
+
+    def test_truncated_input_is_an_error(self):
+        for end in range(len(TEXT)):
+            with pytest.raises(json.JSONDecodeError):
+                decode(chunked(TEXT[:end], 5))
+
+    @pytest.mark.parametrize("text", [b"[1, 2]", b'"data"', b"null", b"", b'{"data": [1 2]}', b'{"data" [1]}'])
+    def test_invalid_documents_are_errors(self, text):
+        with pytest.raises(json.JSONDecodeError):
+            decode(iter([text]))
+
+    def test_consumed_text_is_dropped(self, monkeypatch):
+        monkeypatch.setattr(json_stream, "COMPACT_THRESHOLD", 16)
+        text = json.dumps({"data": [{"index": index} for index in range(100)]}).encode()
+        items = iter_object_array(chunked(text, 10), "data")
+        next(items)
+        stream = items.gi_frame.f_locals["stream"]
+        for index, item in enumerate(items, start=1):
+            assert item == {"index": index}
+            assert len(stream.text) < 64
@@ -0,0 +1,47 @@
+import pytest
+
+from rippling_cli.core.chunk_pipe import ChunkPipe
+from rippling_cli.core.multipart import FileChunks, MultipartStream
+
+
+def expected_body(boundary: str, data: bytes) -> bytes:
+    return (f'--{boundary}\r\nContent-Disposition: form-data; name="key"\r\n\r\nbuilds/app.zip\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="policy"\r\n\r\npolicy\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="app.zip"\r\n\r\n').encode() + \
+        data + f"\r\n--{boundary}--\r\n".encode()
+
+
+def stream(file_chunks, file_size=None) -> MultipartStream:
+    return MultipartStream({"key": "builds/app.zip", "policy": "policy"}, "file", "app.zip", file_chunks, file_size)
+
+
+class TestMultipartStream:
+
+    @pytest.mark.parametrize("size", [-1, 1, 7, 1000])
+    def test_fields_come_before_the_file(self, size):
+        body = stream([b"zip ", b"", b"data"], file_size=8)
+        parts = iter(lambda: body.read(size), b"")
+        assert b"".join(parts) == expected_body(body.boundary, b"zip data")
+        assert len(body) == len(expected_body(body.boundary, b"zip data"))
+        assert body.bytes_sent == len(body)
+        assert body.content_type == f"multipart/form-data; boundary={body.boundary}"
+
+    def test_unknown_size_is_sent_chunked(self):
+        body = stream(iter([b"zip data"]))
+        # requests only sends chunked transfer encoding for a body without length
+        assert len(body) == 0
+        assert body
+        assert b"".join(body) == expected_body(body.boundary, b"zip data")
+
+    def test_file_chunks_are_read_again_after_a_rewind(self, tmp_path):
+        (tmp_path / "app.zip").write_bytes(b"zip data" * 100)
+        body = stream(FileChunks(str(tmp_path / "app.zip"), chunk_size=64), file_size=800)
+        assert body.replayable
+        body.read(100)
+        body.rewind()
+        assert body.bytes_sent == 0
+        assert body.read() == expected_body(body.boundary, b"zip data" * 100)
+        assert body.bytes_sent == len(body)
+
+    def test_pipe_is_not_replayable(self):
+        assert not stream(ChunkPipe()).replayable
@@ -0,0 +1,122 @@
+import hashlib
+import io
+import os
+import zipfile
+
+from rippling_cli.constants import DEPENDENCY_SITE_DIR
+from rippling_cli.core import packager
+from rippling_cli.core.packager import BundlePackager
+from rippling_cli.utils.build_utils import create_bundle_packager
+
+BUNDLE_FILES = ["app/main.py", "app/api/handlers.py", "app/bin/run.sh",
+                f"dependencies/{DEPENDENCY_SITE_DIR}/pkg/core.py",
+                f"dependencies/{DEPENDENCY_SITE_DIR}/pkg/__init__.py"]
+
+
+def write_file(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def package(directory, **kwargs) -> zipfile.ZipFile:
+    bundle_packager = BundlePackager(**kwargs)
+    bundle_packager.add_directory(str(directory), str(directory))
+    output = io.BytesIO()
+    bundle_packager.write(output)
+    return zipfile.ZipFile(io.BytesIO(output.getvalue()))
+
+
+class TestPackager:
+
+    def test_files_are_deflated_or_stored(self, tmp_path):
+        write_file(tmp_path / "app" / "main.py", b"print('hello')\n" * 100)
+        write_file(tmp_path / "app" / "random.bin", os.urandom(1000))
+        write_file(tmp_path / "app" / "dependency.whl", b"wheel" * 100)
+        archive = package(tmp_path, max_workers=1)
+        assert archive.testzip() is None
+        compress_types = {info.filename: info.compress_type for info in archive.infolist()}
+        assert compress_types == {"app/main.py": zipfile.ZIP_DEFLATED, "app/random.bin": zipfile.ZIP_STORED,
+                                  "app/dependency.whl": zipfile.ZIP_STORED}
+        assert archive.read("app/dependency.whl") == b"wheel" * 100
+
+    def test_large_files_are_streamed_by_the_writer(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packager, "STREAM_MIN_BYTES", 1000)
+        read_paths = []
+        read_file_chunks = packager.read_file_chunks
+
+        def read_file_chunks_once(path):
+            read_paths.append(path)
+            return read_file_chunks(path)
+
+        monkeypatch.setattr(packager, "read_file_chunks", read_file_chunks_once)
+        data = b"0123456789" * 1000
+        write_file(tmp_path / "large.txt", data)
+        write_file(tmp_path / "small.txt", b"small")
+        archive = package(tmp_path, max_workers=1)
+        assert archive.testzip() is None
+        assert archive.read("large.txt") == data
+        assert archive.getinfo("large.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read("small.txt") == b"small"
+        # The large file is read once, by the writer
+        assert read_paths == [str(tmp_path / "large.txt")]
+
+    def test_parallel_packaging_keeps_the_order(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packager, "PARALLEL_MIN_BYTES", 0)
+        monkeypatch.setattr(packager, "BATCH_MAX_FILES", 3)
+        for index in range(10):
+            write_file(tmp_path / f"file_{index}.{'whl' if index % 3 == 0 else 'py'}", f"content {index}".encode())
+        archive = package(tmp_path, max_workers=2, reproducible=True)
+        assert archive.namelist() == sorted(archive.namelist())
+        assert [archive.read(name) for name in archive.namelist()] == [
+            f"content {index}".encode() for index in range(10)]
+
+    def test_packaged_archive_is_copied_as_a_fragment(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packager, "STREAM_MIN_BYTES", 10)
+        write_file(tmp_path / "layer" / "lib.py", b"x = 1\n" * 10)
+        bundle_packager = BundlePackager(max_workers=1)
+        bundle_packager.add_directory(str(tmp_path / "layer"), str(tmp_path))
+        with open(tmp_path / "layer.zip", "wb") as f:
+            bundle_packager.write(f)
+
+        bundle_packager = BundlePackager(max_workers=1)
+        bundle_packager.add_file(str(tmp_path / "layer" / "lib.py"), "main.py")
+        bundle_packager.add_zip_fragment(str(tmp_path / "layer.zip"))
+        output = io.BytesIO()
+        bundle_packager.write(output)
+        archive = zipfile.ZipFile(output)
+        assert archive.testzip() is None
+        assert archive.namelist() == ["main.py", "layer/lib.py"]
+        assert archive.read("layer/lib.py") == b"x = 1\n" * 10
+
+    def test_dependencies_keep_their_docs_and_tests_modules(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for path in ["app/main.py", "app/tests/test_main.py", "app/docs/index.md",
+                     f"dependencies/{DEPENDENCY_SITE_DIR}/pkg/__init__.py",
+                     f"dependencies/{DEPENDENCY_SITE_DIR}/pkg/docs/docstring.py",
+                     f"dependencies/{DEPENDENCY_SITE_DIR}/pkg/tests/helpers.py"]:
+            write_file(tmp_path / path, b"x = 1\n")
+        output = io.BytesIO()
+        create_bundle_packager("app", tmp_path / "dependencies").write(output)
+        assert sorted(zipfile.ZipFile(output).namelist()) == [
+            "app/main.py", "pkg/__init__.py", "pkg/docs/docstring.py", "pkg/tests/helpers.py"]
+
+    def test_reproducible_builds_are_byte_identical(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+        bundles = []
+        for build, files in [("first", BUNDLE_FILES), ("second", list(reversed(BUNDLE_FILES)))]:
+            # The second checkout creates the files in another order, at another time and with other permissions
+            for index, path in enumerate(files):
+                write_file(tmp_path / build / path, f"# {path}\n".encode() * 100)
+                os.utime(tmp_path / build / path, (1_600_000_000 + index * 1000, 1_600_000_000 + index * 1000))
+                os.chmod(tmp_path / build / path, 0o775 if path.endswith(".sh") else
+                         (0o600 if build == "second" else 0o664))
+            monkeypatch.chdir(tmp_path / build)
+            bundle_packager = create_bundle_packager("app", tmp_path / build / "dependencies", reproducible=True)
+            output = io.BytesIO()
+            digest = bundle_packager.write(output)
+            bundles.append((output.getvalue(), digest))
+        assert bundles[0] == bundles[1]
+        assert bundles[0][1] == hashlib.sha256(bundles[0][0]).hexdigest()
+        infos = zipfile.ZipFile(io.BytesIO(bundles[0][0])).infolist()
+        assert {info.date_time for info in infos} == {(2023, 11, 14, 22, 13, 20)}
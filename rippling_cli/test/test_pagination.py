@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+
+from rippling_cli.utils.pagination_utils import write_items
+
+ITEMS = [
+    {"id": 1, "name": "first", "created_by": {"fullName": "Ada"}},
+    {"id": 2, "name": "second, quoted", "created_by": None, "tags": ["a", "b"]},
+    {"id": 3, "created_by": {"fullName": "Grace", "email": "grace@example.com"}},
+]
+
+
+def write(items, output_format, flush_every=100) -> str:
+    output = io.StringIO()
+    write_items(iter(items), output_format, output, flush_every=flush_every)
+    return output.getvalue()
+
+
+class TestWriteItems:
+
+    def test_json_is_an_array(self):
+        assert json.loads(write(ITEMS, "json")) == ITEMS
+        assert json.loads(write([], "json")) == []
+
+    def test_jsonl_has_an_item_per_line(self):
+        assert [json.loads(line) for line in write(ITEMS, "jsonl", flush_every=1).splitlines()] == ITEMS
+        assert write([], "jsonl") == ""
+
+    def test_csv_columns_are_the_union_of_the_fields(self):
+        rows = list(csv.DictReader(io.StringIO(write(ITEMS, "csv"))))
+        assert list(rows[0]) == ["id", "name", "created_by.fullName", "created_by", "tags", "created_by.email"]
+        assert rows == [
+            {"id": "1", "name": "first", "created_by.fullName": "Ada", "created_by": "", "tags": "",
+             "created_by.email": ""},
+            {"id": "2", "name": "second, quoted", "created_by.fullName": "", "created_by": "", "tags": '["a", "b"]',
+             "created_by.email": ""},
+            {"id": "3", "name": "", "created_by.fullName": "Grace", "created_by": "", "tags": "",
+             "created_by.email": "grace@example.com"},
+        ]
+        assert write([], "csv") == ""
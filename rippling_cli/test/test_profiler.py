@@ -0,0 +1,73 @@
+import json
+import threading
+
+import pytest
+
+from rippling_cli.core import profiler
+from rippling_cli.core.profiler import Profiler, profile_stage, profiling
+
+
+class TestProfiler:
+
+    def test_disabled_profiling_records_nothing(self, capsys):
+        with profiling(enabled=False) as active_profiler:
+            with profile_stage("zip") as stage:
+                stage.add_bytes(10)
+        assert active_profiler is None
+        assert profiler._active_profiler is None
+        assert capsys.readouterr().out == ""
+
+    def test_stage_is_recorded_when_its_block_raises(self):
+        stage_profiler = Profiler()
+        with pytest.raises(ValueError):
+            with stage_profiler.stage("upload") as stage:
+                stage.add_bytes(100)
+                raise ValueError("connection reset")
+        assert [(stage.name, stage.bytes) for stage in stage_profiler.stages] == [("upload", 100)]
+        assert stage_profiler.stages[0].wall_time >= 0
+
+    def test_stages_are_reported_in_the_order_they_started(self):
+        stage_profiler = Profiler()
+        first_started, second_ended = threading.Event(), threading.Event()
+
+        def run_first():
+            with stage_profiler.stage("zip"):
+                first_started.set()
+                second_ended.wait(5)
+
+        thread = threading.Thread(target=run_first)
+        thread.start()
+        first_started.wait(5)
+        with stage_profiler.stage("upload"):
+            pass
+        second_ended.set()
+        thread.join()
+        # The first stage to end is recorded first
+        assert [stage.name for stage in stage_profiler.stages] == ["upload", "zip"]
+        assert [stage["name"] for stage in stage_profiler.to_dict()["stages"]] == ["zip", "upload"]
+
+    def test_peak_rss_increase_is_measured_per_stage(self, monkeypatch):
+        peaks = iter([100, 300, 300, 350])
+        monkeypatch.setattr(profiler, "get_peak_rss", lambda: next(peaks))
+        stage_profiler = Profiler()
+        for name in ["pip install", "zip"]:
+            with stage_profiler.stage(name):
+                pass
+        assert [(stage.peak_rss, stage.peak_rss_increase) for stage in stage_profiler.stages] == [
+            (300, 200), (350, 50)]
+
+    def test_report_file(self, tmp_path, capsys):
+        report_file = tmp_path / "profile.json"
+        with profiling(enabled=True, report_file=str(report_file)):
+            with profile_stage("zip") as stage:
+                stage.add_bytes(2048)
+        report = json.loads(report_file.read_text())
+        assert set(report) == {"wall_time", "peak_rss", "stages"}
+        assert [set(stage) for stage in report["stages"]] == [
+            {"name", "start", "wall_time", "cpu_time", "bytes", "peak_rss", "peak_rss_increase"}]
+        assert report["stages"][0]["name"] == "zip"
+        assert report["stages"][0]["bytes"] == 2048
+        output = capsys.readouterr().out
+        assert "peak so far" in output
+        assert "2.0 KB" in output
+        assert f"Profile report written to {report_file}" in output
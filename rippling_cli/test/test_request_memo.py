@@ -0,0 +1,48 @@
+import pytest
+
+from rippling_cli.core.api_client import APIClient
+from rippling_cli.core.request_memo import memoizing
+from rippling_cli.core.response_cache import response_cache
+from rippling_cli.test.test_request_scheduler import FaultInjectingServer
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+
+class TestRequestMemo:
+
+    def test_identical_reads_are_sent_once(self):
+        with FaultInjectingServer() as server, memoizing():
+            api_client = APIClient(server.url)
+            api_client.get("/items")
+            api_client.get("/items")
+            api_client.post("/items/query", json={"q": 1}, memoize=True)
+            api_client.post("/items/query", json={"q": 1}, memoize=True)
+        assert server.attempts == 2
+
+    def test_write_forgets_the_reads(self):
+        with FaultInjectingServer() as server, memoizing():
+            api_client = APIClient(server.url)
+            api_client.get("/items")
+            api_client.post("/items", json={})
+            api_client.get("/items")
+        assert server.attempts == 3
+
+    def test_write_to_another_host_keeps_the_reads(self):
+        with FaultInjectingServer() as server, FaultInjectingServer() as other_server, memoizing():
+            api_client = APIClient(server.url)
+            api_client.get("/items")
+            APIClient(other_server.url).post("/uploads", json={})
+            api_client.get("/items")
+        assert server.attempts == 1
+
+    def test_pagination_keeps_the_reads(self):
+        with FaultInjectingServer() as server, memoizing():
+            api_client = APIClient(server.url)
+            api_client.get("/items")
+            assert list(api_client.find_paginated("/things")) == [[1, 2]]
+            assert list(api_client.find_paginated_items("/things")) == [1, 2]
+            api_client.get("/items")
+        assert server.attempts == 3
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import pytest
+import requests  # type: ignore
+
+from rippling_cli.core.api_client import APIClient
+from rippling_cli.core.request_scheduler import TokenBucket, request_scheduler
+from rippling_cli.test.benchmarks.s3_server import Fault, LocalS3Server
+from rippling_cli.utils.build_utils import upload_stream_to_s3, upload_zip_file_to_s3
+
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+    """
+    Answer every request with a small JSON body, unless the server has a fault to inject in place of the answer.
+    """
+    protocol_version = "HTTP/1.1"
+    server: "FaultInjectingServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._answer()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._answer()
+
+    def _answer(self):
+        with self.server.lock:
+            self.server.attempts += 1
+            fault = self.server.faults.pop(0) if self.server.faults else None
+        if fault and fault.reset:
+            self.close_connection = True
+            self.connection.close()
+            return
+        status = HTTPStatus(fault.status) if fault else HTTPStatus.OK
+        body = json.dumps({"data": [1, 2], "cursor": None} if status == HTTPStatus.OK else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if fault and fault.retry_after is not None:
+            self.send_header("Retry-After", fault.retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FaultInjectingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, faults: Optional[list[Fault]] = None):
+        super().__init__(("127.0.0.1", 0), FaultInjectingHandler)
+        self.lock = threading.Lock()
+        self.attempts = 0
+        self.faults = list(faults or [])
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(request_scheduler, "backoff", 0.001)
+    monkeypatch.setattr(request_scheduler, "buckets", {})
+
+
+class TestRequestScheduler:
+
+    def test_get_is_retried_through_faults(self):
+        faults = [Fault(status=429, retry_after="0"), Fault(status=502), Fault(reset=True)]
+        with FaultInjectingServer(faults) as server:
+            response = APIClient(server.url).get("/items")
+        assert response.status_code == HTTPStatus.OK
+        assert server.attempts == 4
+
+    def test_post_is_only_retried_when_rejected(self):
+        with FaultInjectingServer([Fault(status=503), Fault(status=502)]) as server:
+            response = APIClient(server.url).post("/items", json={})
+        assert response.status_code == HTTPStatus.BAD_GATEWAY
+        assert server.attempts == 2
+
+    def test_post_is_not_retried_after_a_reset(self):
+        with FaultInjectingServer([Fault(reset=True)]) as server:
+            with pytest.raises(requests.exceptions.ConnectionError):
+                APIClient(server.url).post("/items", json={})
+        assert server.attempts == 1
+
+    def test_find_paginated_is_retried(self):
+        with FaultInjectingServer([Fault(status=502), Fault(reset=True)]) as server:
+            pages = list(APIClient(server.url).find_paginated("/items"))
+        assert pages == [[1, 2]]
+        assert server.attempts == 3
+
+    def test_retries_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(request_scheduler, "max_retries", 2)
+        with FaultInjectingServer([Fault(status=503)] * 5) as server:
+            response = APIClient(server.url).get("/items")
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert server.attempts == 3
+
+    def test_long_retry_after_is_not_waited_for(self):
+        with FaultInjectingServer([Fault(status=429, retry_after="3600")]) as server:
+            response = APIClient(server.url).get("/items")
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert server.attempts == 1
+
+    def test_upload_is_retried(self, tmp_path):
+        zip_file = tmp_path / "bundle.zip"
+        zip_file.write_bytes(b"bundle" * 100000)
+        with LocalS3Server([Fault(reset=True), Fault(status=503), Fault(status=500)]) as server:
+            assert upload_zip_file_to_s3("application/zip", str(zip_file), server.get_upload_credentials())
+        assert server.attempts == 4
+        assert server.uploads == 1
+
+    def test_streamed_upload_is_not_replayed(self):
+        with LocalS3Server([Fault(status=500)]) as server:
+            chunks = iter([b"bundle"] * 10)
+            assert not upload_stream_to_s3("application/zip", "bundle.zip", chunks, None,
+                                           server.get_upload_credentials())
+        assert server.attempts == 1
+
+    def test_token_bucket_limits_the_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started_at = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        assert time.monotonic() - started_at >= 0.09
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+
+from rippling_cli.config import config
+from rippling_cli.constants import RIPPLING_API
+from rippling_cli.core.response_cache import ResponseCache, build_response, get_endpoint_ttl
+
+APP_BUILD_URL = f"{RIPPLING_API}/apps/api/app_builds/1"
+
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "global_config_dir", tmp_path)
+
+
+class FakeServer:
+    """
+    Answer the requests sent through the response cache, counting them.
+    """
+    def __init__(self, etag=None):
+        self.etag = etag
+        self.requests = []
+
+    def send(self, url):
+        def send(headers):
+            self.requests.append((url, headers))
+            if self.etag and headers.get("If-None-Match") == self.etag:
+                response = build_response(url, b"", {})
+                response.status_code = HTTPStatus.NOT_MODIFIED
+                return response
+            return build_response(url, f'{{"request": {len(self.requests)}}}'.encode(),
+                                  {"Content-Type": "application/json", **({"ETag": self.etag} if self.etag else {})})
+        return send
+
+
+class TestResponseCache:
+
+    def test_endpoint_ttl_matches_path_prefixes(self):
+        assert get_endpoint_ttl(APP_BUILD_URL) == 30
+        assert get_endpoint_ttl(f"{RIPPLING_API}/apps/api/app_builds") == 30
+        assert get_endpoint_ttl(f"{RIPPLING_API}//apps/api/apps/1/") == 300
+        assert get_endpoint_ttl(f"{RIPPLING_API}/apps/api/app_builds_archive/1") is None
+        assert get_endpoint_ttl(f"{RIPPLING_API}/other/apps/api/apps/1") is None
+
+    def test_response_is_cached_during_the_ttl(self):
+        server = FakeServer()
+        cache = ResponseCache()
+        first = cache.get(APP_BUILD_URL, None, {"Authorization": "Bearer a"}, server.send(APP_BUILD_URL))
+        second = cache.get(APP_BUILD_URL, None, {"Authorization": "Bearer a"}, server.send(APP_BUILD_URL))
+        assert second.json() == first.json() == {"request": 1}
+        # Another user never gets the cached response
+        cache.get(APP_BUILD_URL, None, {"Authorization": "Bearer b"}, server.send(APP_BUILD_URL))
+        assert len(server.requests) == 2
+
+    def test_expired_response_is_revalidated(self, monkeypatch):
+        server = FakeServer(etag='"v1"')
+        cache = ResponseCache()
+        cache.get(APP_BUILD_URL, None, {}, server.send(APP_BUILD_URL))
+        monkeypatch.setattr("rippling_cli.core.response_cache.time.time", lambda: 2e9)
+        response = cache.get(APP_BUILD_URL, None, {}, server.send(APP_BUILD_URL))
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {"request": 1}
+        assert server.requests[-1][1] == {"If-None-Match": '"v1"'}
+
+    def test_write_invalidates_the_endpoint_prefix(self):
+        server = FakeServer()
+        cache = ResponseCache()
+        app_url = f"{RIPPLING_API}/apps/api/apps/1"
+        for url, params, headers in [(APP_BUILD_URL, None, {"Authorization": "Bearer a"}),
+                                     (APP_BUILD_URL, {"page": 2}, {"Authorization": "Bearer b"}),
+                                     (app_url, None, {"Authorization": "Bearer a"})]:
+            cache.get(url, params, headers, server.send(url))
+        cache.invalidate(f"{RIPPLING_API}/apps/api/app_builds/deploy")
+
+        for url, params, headers in [(APP_BUILD_URL, None, {"Authorization": "Bearer a"}),
+                                     (APP_BUILD_URL, {"page": 2}, {"Authorization": "Bearer b"}),
+                                     (app_url, None, {"Authorization": "Bearer a"})]:
+            cache.get(url, params, headers, server.send(url))
+        # Both builds were fetched again, the app was not
+        assert [url for url, _ in server.requests[3:]] == [APP_BUILD_URL, APP_BUILD_URL]
+
+    def test_disabled_cache_sends_every_request(self):
+        server = FakeServer()
+        cache = ResponseCache(enabled=False)
+        cache.get(APP_BUILD_URL, None, {}, server.send(APP_BUILD_URL))
+        cache.get(APP_BUILD_URL, None, {}, server.send(APP_BUILD_URL))
+        assert len(server.requests) == 2
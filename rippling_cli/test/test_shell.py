@@ -0,0 +1,34 @@
+import pytest
+from click.testing import CliRunner
+
+from rippling_cli.cli.main import cli
+from rippling_cli.config import config
+from rippling_cli.utils.completion_utils import APP_ID, BUILD_ID, get_completions, remember_ids
+
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "global_config_dir", tmp_path)
+
+
+class TestShell:
+
+    def test_commands_and_options_are_completed(self):
+        assert get_completions(cli, [], "") == ["cache", "daemon", "flux", "login", "logout", "shell"]
+        assert get_completions(cli, ["flux"], "b") == ["build"]
+        assert get_completions(cli, ["flux", "build", "deploy"], "--") == ["--build_id", "--help"]
+
+    def test_ids_are_completed_most_recent_first(self):
+        remember_ids(BUILD_ID, ["b1", "b2"])
+        remember_ids(BUILD_ID, ["b3", "b1"])
+        remember_ids(APP_ID, ["a1"])
+        assert get_completions(cli, ["flux", "build", "deploy", "--build_id"], "") == ["b3", "b1", "b2"]
+        assert get_completions(cli, ["flux", "app", "set", "--app_id"], "a") == ["a1"]
+
+    def test_commands_run_until_exit(self):
+        result = CliRunner().invoke(cli, ["shell"], input="cache prune\nmissing\ncache prune --all\nexit\n")
+        assert result.exit_code == 0
+        assert result.output.count("rippling> ") == 4
+        assert "Caches pruned." in result.output
+        assert "No such command 'missing'" in result.output
+        assert "All caches cleared." in result.output
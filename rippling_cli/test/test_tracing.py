@@ -0,0 +1,99 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from rippling_cli.core.api_client import APIClient, request_hooks
+from rippling_cli.core.request_memo import memoizing
+from rippling_cli.core.request_scheduler import request_scheduler
+from rippling_cli.core.response_cache import response_cache
+from rippling_cli.core.tracing import RequestTrace, Tracer, get_endpoint_template, get_percentile, tracing
+from rippling_cli.test.benchmarks.s3_server import Fault
+from rippling_cli.test.test_request_scheduler import FaultInjectingServer
+
+BUILD_ID = "5f1e2d3c4b5a69788796a5b4"
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(request_scheduler, "backoff", 0.001)
+    monkeypatch.setattr(request_scheduler, "buckets", {})
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+
+REPORT_SECTIONS = ("Requests", "Endpoints", "Latency histogram")
+
+
+def report_rows(output: str, section: str) -> list[list[str]]:
+    """
+    Get the rows of a section of the report, split into columns, without the column names of the tables.
+    """
+    lines = output.splitlines()
+    start = lines.index(section) + (1 if section == "Latency histogram" else 2)
+    end = next((index for index in range(start, len(lines)) if lines[index] in REPORT_SECTIONS), len(lines))
+    return [line.split() for line in lines[start:end]]
+
+
+def histogram_counts(output: str) -> dict[str, int]:
+    return {" ".join(row[:2]): int(row[2]) for row in report_rows(output, "Latency histogram")}
+
+
+class TestTracing:
+
+    def test_retries_are_traced_with_their_attempt(self, capsys):
+        with FaultInjectingServer([Fault(status=HTTPStatus.SERVICE_UNAVAILABLE)]) as server:
+            with tracing(enabled=True) as tracer:
+                APIClient(server.url).get(f"/apps/api/app_builds/{BUILD_ID}")
+                assert request_hooks == [tracer.on_request]
+        assert request_hooks == []
+        assert [(trace.status, trace.attempt, trace.cached) for trace in tracer.traces] == [
+            (503, 1, False), (200, 2, False)]
+        assert {trace.endpoint for trace in tracer.traces} == {"/apps/api/app_builds/{id}"}
+
+        output = capsys.readouterr().err
+        assert [row[1:row.index("0.0")] for row in report_rows(output, "Requests")] == [
+            ["GET", "/apps/api/app_builds/{id}", "503"], ["GET", "/apps/api/app_builds/{id}", "200", "#2"]]
+        assert [row[:4] for row in report_rows(output, "Endpoints")] == [
+            ["GET", "/apps/api/app_builds/{id}", "2", "0"]]
+
+    def test_cached_requests_are_listed_without_latency(self, capsys):
+        with FaultInjectingServer() as server, memoizing(), tracing(enabled=True) as tracer:
+            api_client = APIClient(server.url)
+            api_client.get("/apps/api/apps")
+            api_client.get("/apps/api/apps")
+        assert server.attempts == 1
+        assert [(trace.attempt, trace.cached) for trace in tracer.traces] == [(1, False), (0, True)]
+
+        output = capsys.readouterr().err
+        assert [row[1:row.index("0.0")] for row in report_rows(output, "Requests")] == [
+            ["GET", "/apps/api/apps", "200"], ["GET", "/apps/api/apps", "200", "cached"]]
+        assert [row[:4] for row in report_rows(output, "Endpoints")] == [["GET", "/apps/api/apps", "1", "1"]]
+        assert sum(histogram_counts(output).values()) == 1
+
+    def test_trace_file_receives_every_attempt(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        with FaultInjectingServer([Fault(status=HTTPStatus.SERVICE_UNAVAILABLE)]) as server:
+            with tracing(enabled=False, trace_file=str(trace_file)):
+                APIClient(server.url).post("/apps/api/apps", json={"name": "app"})
+        traces = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [(trace["method"], trace["status"], trace["attempt"]) for trace in traces] == [
+            ("POST", 503, 1), ("POST", 200, 2)]
+        assert all(trace["bytes_out"] == len(b'{"name": "app"}') for trace in traces)
+
+    def test_endpoint_percentiles_and_histogram(self, capsys):
+        tracer = Tracer()
+        for index in range(20):
+            tracer.record(RequestTrace(method="GET", host="api", endpoint="/apps/api/apps", start=index,
+                                       status=200, latency=0.01 if index < 18 else 3.0))
+        tracer.print_report()
+        output = capsys.readouterr().err
+        assert [row[2:7] for row in report_rows(output, "Endpoints")] == [["20", "0", "10ms", "3.00s", "3.00s"]]
+        histogram = histogram_counts(output)
+        assert histogram["< 50ms"] == 18
+        assert histogram["< 5.00s"] == 2
+        assert sum(histogram.values()) == 20
+
+    def test_endpoint_template_groups_resource_ids(self):
+        assert get_endpoint_template(f"https://api/apps/{BUILD_ID}/builds/42") == "/apps/{id}/builds/{id}"
+        assert get_endpoint_template("https://api") == "/"
+        assert get_percentile([3.0, 1.0, 2.0], 0.5) == 2.0
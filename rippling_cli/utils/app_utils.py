@@ -6,6 +6,7 @@ from rippling_cli.config.config import get_app_config
 from rippling_cli.constants import RIPPLING_API
 from rippling_cli.core.api_client import APIClient
 from rippling_cli.utils.api_utils import delete_data_by_id, get_data_by_id
+from rippling_cli.utils.completion_utils import APP_ID, remember_ids
 
 
 def get_starter_package_for_app(oauth_token):
@@ -31,6 +32,7 @@ def display_apps(apps):
     """
     for app in apps:
         click.echo(f"- {app.get('displayName')} ({app.get('id')})")
+    remember_ids(APP_ID, [app.get("id") for app in apps])
 
 
 def get_app_install_by_spoke_handle_and_company(spoke_handle: str, company_id: str, oauth_token: str):
@@ -44,7 +46,8 @@ def get_app_install_by_spoke_handle_and_company(spoke_handle: str, company_id: s
     endpoint = "/hub/api/app_installs/?large_get_query=true"
     data = {"query": f"spoke__handle={spoke_handle}&installState=FINISH&company={company_id}&limit=1"}
     api_client = APIClient(base_url=RIPPLING_API, headers={"Authorization": f"Bearer {oauth_token}"})
-    response = api_client.post(endpoint, data=data)
+    # The query is a read, so the same lookup is only sent once per command
+    response = api_client.post(endpoint, data=data, idempotent=True, memoize=True)
     response_json = response.json()
     if response.status_code != HTTPStatus.OK or len(response_json) == 0:
         return None
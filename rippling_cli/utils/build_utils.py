@@ -1,12 +1,14 @@
-import configparser
 import os
 import shutil
 import subprocess
 import tempfile
-import zipfile
+import threading
+import time
+import uuid
 from dataclasses import asdict
 from http import HTTPStatus
-from typing import Optional
+from pathlib import Path
+from typing import Iterable, Optional
 
 import click
 
@@ -14,16 +16,53 @@ from rippling_cli.config.config import get_app_config
 from rippling_cli.constants import (
     APP_BUILD_MODULE,
     APP_FOLDER,
+    BUNDLE_ZIP_FILE_NAME,
+    DEFAULT_COMPRESSION_LEVEL,
+    DEPENDENCY_LAYER_DIR,
+    DEPENDENCY_SITE_DIR,
+    POETRY_LOCK,
     PYPROJECT_TOML,
     RIPPLING_API,
+    RIPPLING_IGNORE_FILE,
+    UPLOAD_CHUNK_SIZE,
 )
 from rippling_cli.core.api_client import APIClient
+from rippling_cli.core.async_api_client import run_concurrently
+from rippling_cli.core.chunk_pipe import ChunkPipe
+from rippling_cli.core.disk_cache import DiskCache, get_directory_size
+from rippling_cli.core.ignore_rules import APP_IGNORE_PATTERNS, DEFAULT_IGNORE_PATTERNS, IgnoreRules
+from rippling_cli.core.multipart import FileChunks, MultipartStream
+from rippling_cli.core.packager import BundlePackager
+from rippling_cli.core.profiler import profile_stage
 from rippling_cli.core.s3 import S3UploadFileCredentials
+from rippling_cli.exceptions.build_exceptions import LockFileNotUsable, StreamedUploadRejected
+from rippling_cli.utils.cache_utils import (
+    compute_bundle_key,
+    compute_dependency_layer_key,
+    compute_file_digest,
+    compute_requirements_key,
+    get_bundle_cache,
+    get_bundle_owner,
+    get_dependency_cache,
+    get_reusable_s3_build_url,
+    get_wheelhouse_dir,
+    prune_wheelhouse,
+    touch_installed_wheels,
+)
+from rippling_cli.utils.completion_utils import BUILD_ID, remember_ids
+from rippling_cli.utils.dependency_utils import get_locked_requirements, load_toml
 from rippling_cli.utils.loading_bar import start_circular_loading_bar, start_loading_bar, stop_loading_bar
-from rippling_cli.utils.login_utils import get_api_client_with_role_company
+from rippling_cli.utils.login_utils import (
+    get_api_client_with_role_company,
+    get_role_and_company_id,
+    get_token_fingerprint,
+)
 from rippling_cli.utils.s3_utils import get_s3_upload_url_credentials
 from rippling_cli.utils.validation_summary import Validation, ValidationSummary
 
+# The answers of an upload url requiring a Content-Length: S3 answers Not Implemented for chunked transfer encoding
+STREAMED_UPLOAD_REJECTED_STATUSES = frozenset({HTTPStatus.LENGTH_REQUIRED, HTTPStatus.NOT_IMPLEMENTED})
+
 
 def starter_package_already_extracted_on_current_directory():
     """
@@ -154,6 +193,7 @@ def display_builds(builds):
         click.echo(
             f"- {build.get('name')} {build.get('created_by', {}).get('fullName', '-')}  {build.get('status')} \
 {build.get('id')}")
+    remember_ids(BUILD_ID, [build.get("id") for build in builds])
 
 
 def get_dependencies_from_pyproject(pyproject_toml):
@@ -166,64 +206,284 @@ def get_dependencies_from_pyproject(pyproject_toml):
     Returns:
         dict: A dictionary containing the non-dev dependencies.
     """
-    config = configparser.ConfigParser()
-    config.read(pyproject_toml)
+    pyproject = load_toml(pyproject_toml)
 
     dependencies = {}
-    if config.has_section('tool.poetry.dependencies'):
-        for key, value in config.items('tool.poetry.dependencies'):
-            if key == 'python':
+    for key, value in pyproject.get('tool', {}).get('poetry', {}).get('dependencies', {}).items():
+        if key == 'python':
+            continue
+        # Detailed constraints are tables such as { version = "^1.0", extras = ["x"] }
+        if isinstance(value, list):
+            value = value[0] if value else '*'
+        if isinstance(value, dict):
+            if value.get('optional'):
                 continue
-            # Strip any leading/trailing quotes from the value
-            value = value.strip('"\'')
-            dependencies[key] = value
+            value = value.get('version', '*')
+        dependencies[key] = value
 
     return dependencies
 
 
+def get_requirement_lines(dependencies):
+    """
+    Convert the poetry constraints of the non-dev dependencies to requirement lines.
+
+    Args:
+        dependencies (dict): A dictionary containing the non-dev dependencies.
+
+    Returns:
+        list: The lines of the requirements file.
+    """
+    lines = []
+    for dependency, constraint in dependencies.items():
+        # Strip any leading/trailing quotes from the dependency
+        dependency = dependency.strip('"\'')
+        # Remove '^' operator if present in the constraint
+        constraint = constraint.lstrip('^')
+        if constraint == '*':
+            version_str = dependency
+        elif constraint.startswith('>='):
+            version_str = f'{dependency}{constraint}'
+        elif constraint.startswith('<'):
+            version_str = f'{dependency},{constraint}'
+        else:
+            version_str = f'{dependency}=={constraint}'
+        lines.append(version_str)
+    return lines
+
+
 def create_requirements_file(dependencies, requirements_file):
     """
     Create a requirements.txt file with the non-dev dependencies.
 
     Args:
-        dependencies (dict): A dictionary containing the non-dev dependencies.
+        dependencies (dict | list): A dictionary containing the non-dev dependencies, or the requirement lines.
         requirements_file (str): Path to the requirements.txt file.
     """
+    lines = get_requirement_lines(dependencies) if isinstance(dependencies, dict) else dependencies
     with open(requirements_file, 'w') as f:
-        for dependency, constraint in dependencies.items():
-            # Strip any leading/trailing quotes from the dependency
-            dependency = dependency.strip('"\'')
-            # Remove '^' operator if present in the constraint
-            constraint = constraint.lstrip('^')
-            if constraint.startswith('>='):
-                version_str = f'{dependency}{constraint}'
-            elif constraint.startswith('<'):
-                version_str = f'{dependency},{constraint}'
-            else:
-                version_str = f'{dependency}=={constraint}'
-            f.write(f'{version_str}\n')
+        for line in lines:
+            f.write(f'{line}\n')
 
 
-def install_dependencies(requirements_file, target_dir):
+def get_app_requirements():
     """
-    Install the non-dev dependencies in the target directory.
+    Get the requirements of the app. When the app has a poetry.lock file, the requirements are the complete locked
+    set, pinned and hash checked, so that pip has no resolution left to do and the set is a stable cache key.
+    Otherwise they are derived from the constraints of pyproject.toml.
+
+    Returns:
+        tuple: The lines of the requirements file and whether they are the complete locked set.
+    """
+    with profile_stage("requirements") as stage:
+        stage.add_bytes(os.path.getsize(PYPROJECT_TOML))
+        if os.path.exists(POETRY_LOCK):
+            stage.add_bytes(os.path.getsize(POETRY_LOCK))
+            try:
+                return get_locked_requirements(PYPROJECT_TOML, POETRY_LOCK), True
+            except LockFileNotUsable as e:
+                click.echo(f"{e.message} Resolving the dependencies with pip.")
+        return get_requirement_lines(get_dependencies_from_pyproject(PYPROJECT_TOML)), False
+
+
+def run_pip(*args):
+    """
+    Run pip inside the poetry environment of the project.
+    :param args:
+    :return:
+    """
+    cmd = ['poetry', 'run', 'pip', *args]
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def has_requirements(requirements_file):
+    """
+    Check if the requirements file lists at least one requirement.
+    :param requirements_file:
+    :return:
+    """
+    with open(requirements_file, 'r') as f:
+        return any(line.strip() and not line.lstrip().startswith('#') for line in f)
+
+
+def strip_requirement_hashes(requirements_file, stripped_requirements_file):
+    """
+    Write a copy of the requirements file without the --hash options.
+    :param requirements_file:
+    :param stripped_requirements_file:
+    :return:
+    """
+    with open(requirements_file, 'r') as f, open(stripped_requirements_file, 'w') as stripped:
+        for line in f:
+            stripped.write(line.split(' --hash=', 1)[0].rstrip() + '\n')
+
+
+def install_dependencies_from_wheelhouse(requirements_file, target_dir, no_deps=False):
+    """
+    Install the dependencies in the target directory from the local wheelhouse only. Wheels missing from the
+    wheelhouse are downloaded or built once and then reused by every later install.
+
+    Hashes are checked when the wheels are downloaded. They are left out of the offline install, since wheels built
+    locally from source distributions can never match the hashes of the published files.
 
     Args:
         requirements_file (str): Path to the requirements.txt file.
         target_dir (str): Path to the target directory.
+        no_deps (bool): Skip dependency resolution, the requirements being a complete set.
+
+    Returns:
+        bool: True if the dependencies were installed successfully.
+    """
+    wheelhouse_dir = str(get_wheelhouse_dir())
+    resolution_args = ['--no-deps'] if no_deps else []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        offline_requirements_file = os.path.join(temp_dir, 'requirements.txt')
+        strip_requirement_hashes(requirements_file, offline_requirements_file)
+        offline_install_args = ['install', '--no-index', '--find-links', wheelhouse_dir, '--target', target_dir,
+                                *resolution_args, '-r', offline_requirements_file]
+
+        # Try without network access first, every wheel may already be in the wheelhouse
+        if run_pip(*offline_install_args).returncode == 0:
+            touch_installed_wheels(target_dir)
+            return True
+
+        result = run_pip('wheel', '--wheel-dir', wheelhouse_dir, '--find-links', wheelhouse_dir, *resolution_args,
+                         '-r', requirements_file)
+        if result.returncode != 0:
+            click.echo(f"Error installing dependencies: {result.stderr}")
+            return False
+
+        result = run_pip(*offline_install_args)
+        if result.returncode != 0:
+            click.echo(f"Error installing dependencies: {result.stderr}")
+            return False
+        # Prune once the wheels of this install are marked as used, so that none of them is removed
+        touch_installed_wheels(target_dir)
+        prune_wheelhouse()
+        return True
+
+
+def get_cached_dependencies(requirements_file, no_deps=False) -> Optional[Path]:
+    """
+    Get the cached dependency tree of the requirement set, installing it first when the set was never installed.
+    Installed dependency trees are cached by the exact requirement set.
+
+    Args:
+        requirements_file (str): Path to the requirements.txt file.
+        no_deps (bool): Skip dependency resolution, the requirements being a complete set.
+
+    Returns:
+        Optional[Path]: The cache entry holding the dependencies in its site directory, or None if the installation
+        failed.
+    """
+    dependency_cache = get_dependency_cache()
+    requirements_key = compute_requirements_key(requirements_file)
+
+    cached_dependencies_path = dependency_cache.get(requirements_key)
+    if cached_dependencies_path:
+        return cached_dependencies_path
+
+    staging_path = dependency_cache.create(requirements_key)
+    try:
+        site_dir = str(staging_path / DEPENDENCY_SITE_DIR)
+        with profile_stage("pip install") as stage:
+            if has_requirements(requirements_file) and not install_dependencies_from_wheelhouse(requirements_file,
+                                                                                                 site_dir, no_deps):
+                return None
+            os.makedirs(site_dir, exist_ok=True)
+            stage.add_bytes(get_directory_size(Path(site_dir)))
+        return dependency_cache.commit(requirements_key, staging_path)
+    finally:
+        if staging_path.exists():
+            shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def get_app_dependencies(requirements: list[str], locked: bool) -> Optional[Path]:
+    """
+    Get the cached dependency tree of the non-dev dependencies of the app, locked in poetry.lock or listed in
+    pyproject.toml, installing it first when needed.
+    :param requirements: the requirements of the app, as returned by get_app_requirements
+    :param locked: whether the requirements are the complete locked set
+    :return: the cache entry holding the dependencies, or None if the installation failed
     """
-    # Command to install dependencies
-    cmd = ['poetry', 'run', 'pip', 'install', '--target', target_dir, '-r', requirements_file]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        requirements_file = os.path.join(temp_dir, 'requirements.txt')
+        create_requirements_file(requirements, requirements_file)
+        return get_cached_dependencies(requirements_file, no_deps=locked)
 
-    # Run the command and capture the output
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
-    # Check if the command was successful
-    if result.returncode != 0:
-        click.echo(f"Error installing dependencies: {result.stderr}")
+def get_ignore_rules(dependencies: bool = False) -> IgnoreRules:
+    """
+    Get the rules selecting the files left out of the bundle: the built-in defaults followed by the patterns of the
+    .ripplingignore file of the project, matched against the paths inside the bundle.
+    :param dependencies: get the rules of the dependency tree, which keep the development files of the app
+    :return:
+    """
+    defaults = DEFAULT_IGNORE_PATTERNS if dependencies else DEFAULT_IGNORE_PATTERNS + APP_IGNORE_PATTERNS
+    return IgnoreRules.from_file(RIPPLING_IGNORE_FILE, defaults)
+
+
+def get_dependency_layer(cached_dependencies_path: Path, compress_level: int, ignore_rules: IgnoreRules,
+                         reproducible: bool = False) -> str:
+    """
+    Get the dependency layer of the bundle: a zip fragment of the cached dependency tree that later bundles copy
+    entry by entry without compressing it again. It is packaged once per dependency tree and packaging options, and
+    kept in the dependency cache next to the tree.
+    :param cached_dependencies_path:
+    :param compress_level:
+    :param ignore_rules:
+    :param reproducible:
+    :return: the path of the zip fragment
+    """
+    layer_key = compute_dependency_layer_key(compress_level, ignore_rules, reproducible)
+    layer_path = cached_dependencies_path / DEPENDENCY_LAYER_DIR / f"{layer_key}.zip"
+    if layer_path.is_file():
+        return str(layer_path)
+
+    site_dir = str(cached_dependencies_path / DEPENDENCY_SITE_DIR)
+    packager = BundlePackager(compress_level=compress_level, reproducible=reproducible)
+    packager.add_directory(site_dir, arcname_root=site_dir, ignore_rules=ignore_rules)
+
+    layer_path.parent.mkdir(exist_ok=True)
+    staging_path = layer_path.with_name(f".staging-{uuid.uuid4().hex}.zip")
+    try:
+        with profile_stage("zip dependency layer") as stage, open(staging_path, 'wb') as f:
+            packager.write(f)
+            stage.add_bytes(f.tell())
+        os.replace(staging_path, layer_path)
+    finally:
+        staging_path.unlink(missing_ok=True)
+    # The layer counts towards the size limit of the dependency cache
+    DiskCache(cached_dependencies_path.parent).resize(cached_dependencies_path.name)
+    return str(layer_path)
+
+
+def create_bundle_packager(app_folder, cached_dependencies_path: Optional[Path],
+                           compress_level=DEFAULT_COMPRESSION_LEVEL, ignore_rules: Optional[IgnoreRules] = None,
+                           reproducible: bool = False):
+    """
+    Create the packager of the bundle made of the app folder and its dependencies. Only the app folder is
+    compressed, the dependencies are copied from their dependency layer.
+    :param app_folder:
+    :param cached_dependencies_path: the dependency cache entry, None to package the app folder alone
+    :param compress_level:
+    :param ignore_rules: the rules of the app folder
+    :param reproducible: sort the entries and normalize their timestamps and permissions
+    :return:
+    """
+    ignore_rules = ignore_rules or get_ignore_rules()
+    packager = BundlePackager(compress_level=compress_level, reproducible=reproducible)
+    # Add the app folder
+    packager.add_directory(app_folder, ignore_rules=ignore_rules)
+    # Add the dependencies
+    if cached_dependencies_path:
+        packager.add_zip_fragment(get_dependency_layer(cached_dependencies_path, compress_level,
+                                                       get_ignore_rules(dependencies=True), reproducible))
+    return packager
 
 
-def create_zip_file(app_folder, target_dir, zip_filename):
+def create_zip_file(app_folder, target_dir, zip_filename, compress_level=DEFAULT_COMPRESSION_LEVEL):
     """
     Create a zip file containing the app folder and its dependencies.
 
@@ -231,19 +491,57 @@ def create_zip_file(app_folder, target_dir, zip_filename):
         app_folder (str): Path to the app folder.
         target_dir (str): Path to the target directory containing the dependencies.
         zip_filename (str): Name of the zip file to be created.
+        compress_level (int): The deflate level from 0 (store only) to 9 (smallest).
     """
-    with zipfile.ZipFile(zip_filename, 'w') as zipf:
-        # Add the app folder
-        for root, dirs, files in os.walk(app_folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                zipf.write(file_path)
+    packager = BundlePackager(compress_level=compress_level)
+    packager.add_directory(app_folder, ignore_rules=get_ignore_rules())
+    packager.add_directory(target_dir, arcname_root=target_dir, ignore_rules=get_ignore_rules(dependencies=True))
+    with open(zip_filename, 'wb') as f:
+        packager.write(f)
 
-        # Add the dependencies from the target directory
-        for root, dirs, files in os.walk(target_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                zipf.write(file_path, os.path.relpath(file_path, target_dir))
+
+def get_s3_upload_form_fields(content_type, s3_upload_file_credentials: S3UploadFileCredentials):
+    """
+    Get the form fields of the presigned S3 POST upload.
+    :param content_type:
+    :param s3_upload_file_credentials:
+    :return:
+    """
+    data = asdict(s3_upload_file_credentials)
+    data.pop('url')
+    for key in list(data.keys()):
+        if '_' in key:
+            data[key.replace('_', '-')] = data[key]
+            del data[key]
+    data.pop('s3-build-url')
+    data['Content-Type'] = content_type
+    return data
+
+
+def upload_stream_to_s3(content_type, file_name: str, file_chunks: Iterable[bytes], file_size: Optional[int],
+                        s3_upload_file_credentials: S3UploadFileCredentials):
+    """
+    Upload a file to S3 from an iterable of chunks without holding the request body in memory. The body is sent with
+    a Content-Length header when the file size is known and with chunked transfer encoding otherwise.
+    :param content_type:
+    :param file_name:
+    :param file_chunks:
+    :param file_size:
+    :param s3_upload_file_credentials:
+    :return:
+    :raises StreamedUploadRejected: when the file size is not known and the upload url requires a Content-Length
+    """
+    body = MultipartStream(get_s3_upload_form_fields(content_type, s3_upload_file_credentials), 'file', file_name,
+                           file_chunks, file_size)
+    api_client = APIClient(base_url=s3_upload_file_credentials.url, headers={"Content-Type": body.content_type})
+    with profile_stage("upload") as stage:
+        # The presigned POST overwrites the same key, so the upload can be sent again
+        response = api_client.post("/", data=body, idempotent=True)
+        stage.add_bytes(body.bytes_sent)
+    # S3 refuses the chunked transfer encoding of presigned POST uploads
+    if file_size is None and response.status_code in STREAMED_UPLOAD_REJECTED_STATUSES:
+        raise StreamedUploadRejected()
+    return response.status_code == HTTPStatus.NO_CONTENT
 
 
 def upload_zip_file_to_s3(content_type, file_path: str, s3_upload_file_credentials: S3UploadFileCredentials):
@@ -254,50 +552,126 @@ def upload_zip_file_to_s3(content_type, file_path: str, s3_upload_file_credentia
     :param s3_upload_file_credentials:
     :return:
     """
-    api_client = APIClient(base_url=s3_upload_file_credentials.url)
-    with open(file_path, 'rb') as f:
-        data = asdict(s3_upload_file_credentials)
-        data.pop('url')
-        for key in list(data.keys()):
-            if '_' in key:
-                data[key.replace('_', '-')] = data[key]
-                del data[key]
-        data.pop('s3-build-url')
-        data['Content-Type'] = content_type
-        files = {'file': f}
-        response = api_client.post("/", files=files, data=data)
-        return response.status_code == HTTPStatus.NO_CONTENT
+    return upload_stream_to_s3(content_type, os.path.basename(file_path), FileChunks(file_path, UPLOAD_CHUNK_SIZE),
+                               os.path.getsize(file_path), s3_upload_file_credentials)
 
 
-def package_and_upload_app_with_dependencies(s3_upload_file_credentials: S3UploadFileCredentials):
+def write_bundle_to_pipe(packager: BundlePackager, pipe: ChunkPipe):
     """
-    Package the app folder with its non-dev dependencies into a zip file and upload it to S3.
-    :param s3_upload_file_credentials: S3UploadFileCredentials
+    Write the bundle to the pipe, passing any error on to the reading side.
+    :param packager:
+    :param pipe:
     :return:
     """
-    # Get the non-dev dependencies from pyproject.toml
-    dependencies = get_dependencies_from_pyproject(PYPROJECT_TOML)
+    try:
+        with profile_stage("zip") as stage:
+            packager.write(pipe)
+            stage.add_bytes(packager.size)
+    except BaseException as e:
+        pipe.close(error=e)
+        return
+    pipe.close()
 
-    # Create a temporary directory
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Create a temporary requirements.txt file
-        requirements_file = os.path.join(temp_dir, 'requirements.txt')
-        create_requirements_file(dependencies, requirements_file)
 
-        # Install the non-dev dependencies in the temporary directory
-        install_dependencies(requirements_file, temp_dir)
+def stream_app_with_dependencies_to_s3(s3_upload_file_credentials: S3UploadFileCredentials,
+                                       app_requirements: tuple,
+                                       bundle_key: Optional[str] = None,
+                                       compress_level: int = DEFAULT_COMPRESSION_LEVEL,
+                                       reproducible: bool = False) -> Optional[str]:
+    """
+    Package the app folder with its non-dev dependencies and stream the zip file to S3 while it is being written,
+    without writing the archive to disk. Memory stays bounded by the pipe between packaging and upload, and
+    compression overlaps with the network transfer.
+
+    The upload uses chunked transfer encoding, so the upload url has to accept request bodies of unknown length,
+    which presigned S3 POST urls do not.
+    :param s3_upload_file_credentials:
+    :param app_requirements: the requirements of the app and whether they are locked, from get_app_requirements
+    :param bundle_key:
+    :param compress_level:
+    :param reproducible:
+    :return: the SHA-256 digest of the uploaded bundle, None if the upload failed
+    :raises StreamedUploadRejected: when the upload url requires the size of the bundle
+    """
+    cached_dependencies_path = get_app_dependencies(*app_requirements)
+    packager = create_bundle_packager(APP_FOLDER, cached_dependencies_path, compress_level,
+                                      reproducible=reproducible)
+
+    pipe = ChunkPipe()
+    producer = threading.Thread(target=write_bundle_to_pipe, args=(packager, pipe), daemon=True)
+    producer.start()
+    try:
+        uploaded = upload_stream_to_s3('application/zip', BUNDLE_ZIP_FILE_NAME, pipe, None, s3_upload_file_credentials)
+    finally:
+        pipe.abort()
+        producer.join()
+
+    # Without a local archive, the cache entry only remembers where the bundle was uploaded
+    if bundle_key and uploaded and cached_dependencies_path:
+        bundle_cache = get_bundle_cache()
+        bundle_cache.commit(bundle_key, bundle_cache.create(bundle_key))
+
+    return packager.digest if uploaded else None
+
+
+def package_and_upload_app_with_dependencies(s3_upload_file_credentials: S3UploadFileCredentials,
+                                             bundle_key: Optional[str] = None,
+                                             compress_level: int = DEFAULT_COMPRESSION_LEVEL,
+                                             stream_upload: bool = False,
+                                             reproducible: bool = False,
+                                             app_requirements: Optional[tuple] = None) -> Optional[str]:
+    """
+    Package the app folder with its non-dev dependencies into a zip file and upload it to S3. When a bundle key is
+    given, a bundle previously built for the same key is uploaded as is and a freshly built bundle is kept in the
+    bundle cache for the next run.
+    :param s3_upload_file_credentials: S3UploadFileCredentials
+    :param bundle_key:
+    :param compress_level:
+    :param stream_upload: stream the zip file to S3 while it is being written instead of writing it to disk first
+    :param reproducible: sort the entries and normalize their timestamps and permissions
+    :param app_requirements: the requirements of the app and whether they are locked, read from the project when
+    they are not given
+    :return: the SHA-256 digest of the uploaded bundle, None if the upload failed
+    """
+    bundle_cache = get_bundle_cache()
+    cached_bundle_path = bundle_cache.get(bundle_key) if bundle_key else None
+    if bundle_key and cached_bundle_path and (cached_bundle_path / BUNDLE_ZIP_FILE_NAME).is_file():
+        cached_zip_filename = str(cached_bundle_path / BUNDLE_ZIP_FILE_NAME)
+        if not upload_zip_file_to_s3('application/zip', cached_zip_filename, s3_upload_file_credentials):
+            return None
+        return bundle_cache.read_metadata(bundle_key).get("digest") or compute_file_digest(cached_zip_filename)
+
+    app_requirements = app_requirements or get_app_requirements()
+    if stream_upload:
+        try:
+            return stream_app_with_dependencies_to_s3(s3_upload_file_credentials, app_requirements, bundle_key,
+                                                      compress_level, reproducible)
+        except StreamedUploadRejected as e:
+            click.echo(f"{e.message} Writing the bundle to disk before uploading it.")
+
+    bundle_dir = bundle_cache.create(bundle_key) if bundle_key else Path(tempfile.mkdtemp())
+    try:
+        cached_dependencies_path = get_app_dependencies(*app_requirements)
 
-        # Clean up the temporary requirements.txt file
-        if os.path.exists(requirements_file):
-            os.remove(requirements_file)
         # Create a zip file containing the app folder and its dependencies
-        zip_filename = temp_dir + 'app_with_dependencies.zip'
-        create_zip_file(APP_FOLDER, temp_dir, zip_filename)
+        zip_filename = str(bundle_dir / BUNDLE_ZIP_FILE_NAME)
+        packager = create_bundle_packager(APP_FOLDER, cached_dependencies_path, compress_level,
+                                          reproducible=reproducible)
+        with profile_stage("zip") as stage, open(zip_filename, 'wb') as f:
+            digest = packager.write(f)
+            stage.add_bytes(f.tell())
 
         # Upload the zip file to S3
-        upload_zip_file_to_s3('application/zip', zip_filename, s3_upload_file_credentials)
+        uploaded = upload_zip_file_to_s3('application/zip', zip_filename, s3_upload_file_credentials)
 
-    return True
+        # Only keep complete bundles that were uploaded in the cache
+        if bundle_key and uploaded and cached_dependencies_path:
+            bundle_cache.commit(bundle_key, bundle_dir)
+    finally:
+        if bundle_dir.exists():
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+
+    return digest if uploaded else None
 
 
 def validate_bundle(app_name: str, build_s3_url: str, oauth_token: str):
@@ -313,7 +687,9 @@ def validate_bundle(app_name: str, build_s3_url: str, oauth_token: str):
         "app_name": app_name,
         "build_s3_url": build_s3_url
     }
-    response = api_client.post('/apps/api/app_builds/validate', data=data)
+    with profile_stage("validation") as stage:
+        response = api_client.post('/apps/api/app_builds/validate', data=data)
+        stage.add_bytes(len(response.content))
 
     if response.status_code not in [HTTPStatus.BAD_REQUEST, HTTPStatus.OK]:
         return False, None, None
@@ -369,32 +745,104 @@ def deploy_build(app_name: str, build_id: str, oauth_token: str):
     return response.status_code == HTTPStatus.ACCEPTED
 
 
-def package_and_validate_bundle(oauth_token: str):
+def upload_bundle(bundle_key: Optional[str], oauth_token: str, compress_level: int = DEFAULT_COMPRESSION_LEVEL,
+                  stream_upload: bool = False, reproducible: bool = False,
+                  app_requirements: Optional[tuple] = None) -> Optional[str]:
     """
-    gets the s3 upload credentials, packages the app with its dependencies and validates the bundle.
-
+    Get the s3 upload credentials, package the app with its dependencies and upload it to s3. The upload is skipped
+    when the bundle for the same key has already been uploaded for the same app and company and its s3 build url is
+    still valid. The digest of the bundle is printed either way.
+    :param bundle_key: the key of the bundle in the bundle cache, None to not cache the bundle
     :param oauth_token:
-    :return:
-    """
-    # get the s3 upload credentials
+    :param compress_level:
+    :param stream_upload:
+    :param reproducible:
+    :param app_requirements: the requirements of the app and whether they are locked, from get_app_requirements
+    :return: the s3 build url of the bundle
+    """
+    bundle_cache = get_bundle_cache()
+    metadata = bundle_cache.read_metadata(bundle_key) if bundle_key else {}
+    owner = get_bundle_owner(get_app_config().get("id"), get_role_and_company_id(oauth_token)[1],
+                             get_token_fingerprint(oauth_token))
+    s3_build_url = get_reusable_s3_build_url(metadata, owner)
+    if s3_build_url and bundle_key and bundle_cache.get(bundle_key):
+        click.echo("App and dependencies unchanged, reusing the previously uploaded bundle.")
+        if metadata.get("digest"):
+            click.echo(f"Bundle digest: sha256:{metadata['digest']}")
+        return s3_build_url
 
+    # get the s3 upload credentials
     s3_upload_file_credentials: Optional[S3UploadFileCredentials] = get_s3_upload_url_credentials("application/zip",
                                                                                         APP_BUILD_MODULE
                                                                                         , oauth_token)
     if not s3_upload_file_credentials:
         click.echo("Failed to get the s3 upload credentials.")
-        return None, None
+        return None
 
     # package and upload the app with dependencies to s3
     click.echo(click.style('Packaging and Uploading', fg='yellow'))
     loading_bar = start_circular_loading_bar(length=0)
-    upload_steps = package_and_upload_app_with_dependencies(s3_upload_file_credentials)
+    digest = package_and_upload_app_with_dependencies(s3_upload_file_credentials, bundle_key, compress_level,
+                                                      stream_upload, reproducible, app_requirements)
     stop_loading_bar(loading_bar)
-    if not upload_steps:
+    if not digest:
         click.echo("Failed to upload the app.")
-        return None, None
+        return None
 
     click.echo("Bundle uploaded successfully.")
+    click.echo(f"Bundle digest: sha256:{digest}")
+
+    # remember where the bundle was uploaded so that the next run for the same key can skip the upload
+    if bundle_key and bundle_cache.get(bundle_key):
+        bundle_cache.write_metadata(bundle_key, {
+            "s3_build_url": s3_upload_file_credentials.s3_build_url,
+            "owner": owner,
+            "uploaded_at": time.time(),
+            "digest": digest,
+        })
+
+    return s3_upload_file_credentials.s3_build_url
+
+
+def package_and_validate_bundle(oauth_token: str, compress_level: int = DEFAULT_COMPRESSION_LEVEL,
+                                stream_upload: bool = False, reproducible: bool = False):
+    """
+    packages the app with its dependencies, uploads it to s3 unless an identical bundle was already uploaded and
+    validates the bundle unless the identical bundle already passed the validation.
+
+    :param oauth_token:
+    :param compress_level:
+    :param stream_upload:
+    :param reproducible:
+    :return: the suggested build name and the s3 build url of the bundle
+    """
+    def get_requirements_and_bundle_key():
+        # Read once, for the bundle key and for the installation of the dependencies
+        app_requirements = get_app_requirements()
+        requirements, locked = app_requirements
+        if not locked:
+            # Constraints such as >= resolve to other versions over time, the bundle is not cached
+            return app_requirements, None
+        with profile_stage("bundle key"):
+            bundle_key = compute_bundle_key(APP_FOLDER, requirements, compress_level, get_ignore_rules(), reproducible)
+        return app_requirements, bundle_key
+
+    # The role and company that the upload needs are looked up while the app is hashed
+    (app_requirements, bundle_key), _ = run_concurrently(get_requirements_and_bundle_key,
+                                                         lambda: get_role_and_company_id(oauth_token))
+
+    s3_build_url = upload_bundle(bundle_key, oauth_token, compress_level, stream_upload, reproducible,
+                                 app_requirements)
+    if not s3_build_url:
+        return None, None
+
+    # An identical bundle already uploaded to the same url passed the validation, it is not validated again
+    bundle_cache = get_bundle_cache()
+    metadata = bundle_cache.read_metadata(bundle_key) if bundle_key else {}
+    if (metadata.get("s3_build_url") == s3_build_url and metadata.get("digest") and
+            metadata.get("validated_digest") == metadata["digest"]):
+        click.echo("Bundle unchanged since its last successful validation, skipping the validation.")
+        return metadata.get("suggested_build_name"), s3_build_url
 
     # get the app config
     app_config = get_app_config()
@@ -403,7 +851,7 @@ def package_and_validate_bundle(oauth_token: str):
     click.echo(click.style('Validating app bundle...', fg='cyan'))
     loading_bar = start_loading_bar(length=20, label="Validating", char='#')
     validation_successful, suggested_build_name, summary = validate_bundle(app_config.get("name"),
-                                                                           s3_upload_file_credentials.s3_build_url,
+                                                                           s3_build_url,
                                                                            oauth_token)
     stop_loading_bar(loading_bar)
     if summary:
@@ -414,4 +862,8 @@ def package_and_validate_bundle(oauth_token: str):
         click.echo("Validation failed for the app bundle.")
         return None, None
 
-    return suggested_build_name, s3_upload_file_credentials
+    if bundle_key and metadata.get("s3_build_url") == s3_build_url and bundle_cache.get(bundle_key):
+        bundle_cache.write_metadata(bundle_key, {**metadata, "validated_digest": metadata.get("digest"),
+                                                 "suggested_build_name": suggested_build_name})
+
+    return suggested_build_name, s3_build_url
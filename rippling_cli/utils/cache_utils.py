@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import sysconfig
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from rippling_cli.config.config import get_cache_dir
+from rippling_cli.constants import (
+    BUNDLE_CACHE_MAX_ENTRIES,
+    BUNDLE_CACHE_NAME,
+    BUNDLE_CACHE_VERSION,
+    DEPENDENCY_CACHE_MAX_BYTES,
+    DEPENDENCY_CACHE_NAME,
+    S3_BUILD_URL_DEFAULT_TTL,
+    S3_BUILD_URL_EXPIRY_MARGIN,
+    WHEELHOUSE_MAX_BYTES,
+    WHEELHOUSE_NAME,
+)
+from rippling_cli.core.disk_cache import DiskCache, get_directory_size
+from rippling_cli.core.ignore_rules import IgnoreRules
+from rippling_cli.core.packager import get_reproducible_date_time
+from rippling_cli.core.response_cache import response_cache
+
+HASH_CHUNK_SIZE = 1024 * 1024
+INTERPRETER_SCRIPT = ("import platform, sys, sysconfig; "
+                      "print(platform.python_version(), sys.implementation.cache_tag, sysconfig.get_platform())")
+
+
+def get_bundle_cache() -> DiskCache:
+    """
+    Get the cache holding the previously built app bundles.
+    :return:
+    """
+    return DiskCache(get_cache_dir(BUNDLE_CACHE_NAME), max_entries=BUNDLE_CACHE_MAX_ENTRIES)
+
+
+def get_dependency_cache() -> DiskCache:
+    """
+    Get the cache holding the installed dependency trees, keyed by the pinned requirement set.
+    :return:
+    """
+    return DiskCache(get_cache_dir(DEPENDENCY_CACHE_NAME), max_bytes=DEPENDENCY_CACHE_MAX_BYTES)
+
+
+def get_response_cache() -> DiskCache:
+    """
+    Get the cache holding the responses of the read endpoints of the API.
+    :return:
+    """
+    return response_cache.store
+
+
+def get_wheelhouse_dir() -> Path:
+    """
+    Get the directory of the persistent wheelhouse, creating it if needed.
+    :return:
+    """
+    wheelhouse_dir = get_cache_dir(WHEELHOUSE_NAME)
+    wheelhouse_dir.mkdir(parents=True, exist_ok=True)
+    return wheelhouse_dir
+
+
+def prune_wheelhouse(max_bytes: int = WHEELHOUSE_MAX_BYTES) -> None:
+    """
+    Remove the least recently used wheels until the wheelhouse fits in max_bytes. A wheel is used when it is
+    downloaded or built, or installed again by touch_installed_wheels, which updates its modification time: access
+    times cannot be relied on, since most file systems are mounted with relatime or noatime.
+    :param max_bytes:
+    :return:
+    """
+    wheelhouse_dir = get_cache_dir(WHEELHOUSE_NAME)
+    if not wheelhouse_dir.is_dir():
+        return
+    wheels = sorted(wheelhouse_dir.iterdir(), key=lambda wheel: wheel.stat().st_mtime, reverse=True)
+    total_size = 0
+    for wheel in wheels:
+        total_size += wheel.stat().st_size
+        if total_size > max_bytes:
+            wheel.unlink(missing_ok=True)
+
+
+def normalize_distribution_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+def touch_installed_wheels(site_dir: str) -> None:
+    """
+    Mark the wheels of the distributions installed in the site directory as used, so that pruning the wheelhouse
+    keeps them.
+    :param site_dir:
+    :return:
+    """
+    wheelhouse_dir = get_cache_dir(WHEELHOUSE_NAME)
+    if not wheelhouse_dir.is_dir() or not os.path.isdir(site_dir):
+        return
+    installed = set()
+    for entry in os.scandir(site_dir):
+        if entry.name.endswith(".dist-info"):
+            name, _, version = entry.name[:-len(".dist-info")].partition("-")
+            installed.add((normalize_distribution_name(name), version))
+    for wheel in wheelhouse_dir.iterdir():
+        name, _, rest = wheel.name.partition("-")
+        if (normalize_distribution_name(name), rest.partition("-")[0]) in installed:
+            os.utime(wheel)
+
+
+def get_wheelhouse_size() -> int:
+    """
+    Get the total size of the wheelhouse in bytes.
+    :return:
+    """
+    return get_directory_size(get_cache_dir(WHEELHOUSE_NAME))
+
+
+def get_project_interpreter() -> str:
+    """
+    Identify the python interpreter of the poetry environment of the project, which the dependencies are installed
+    for: its version, implementation and platform. The running interpreter is used when the project has no poetry
+    environment.
+    :return:
+    """
+    try:
+        result = subprocess.run(["poetry", "run", "python", "-c", INTERPRETER_SCRIPT], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True)
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip().splitlines()[-1]
+    except OSError:
+        pass
+    return f"{platform.python_version()} {sys.implementation.cache_tag} {sysconfig.get_platform()}"
+
+
+def compute_requirements_key(requirements_file: str) -> str:
+    """
+    Compute the key of an installed dependency tree from the pinned requirements and the target interpreter.
+    :param requirements_file:
+    :return:
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"{get_project_interpreter()}\0".encode())
+    hash_file(requirements_file, hasher)
+    return hasher.hexdigest()
+
+
+def hash_file(file_path: str, hasher) -> None:
+    """
+    Feed the content of the file into the hasher.
+    :param file_path:
+    :param hasher:
+    :return:
+    """
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+
+
+def get_packaging_options_key(compress_level: int, ignore_rules: IgnoreRules, reproducible: bool) -> bytes:
+    """
+    Serialize the packaging options that change the bytes of a bundle.
+    :param compress_level:
+    :param ignore_rules:
+    :param reproducible:
+    :return:
+    """
+    return json.dumps({
+        "version": BUNDLE_CACHE_VERSION,
+        "compress_level": compress_level,
+        "ignore": ignore_rules.patterns,
+        "reproducible_date_time": get_reproducible_date_time() if reproducible else None,
+    }).encode()
+
+
+def compute_bundle_key(app_folder: str, requirements: list[str], compress_level: int, ignore_rules: IgnoreRules,
+                       reproducible: bool = False) -> str:
+    """
+    Compute the content address of a bundle from the files of the app folder that are not ignored, the requirement
+    set, the interpreter the dependencies are installed for and the packaging options. Two packaging runs with the
+    same key produce an equivalent bundle, provided the requirements are locked.
+    :param app_folder:
+    :param requirements:
+    :param compress_level:
+    :param ignore_rules:
+    :param reproducible:
+    :return:
+    """
+    hasher = hashlib.sha256()
+    hasher.update(get_packaging_options_key(compress_level, ignore_rules, reproducible))
+    hasher.update(f"{get_project_interpreter()}\0".encode())
+    hasher.update(json.dumps(requirements).encode())
+
+    for entry, bundle_path in ignore_rules.walk(app_folder, os.path.normpath(app_folder).replace(os.sep, "/")):
+        hasher.update(f"\0{bundle_path}\0".encode())
+        hash_file(entry.path, hasher)
+
+    return hasher.hexdigest()
+
+
+def compute_dependency_layer_key(compress_level: int, ignore_rules: IgnoreRules, reproducible: bool = False) -> str:
+    """
+    Compute the key of a dependency layer within its dependency cache entry from the packaging options.
+    :param compress_level:
+    :param ignore_rules:
+    :param reproducible:
+    :return:
+    """
+    return hashlib.sha256(get_packaging_options_key(compress_level, ignore_rules, reproducible)).hexdigest()
+
+
+def compute_file_digest(file_path: str) -> str:
+    """
+    Compute the SHA-256 digest of the file.
+    :param file_path:
+    :return:
+    """
+    hasher = hashlib.sha256()
+    hash_file(file_path, hasher)
+    return hasher.hexdigest()
+
+
+def get_s3_build_url_expiration(s3_build_url: str, uploaded_at: float) -> float:
+    """
+    Get the timestamp after which the s3 build url can no longer be used. Presigned urls carry their own expiration,
+    other urls are considered valid for a default period after the upload.
+    :param s3_build_url:
+    :param uploaded_at:
+    :return:
+    """
+    query = parse_qs(urlparse(s3_build_url).query)
+    amz_date = query.get("X-Amz-Date", [None])[0]
+    amz_expires = query.get("X-Amz-Expires", [None])[0]
+    if amz_date and amz_expires:
+        try:
+            signed_at = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).timestamp()
+            return signed_at + int(amz_expires)
+        except ValueError:
+            pass
+    return uploaded_at + S3_BUILD_URL_DEFAULT_TTL
+
+
+def get_bundle_owner(app_id: Optional[str], company_id: Optional[str], token_fingerprint: str) -> str:
+    """
+    Identify the app and the tenant a bundle is uploaded for: the company when it is known, the token otherwise.
+    The bundle itself does not depend on them, but its s3 build url is only valid for the app and company it was
+    uploaded for.
+    :param app_id:
+    :param company_id:
+    :param token_fingerprint:
+    :return:
+    """
+    tenant = f"company:{company_id}" if company_id else f"token:{token_fingerprint}"
+    return hashlib.sha256(f"{app_id}\0{tenant}".encode()).hexdigest()
+
+
+def get_reusable_s3_build_url(bundle_metadata: dict, owner: str) -> Optional[str]:
+    """
+    Get the s3 build url of a cached bundle if it was uploaded for the same app and tenant and is still valid for
+    long enough to validate and create the build.
+    :param bundle_metadata:
+    :param owner: the owner of the bundle, as returned by get_bundle_owner
+    :return:
+    """
+    s3_build_url = bundle_metadata.get("s3_build_url")
+    if not s3_build_url or bundle_metadata.get("owner") != owner:
+        return None
+    expiration = get_s3_build_url_expiration(s3_build_url, bundle_metadata.get("uploaded_at", 0))
+    if time.time() + S3_BUILD_URL_EXPIRY_MARGIN >= expiration:
+        return None
+    return s3_build_url
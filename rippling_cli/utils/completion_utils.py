@@ -0,0 +1,68 @@
+from typing import Iterable
+
+import click
+
+from rippling_cli.config.config import get_completion_cache_data, save_completion_cache
+from rippling_cli.constants import COMPLETION_CACHE_MAX_IDS
+
+APP_ID = "app_id"
+BUILD_ID = "build_id"
+# The options whose values are completed with the remembered ids
+ID_OPTIONS = {"--app_id": APP_ID, "--build_id": BUILD_ID}
+
+
+def remember_ids(kind: str, ids: Iterable) -> None:
+    """
+    Remember the ids listed by a command, most recent first, for the completion of the shell.
+    :param kind: APP_ID or BUILD_ID
+    :param ids:
+    :return:
+    """
+    listed_ids = [str(id) for id in ids if id]
+    if not listed_ids:
+        return
+    cache_data = get_completion_cache_data() or {}
+    previous_ids = [id for id in cache_data.get(kind, []) if id not in listed_ids]
+    cache_data[kind] = (listed_ids + previous_ids)[:COMPLETION_CACHE_MAX_IDS]
+    try:
+        save_completion_cache(cache_data)
+    except OSError:
+        # The completion is a convenience, which never fails a command
+        pass
+
+
+def get_remembered_ids(kind: str) -> list[str]:
+    """
+    Get the ids remembered for the completion, most recent first.
+    :param kind: APP_ID or BUILD_ID
+    :return:
+    """
+    return (get_completion_cache_data() or {}).get(kind, [])
+
+
+def get_completions(root: click.Command, words: list[str], incomplete: str) -> list[str]:
+    """
+    Complete a word of a command line of the shell: the subcommands of a group, the options of a command, or the
+    remembered ids for the value of an id option.
+    :param root: the root command of the command line
+    :param words: the words before the word to complete
+    :param incomplete: the beginning of the word to complete
+    :return: the matching completions
+    """
+    ctx = click.Context(root)
+    command = root
+    for word in words:
+        subcommand = command.get_command(ctx, word) if isinstance(command, click.Group) else None
+        if subcommand is not None:
+            command = subcommand
+
+    if words and words[-1] in ID_OPTIONS:
+        return [id for id in get_remembered_ids(ID_OPTIONS[words[-1]]) if id.startswith(incomplete)]
+    if incomplete.startswith("-"):
+        candidates = [opt for param in command.params if isinstance(param, click.Option) and not param.hidden
+                      for opt in param.opts] + ["--help"]
+    elif isinstance(command, click.Group):
+        candidates = command.list_commands(ctx)
+    else:
+        candidates = []
+    return sorted(candidate for candidate in candidates if candidate.startswith(incomplete))
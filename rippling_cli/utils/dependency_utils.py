@@ -0,0 +1,242 @@
+import re
+import sys
+from typing import Optional
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+from rippling_cli.exceptions.build_exceptions import LockFileNotUsable
+
+# A set of marker clauses joined with "or", each clause being a set of markers joined with "and". The empty clause
+# is always true, so a package reached through it is always installed.
+Markers = frozenset[frozenset[str]]
+ALWAYS: Markers = frozenset({frozenset()})
+MAX_MARKER_CLAUSES = 8
+
+REQUIREMENT_NAME_PATTERN = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[([^\]]*)\])?")
+VCS_SOURCE_TYPES = {"git", "hg", "svn", "bzr"}
+LOCAL_SOURCE_TYPES = {"file", "directory"}
+
+
+def load_toml(path: str) -> dict:
+    """
+    Load a TOML file.
+    :param path:
+    :return:
+    """
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def canonicalize_name(name: str) -> str:
+    """
+    Normalize a distribution name as defined by PEP 503, so that e.g. Flask_SQLAlchemy matches flask-sqlalchemy.
+    :param name:
+    :return:
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def get_pyproject_main_dependencies(pyproject: dict) -> dict[str, tuple[set[str], Markers]]:
+    """
+    Get the direct non-dev dependencies declared in pyproject.toml, either in the poetry section or in the PEP 621
+    project section, along with their requested extras and markers.
+    :param pyproject:
+    :return: a mapping of canonical names to extras and markers
+    """
+    dependencies: dict[str, tuple[set[str], Markers]] = {}
+
+    for name, constraint in pyproject.get("tool", {}).get("poetry", {}).get("dependencies", {}).items():
+        if name == "python":
+            continue
+        for spec in constraint if isinstance(constraint, list) else [constraint]:
+            if isinstance(spec, dict) and spec.get("optional"):
+                continue
+            extras = set(spec.get("extras", [])) if isinstance(spec, dict) else set()
+            marker = spec.get("markers") if isinstance(spec, dict) else None
+            add_dependency(dependencies, canonicalize_name(name), extras, to_markers(marker))
+
+    for requirement in pyproject.get("project", {}).get("dependencies", []):
+        match = REQUIREMENT_NAME_PATTERN.match(requirement)
+        if not match:
+            continue
+        extras = {extra.strip() for extra in (match.group(2) or "").split(",") if extra.strip()}
+        marker = requirement.split(";", 1)[1].strip() if ";" in requirement else None
+        add_dependency(dependencies, canonicalize_name(match.group(1)), extras, to_markers(marker))
+
+    return dependencies
+
+
+def to_markers(marker: Optional[str]) -> Markers:
+    return frozenset({frozenset({marker.strip()})}) if marker and marker.strip() else ALWAYS
+
+
+def and_markers(left: Markers, right: Markers) -> Markers:
+    return frozenset(left_clause | right_clause for left_clause in left for right_clause in right)
+
+
+def or_markers(left: Markers, right: Markers) -> Markers:
+    combined = left | right
+    if frozenset() in combined or len(combined) > MAX_MARKER_CLAUSES:
+        # Installing a package in too many situations is harmless, missing it is not
+        return ALWAYS
+    return combined
+
+
+def add_dependency(dependencies: dict[str, tuple[set[str], Markers]], name: str, extras: set[str],
+                   markers: Markers) -> bool:
+    """
+    Merge a dependency edge into the dependencies.
+    :return: True if the extras or markers of the dependency changed
+    """
+    if name not in dependencies:
+        dependencies[name] = (set(extras), markers)
+        return True
+    current_extras, current_markers = dependencies[name]
+    merged_markers = or_markers(current_markers, markers)
+    changed = not extras <= current_extras or merged_markers != current_markers
+    dependencies[name] = (current_extras | extras, merged_markers)
+    return changed
+
+
+def format_markers(markers: Markers) -> Optional[str]:
+    if markers == ALWAYS:
+        return None
+    clauses = [
+        " and ".join(f"({marker})" if len(clause) > 1 else marker for marker in sorted(clause)) for clause in markers
+    ]
+    if len(clauses) == 1:
+        return clauses[0]
+    return " or ".join(f"({clause})" for clause in sorted(clauses))
+
+
+def get_package_dependency_edges(package: dict, extras: set[str]) -> list[tuple[str, set[str], Markers]]:
+    """
+    Get the dependencies of a locked package, including the optional ones enabled by the requested extras.
+    :param package:
+    :param extras:
+    :return:
+    """
+    enabled_optional = set()
+    for extra in extras:
+        for requirement in package.get("extras", {}).get(extra, []):
+            match = REQUIREMENT_NAME_PATTERN.match(requirement)
+            if match:
+                enabled_optional.add(canonicalize_name(match.group(1)))
+
+    edges = []
+    for name, constraint in package.get("dependencies", {}).items():
+        canonical_name = canonicalize_name(name)
+        for spec in constraint if isinstance(constraint, list) else [constraint]:
+            if isinstance(spec, dict) and spec.get("optional") and canonical_name not in enabled_optional:
+                continue
+            spec_extras = set(spec.get("extras", [])) if isinstance(spec, dict) else set()
+            marker = spec.get("markers") if isinstance(spec, dict) else None
+            edges.append((canonical_name, spec_extras, to_markers(marker)))
+    return edges
+
+
+def get_package_markers(package: dict) -> Optional[Markers]:
+    """
+    Get the markers computed by poetry itself for the package, which recent lock files store per group.
+    :param package:
+    :return:
+    """
+    markers = package.get("markers")
+    if isinstance(markers, dict):
+        markers = markers.get("main")
+    return to_markers(markers) if isinstance(markers, str) else None
+
+
+def get_package_hashes(package: dict, lock: dict) -> list[str]:
+    files = package.get("files")
+    if files is None:
+        # Lock files before poetry 1.2 keep the hashes in the metadata table
+        files = lock.get("metadata", {}).get("files", {}).get(package.get("name"), [])
+    return sorted({file["hash"] for file in files if file.get("hash")})
+
+
+def format_locked_requirement(package: dict) -> tuple[str, bool]:
+    """
+    Format the pinned requirement of a locked package.
+    :param package:
+    :return: the requirement and whether it can be verified with hashes
+    """
+    name = package["name"]
+    source = package.get("source", {})
+    source_type = source.get("type")
+    if source_type in VCS_SOURCE_TYPES:
+        reference = source.get("resolved_reference") or source.get("reference")
+        return f"{name} @ {source_type}+{source['url']}{'@' + reference if reference else ''}", False
+    if source_type == "url":
+        return f"{name} @ {source['url']}", False
+    if source_type in LOCAL_SOURCE_TYPES:
+        return source["url"], False
+    return f"{name}=={package['version']}", True
+
+
+def get_locked_packages(lock: dict) -> dict[str, list[dict]]:
+    """
+    Get the locked packages by canonical name. A package may be locked at several versions, e.g. one per Python
+    version, which only the markers poetry stored for each of them tell apart.
+    :param lock:
+    :return:
+    """
+    packages: dict[str, list[dict]] = {}
+    for package in lock.get("package", []):
+        packages.setdefault(canonicalize_name(package["name"]), []).append(package)
+    for name, variants in packages.items():
+        if len(variants) > 1 and any(get_package_markers(package) is None for package in variants):
+            versions = ", ".join(str(package.get("version")) for package in variants)
+            raise LockFileNotUsable(f"poetry.lock has several versions of {name} ({versions}) without the markers "
+                                    f"telling them apart, lock it again with a recent poetry.")
+    return packages
+
+
+def get_locked_requirements(pyproject_toml: str, poetry_lock: str) -> list[str]:
+    """
+    Resolve the complete set of non-dev requirements of the project from poetry.lock: every direct and transitive
+    dependency pinned to its locked version, with its environment markers and, when every package has them, its
+    hashes. With such a set pip has nothing left to resolve.
+    :param pyproject_toml:
+    :param poetry_lock:
+    :return: the lines of the requirements file
+    :raises LockFileNotUsable: when the lock file does not cover the dependencies
+    """
+    pyproject = load_toml(pyproject_toml)
+    lock = load_toml(poetry_lock)
+    packages = get_locked_packages(lock)
+
+    resolved = get_pyproject_main_dependencies(pyproject)
+    pending = list(resolved)
+    while pending:
+        name = pending.pop()
+        if name not in packages:
+            raise LockFileNotUsable()
+        extras, markers = resolved[name]
+        for package in packages[name]:
+            # Each version of a package locked several times only brings its dependencies where it is installed
+            package_markers = get_package_markers(package) if len(packages[name]) > 1 else None
+            package_markers = and_markers(markers, package_markers) if package_markers else markers
+            for dependency_name, dependency_extras, edge_markers in get_package_dependency_edges(package, extras):
+                if add_dependency(resolved, dependency_name, dependency_extras,
+                                  and_markers(package_markers, edge_markers)):
+                    pending.append(dependency_name)
+
+    requirements = []
+    use_hashes = True
+    for name in sorted(resolved):
+        for package in packages[name]:
+            requirement, hashable = format_locked_requirement(package)
+            hashes = get_package_hashes(package, lock) if hashable else []
+            use_hashes = use_hashes and bool(hashes)
+            markers = get_package_markers(package) or resolved[name][1]
+            marker = format_markers(markers)
+            requirements.append((f"{requirement} ; {marker}" if marker else requirement, hashes))
+
+    return [
+        requirement + "".join(f" --hash={file_hash}" for file_hash in hashes) if use_hashes else requirement
+        for requirement, hashes in requirements
+    ]
@@ -5,8 +5,8 @@ from pathlib import Path
 from typing import Optional
 
 import click
-import requests  # type: ignore
 
+from rippling_cli.core.api_client import connection_pool, get_session
 from rippling_cli.exceptions.build_exceptions import DirectoryCreationFailed
 
 
@@ -58,7 +58,7 @@ def download_file_using_url(url: str, filename: Optional[str] = None):
     output_path = Path.cwd()
     output_file = output_path / filename
     try:
-        response = requests.get(url, stream=True)
+        response = get_session(url).get(url, stream=True, timeout=connection_pool.timeout)
         if response.status_code != HTTPStatus.OK:
             return False
         with open(output_file, "wb") as file:
@@ -81,3 +81,17 @@ def delete_zip_file(zip_file_path):
         os.remove(zip_file_path)
     except FileNotFoundError:
         pass
+
+
+def format_size(size: int) -> str:
+    """
+    Format a size in bytes for display.
+    :param size:
+    :return:
+    """
+    value = float(size)
+    for unit in ["B", "KB", "MB"]:
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
@@ -1,36 +1,126 @@
+import hashlib
+import time
 from http import HTTPStatus
 
 import click
 
 from rippling_cli.cli.commands.login import login
 from rippling_cli.cli.commands.logout import logout
-from rippling_cli.constants import RIPPLING_API
+from rippling_cli.config.config import get_account_cache_data, save_account_cache
+from rippling_cli.constants import (
+    ACCESS_TOKEN_ENV_VAR,
+    ACCESS_TOKEN_REFRESH_MARGIN,
+    ACCOUNT_CACHE_TTL,
+    REFRESH_TOKEN_ENV_VAR,
+    RIPPLING_API,
+)
 from rippling_cli.core.api_client import APIClient
-from rippling_cli.core.oauth_token import OAuthToken
+from rippling_cli.core.profiler import profile_stage
+from rippling_cli.exceptions.login_exceptions import InteractiveLoginRequired
+
+# The account cache entries read or stored by this process, by token fingerprint and key, so that the next commands
+# of a shell or daemon find them without reading the account cache again
+account_entries: dict[tuple[str, str], dict] = {}
 
 
 def ensure_logged_in(ctx: click.Context):
-    if OAuthToken.is_token_expired():
-        ctx.invoke(logout)
-        ctx.invoke(login)
+    """
+    Refresh the access token when it is about to expire, checked against the credentials loaded once for the
+    invocation, and log in again through the browser when it expired and could not be refreshed. Where the browser
+    login is not possible, in the daemon, InteractiveLoginRequired is raised for the command to run in the CLI process.
+    :param ctx:
+    :return:
+    """
+    credentials = ctx.obj.credentials
+    if credentials.refresh(ctx.obj.oauth_credentials, ACCESS_TOKEN_REFRESH_MARGIN) or not credentials.is_expired():
+        return
+    if credentials.headless:
+        raise click.ClickException(f"The access token expired and could not be refreshed. Set {ACCESS_TOKEN_ENV_VAR} "
+                                   f"to a valid access token or {REFRESH_TOKEN_ENV_VAR} to a valid refresh token.")
+    if not ctx.obj.interactive_login:
+        raise InteractiveLoginRequired()
+    ctx.invoke(logout)
+    ctx.invoke(login)
+
+
+def get_token_fingerprint(oauth_token) -> str:
+    """
+    Identify the token the cached account data belongs to, without storing the token a second time.
+    :param oauth_token:
+    :return:
+    """
+    return hashlib.sha256(str(oauth_token).encode()).hexdigest()
+
+
+def get_cached_account_data(oauth_token, key):
+    """
+    Get an entry of the account cache, unless it expired or was cached for another token.
+    :param oauth_token:
+    :param key:
+    :return: the cached value, or None on a miss
+    """
+    token_fingerprint = get_token_fingerprint(oauth_token)
+    entry = account_entries.get((token_fingerprint, key))
+    if entry is None:
+        cache_data = get_account_cache_data()
+        if not cache_data or cache_data.get("token") != token_fingerprint:
+            return None
+        entry = cache_data.get("entries", {}).get(key)
+        if entry:
+            account_entries[(token_fingerprint, key)] = entry
+    if not entry or time.time() - entry.get("cached_at", 0) >= ACCOUNT_CACHE_TTL:
+        return None
+    return entry.get("value")
+
+
+def cache_account_data(oauth_token, key, value):
+    """
+    Store an entry in the account cache, dropping the entries cached for another token.
+    :param oauth_token:
+    :param key:
+    :param value:
+    :return:
+    """
+    token_fingerprint = get_token_fingerprint(oauth_token)
+    cache_data = get_account_cache_data()
+    if not cache_data or cache_data.get("token") != token_fingerprint:
+        cache_data = {"token": token_fingerprint, "entries": {}}
+    entry = account_entries[(token_fingerprint, key)] = {"cached_at": time.time(), "value": value}
+    cache_data.setdefault("entries", {})[key] = entry
+    save_account_cache(cache_data)
 
 
 def get_account_info(oauth_token):
+    account_info = get_cached_account_data(oauth_token, "account_info")
+    if account_info:
+        return account_info
+
     api_client = APIClient(base_url=RIPPLING_API, headers={"Authorization": f"Bearer {oauth_token}"})
     endpoint = "/auth_ext/get_account_info_v2/"
     response = api_client.get(endpoint)
     if response.status_code != HTTPStatus.OK:
         return {}
-    return response.json()
+    account_info = response.json()
+    if account_info:
+        cache_account_data(oauth_token, "account_info", account_info)
+    return account_info
 
 
 def get_employee_details(role_id, oauth_token):
+    cache_key = f"employee:{role_id}"
+    employee_details = get_cached_account_data(oauth_token, cache_key)
+    if employee_details:
+        return employee_details
+
     api_client = APIClient(base_url=RIPPLING_API, headers={"Authorization": f"Bearer {oauth_token}"})
     endpoint = f"/api/hub/api/employment_roles_with_company/{role_id}"
     response = api_client.get(endpoint)
     if response.status_code != HTTPStatus.OK:
         return {}
-    return response.json()
+    employee_details = response.json()
+    if employee_details:
+        cache_account_data(oauth_token, cache_key, employee_details)
+    return employee_details
 
 
 def get_current_role_name_and_email(oauth_token):
@@ -52,7 +142,8 @@ def get_role_and_company_id(oauth_token):
 
 
 def get_api_client_with_role_company(oauth_token):
-    role_id, company_id = get_role_and_company_id(oauth_token)
+    with profile_stage("role and company lookup"):
+        role_id, company_id = get_role_and_company_id(oauth_token)
     if not role_id or not company_id:
         return None
     return APIClient(base_url=RIPPLING_API, headers={
@@ -1,32 +1,216 @@
-from typing import Callable, Optional
+import csv
+import itertools
+import json
+import sys
+import tempfile
+from typing import Callable, Iterator, Optional, TextIO
 
 import click
 
-from rippling_cli.constants import DEFAULT_PAGE_SIZE, RIPPLING_API
+from rippling_cli.constants import DEFAULT_PAGE_SIZE, PAGINATION_PREFETCH_DEPTH, RIPPLING_API
 from rippling_cli.core.api_client import APIClient
 
+TEXT_FORMAT = "text"
+EXPORT_FORMATS = ("jsonl", "csv", "json")
 
-def paginate_data(endpoint: str, oauth_token: str, display_function: Callable, data: Optional[dict] = None,
-                  search_query: Optional[str]=None):
+
+def listing_options(function: Callable) -> Callable:
+    """
+    Add the options selecting how many items a list command fetches and how it prints them.
+    :param function:
+    :return:
     """
-    Paginate the data using the endpoint and display the data using the display function provided.
+    options = [
+        click.option("--all", "fetch_all", is_flag=True, help="Fetch every page without asking to load more."),
+        click.option("--page_size", type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True,
+                     help="The number of items fetched per request."),
+        click.option("--limit", type=click.IntRange(min=1), help="The maximum number of items to list."),
+        click.option("--format", "output_format", type=click.Choice((TEXT_FORMAT, *EXPORT_FORMATS)),
+                     default=TEXT_FORMAT, show_default=True,
+                     help="The output format. The export formats stream every page to stdout without asking to load "
+                          "more."),
+    ]
+    for option in reversed(options):
+        function = option(function)
+    return function
+
+
+def iterate_pages(endpoint: str, oauth_token: str, data: Optional[dict] = None, search_query: Optional[str] = None,
+                  page_size: int = DEFAULT_PAGE_SIZE, limit: Optional[int] = None,
+                  prefetch: int = PAGINATION_PREFETCH_DEPTH) -> Iterator[list]:
+    """
+    Iterate over the pages of the endpoint, the last one being cut to the limit.
+    :param endpoint:
+    :param oauth_token:
+    :param data:
     :param search_query:
+    :param page_size:
+    :param limit: the maximum number of items over all the pages
+    :param prefetch: the number of pages fetched ahead of the current one
+    :return:
+    """
+    api_client = APIClient(base_url=RIPPLING_API, headers={"Authorization": f"Bearer {oauth_token}"})
+    if limit is not None:
+        page_size = min(page_size, limit)
+    remaining = limit
+    for page in api_client.find_paginated(endpoint, page_size=page_size, data=data, search_query=search_query,
+                                          prefetch=prefetch):
+        if not page:
+            return
+        if remaining is not None:
+            page = page[:remaining]
+            remaining -= len(page)
+        yield page
+        if len(page) < page_size or remaining == 0:
+            return
+
+
+def iterate_items(endpoint: str, oauth_token: str, data: Optional[dict] = None, search_query: Optional[str] = None,
+                  page_size: int = DEFAULT_PAGE_SIZE, limit: Optional[int] = None,
+                  prefetch: int = PAGINATION_PREFETCH_DEPTH) -> Iterator:
+    """
+    Iterate over the items of the endpoint one at a time, decoding the pages as they stream in so that memory does
+    not grow with the page size.
     :param endpoint:
     :param oauth_token:
-    :param display_function:
     :param data:
+    :param search_query:
+    :param page_size:
+    :param limit: the maximum number of items
+    :param prefetch: the number of pages of items decoded ahead of the current item, prefetch * page_size items
     :return:
     """
     api_client = APIClient(base_url=RIPPLING_API, headers={"Authorization": f"Bearer {oauth_token}"})
-    page_number = 1
+    if limit is not None:
+        page_size = min(page_size, limit)
+    items = api_client.find_paginated_items(endpoint, page_size=page_size, data=data, search_query=search_query,
+                                            prefetch=prefetch)
+    return itertools.islice(items, limit)
 
-    for page in api_client.find_paginated(endpoint, data=data, search_query=search_query):
-        if not page:
+
+def paginate_data(endpoint: str, oauth_token: str, display_function: Callable, data: Optional[dict] = None,
+                  search_query: Optional[str]=None, prefetch: int = PAGINATION_PREFETCH_DEPTH,
+                  page_size: int = DEFAULT_PAGE_SIZE, limit: Optional[int] = None, interactive: bool = True):
+    """
+    Paginate the data using the endpoint and display the data using the display function provided. The next pages
+    are fetched while the current one is displayed, so that loading more does not wait for the API.
+    :param search_query:
+    :param endpoint:
+    :param oauth_token:
+    :param display_function:
+    :param data:
+    :param prefetch: the number of pages fetched ahead of the displayed one
+    :param page_size:
+    :param limit: the maximum number of items to display
+    :param interactive: whether to ask before loading every page after the first
+    :return:
+    """
+    for page_number, page in enumerate(iterate_pages(endpoint, oauth_token, data=data, search_query=search_query,
+                                                     page_size=page_size, limit=limit, prefetch=prefetch)):
+        if interactive and page_number > 0 and not click.confirm("Load more ?"):
             break
 
         display_function(page)
 
-        if len(page) < DEFAULT_PAGE_SIZE or not click.confirm("Load more ?"):
-            break
 
-        page_number += 1
+def flatten_item(item: dict, prefix: str = "") -> dict:
+    """
+    Flatten the nested objects of the item into dotted keys, e.g. {"created_by": {"fullName": ...}} into
+    {"created_by.fullName": ...}, for the formats without nesting.
+    :param item:
+    :param prefix:
+    :return:
+    """
+    flat_item = {}
+    for key, value in item.items():
+        if isinstance(value, dict):
+            flat_item.update(flatten_item(value, f"{prefix}{key}."))
+        elif isinstance(value, list):
+            flat_item[f"{prefix}{key}"] = json.dumps(value)
+        else:
+            flat_item[f"{prefix}{key}"] = value
+    return flat_item
+
+
+def write_csv_items(items: Iterator, output: TextIO):
+    """
+    Write the items as CSV. The columns are the union of the fields of every item, in the order they first appear,
+    so the rows are spooled to a temporary file until the last item is known, keeping memory constant.
+    :param items:
+    :param output:
+    :return:
+    """
+    fieldnames: dict = {}
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as rows:
+        for item in items:
+            flat_item = flatten_item(item)
+            fieldnames.update(dict.fromkeys(flat_item))
+            rows.write(json.dumps(flat_item) + "\n")
+        if not fieldnames:
+            return
+
+        csv_writer = csv.DictWriter(output, fieldnames=list(fieldnames), restval="")
+        csv_writer.writeheader()
+        rows.seek(0)
+        for row in rows:
+            csv_writer.writerow(json.loads(row))
+
+
+def write_items(items: Iterator, output_format: str, output: TextIO, flush_every: int = DEFAULT_PAGE_SIZE):
+    """
+    Write the items as they arrive, so that memory does not grow with the number of items. The CSV rows are written
+    once every item arrived, see write_csv_items.
+    :param items:
+    :param output_format: jsonl, csv or json
+    :param output:
+    :param flush_every: the number of items after which the output is flushed, for the consumers reading along
+    :return:
+    """
+    if output_format == "csv":
+        write_csv_items(items, output)
+        output.flush()
+        return
+
+    item_count = 0
+    if output_format == "json":
+        output.write("[")
+
+    for item in items:
+        if output_format == "jsonl":
+            output.write(json.dumps(item) + "\n")
+        else:
+            output.write(("," if item_count else "") + "\n  " + json.dumps(item))
+        item_count += 1
+        if item_count % flush_every == 0:
+            output.flush()
+
+    if output_format == "json":
+        output.write("\n]\n" if item_count else "]\n")
+    output.flush()
+
+
+def list_data(endpoint: str, oauth_token: str, display_function: Callable, data: Optional[dict] = None,
+              search_query: Optional[str] = None, fetch_all: bool = False, page_size: int = DEFAULT_PAGE_SIZE,
+              limit: Optional[int] = None, output_format: str = TEXT_FORMAT):
+    """
+    List the items of the endpoint for the options of listing_options: displayed page by page as text, or exported
+    to stdout in one of the export formats.
+    :param endpoint:
+    :param oauth_token:
+    :param display_function: displays a page in the text format
+    :param data:
+    :param search_query:
+    :param fetch_all:
+    :param page_size:
+    :param limit:
+    :param output_format:
+    :return:
+    """
+    if output_format == TEXT_FORMAT:
+        paginate_data(endpoint, oauth_token, display_function, data=data, search_query=search_query,
+                      page_size=page_size, limit=limit, interactive=not fetch_all)
+        return
+
+    items = iterate_items(endpoint, oauth_token, data=data, search_query=search_query, page_size=page_size,
+                          limit=limit)
+    write_items(items, output_format, sys.stdout, flush_every=page_size)
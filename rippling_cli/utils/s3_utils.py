@@ -1,6 +1,7 @@
 from http import HTTPStatus
 from typing import Optional
 
+from rippling_cli.core.profiler import profile_stage
 from rippling_cli.core.s3 import S3UploadFileCredentials
 from rippling_cli.utils.login_utils import get_api_client_with_role_company
 
@@ -15,7 +16,9 @@ def get_s3_upload_url_credentials(content_type, module, oauth_token) -> Optional
     """
     api_client = get_api_client_with_role_company(oauth_token)
     endpoint = f"/hub/api/get_upload_url?contentType={content_type}&module={module}&preview_url=true"
-    response = api_client.get(endpoint)
+    with profile_stage("s3 credentials") as stage:
+        response = api_client.get(endpoint)
+        stage.add_bytes(len(response.content))
     if response.status_code != HTTPStatus.OK:
         return None
     data = response.json().get("data")